@@ -0,0 +1,106 @@
+"""Local index: ingest rate, memory per document and query latency.
+
+Fills the index with synthetic parsed results whose words follow Zipf's law
+over a 50000-word vocabulary (the commonest word is about 9% of all words,
+like "the" in English), ten per page like a results page, then times one- to
+three-word queries drawn from the same distribution.
+
+Usage, from the repository root:
+
+    python -m benchmarks.bench_local_search [--documents N] [--queries N] [--json]
+"""
+import argparse
+import itertools
+import json
+import random
+import time
+import tracemalloc
+
+from localsearch import LocalIndex
+
+VOCABULARY = [f"w{rank}" for rank in range(1, 50001)]
+# Word of rank r has probability proportional to 1/r
+CUMULATIVE_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1)))
+# Pages indexed again under tracemalloc to measure memory per document
+MEMORY_SAMPLE_PAGES = 2000
+
+
+def zipf_words(rng: random.Random, count: int):
+    return rng.choices(VOCABULARY, cum_weights=CUMULATIVE_WEIGHTS, k=count)
+
+
+def synthetic_page(rng: random.Random, page: int):
+    return [
+        {
+            "title": " ".join(zipf_words(rng, rng.randint(4, 10))),
+            "link": f"https://site{rng.randint(0, 5000)}.example/{page}/{position}",
+            "snippet": " ".join(zipf_words(rng, rng.randint(15, 40))),
+        }
+        for position in range(10)
+    ]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p99_ms": round(samples[min(int(len(samples) * 0.99), len(samples) - 1)] * 1000, 3),
+    }
+
+
+def run(documents: int, queries: int):
+    rng = random.Random(0)
+    pages = [synthetic_page(rng, page) for page in range(documents // 10)]
+    index = LocalIndex(max_docs=documents * 2)
+    started = time.perf_counter()
+    for page in pages:
+        index.add("bench", "https://engine.example/search", page)
+    ingest = time.perf_counter() - started
+
+    # Tracing slows allocation down several times, so memory is measured on a separate, smaller build
+    sample = pages[:MEMORY_SAMPLE_PAGES]
+    tracemalloc.start()
+    sample_index = LocalIndex(max_docs=documents * 2)
+    for page in sample:
+        sample_index.add("bench", "https://engine.example/search", page)
+    memory_per_document = tracemalloc.get_traced_memory()[0] / len(sample_index.docs)
+    tracemalloc.stop()
+    del sample_index
+
+    report = {
+        "documents": len(index.docs),
+        "terms": len(index.postings),
+        "ingest_docs_per_s": round(len(index.docs) / ingest),
+        "bytes_per_document": round(memory_per_document),
+        "rows": [],
+    }
+    for words in (1, 2, 3):
+        samples = []
+        for _ in range(queries):
+            query = " ".join(zipf_words(rng, words))
+            started = time.perf_counter()
+            index.search(query)
+            samples.append(time.perf_counter() - started)
+        report["rows"].append({"query": f"{words} word{'s' if words > 1 else ''}", **percentiles(samples)})
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    report = run(args.documents, args.queries)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['documents']} documents, {report['terms']} terms, {report['ingest_docs_per_s']} docs/s ingested, "
+          f"{report['bytes_per_document']} bytes per document")
+    for row in report["rows"]:
+        print(f"{row['query']:<10}{row['p50_ms']:>10} ms p50{row['p99_ms']:>10} ms p99")
+
+
+if __name__ == "__main__":
+    main_cli()
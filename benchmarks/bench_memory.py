@@ -0,0 +1,109 @@
+"""Peak resident memory of the app under concurrent /multi-search.
+
+Starts ``benchmarks.fake_engines`` once, then runs every scenario in a fresh
+child process (peak RSS never goes down, so scenarios cannot share one) that
+imports the app behind ``httpx.ASGITransport`` and sends ``--requests``
+/multi-search requests over all engines, ``--concurrency`` at a time, each
+with a new query so every page is fetched. Engines without a fixture page
+serve a synthetic one of ``--page-size`` bytes.
+
+Reports the RSS after start-up, the peak during the run and the RSS left
+once it is over, in MiB, read from ``/proc`` (Linux only). Rate limits are
+lifted as in ``benchmarks.load_test``.
+
+Usage, from the repository root:
+
+    python -m benchmarks.bench_memory [--requests N] [--concurrency N] [--page-size BYTES] [--json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict
+
+import httpx
+
+from benchmarks.fake_engines import add_arguments
+from benchmarks.load_test import memory_mb, start_fake_engines
+
+SCENARIOS = ("parse=false", "parse=true")
+
+
+async def child(args) -> Dict[str, Any]:
+    os.environ.update(RATE_LIMIT_DEFAULT_RATE="1000000", RATE_LIMIT_BURST="1000000", RATE_LIMIT_MAX_IN_FLIGHT="1000000")
+    import ratelimit
+    ratelimit.ENGINE_RATES.clear()
+    import main
+    from engines import ENGINES
+
+    engines = ",".join(ENGINES)
+    path = "/multi-search?q=memory+benchmark+{}&engines=" + engines + "&" + args.child
+    transport = httpx.ASGITransport(app=main.app)
+    statuses: Dict[int, int] = {}
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench-memory", timeout=120) as client:
+            await client.get(path.format("warm-up"))
+            before = memory_mb(os.getpid())["rss_mb"]
+            queue = iter(range(args.requests))
+
+            async def worker():
+                for i in queue:
+                    response = await client.get(path.format(i))
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            after = memory_mb(os.getpid())
+    return {
+        "scenario": args.child,
+        "requests": args.requests,
+        "statuses": statuses,
+        "startup_rss_mb": before,
+        "peak_rss_mb": after["peak_rss_mb"],
+        "final_rss_mb": after["rss_mb"],
+    }
+
+
+def run_child(args, scenario: str, engine_urls: str) -> Dict[str, Any]:
+    command = [sys.executable, "-m", "benchmarks.bench_memory", "--child", scenario,
+               "--requests", str(args.requests), "--concurrency", str(args.concurrency)]
+    # The thread executor keeps parsing in this process, where its memory is counted
+    env = {**os.environ, "SEARCH_ENGINE_URLS": engine_urls, "PARSE_EXECUTOR": "thread", "SUGGEST_PATH": ""}
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="/multi-search requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight at once")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    add_arguments(parser)
+    # Memory rather than latency is measured, so the engines answer quickly by default
+    parser.set_defaults(latency="const:5")
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(child(args))))
+        return
+
+    fakes = start_fake_engines(args)
+    try:
+        engine_urls = fakes.stdout.readline().strip()
+        rows = [run_child(args, scenario, engine_urls) for scenario in SCENARIOS]
+    finally:
+        fakes.terminate()
+        fakes.wait()
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {args.page_size}-byte synthetic pages")
+    print(f"{'scenario':<14}{'startup MiB':>14}{'peak MiB':>12}{'final MiB':>12}  statuses")
+    for row in rows:
+        print(f"{row['scenario']:<14}{row['startup_rss_mb']:>14}{row['peak_rss_mb']:>12}{row['final_rss_mb']:>12}  {row['statuses']}")
+
+
+if __name__ == "__main__":
+    main_cli()
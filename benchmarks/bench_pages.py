@@ -0,0 +1,62 @@
+"""Time the HTML page-building endpoints without any network or HTTP layer.
+
+Usage, from the repository root:
+
+    python -m benchmarks.bench_pages [--repeat N] [--json]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from starlette.requests import Request
+
+import main
+
+# Bare request without Accept-Encoding or validators: the uncompressed path
+PLAIN_REQUEST = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+
+QUERY = "fastapi streaming responses & <tags>"
+
+SCENARIOS = {
+    "/": lambda: main.root(PLAIN_REQUEST),
+    "/unified-search": lambda: main.unified_search(q=QUERY),
+    "/browser-search?engine=all": lambda: main.browser_search(q=QUERY, engine="all", redirect=False),
+    "/browser-search?engine=gh": lambda: main.browser_search(q=QUERY, engine="gh", redirect=True),
+}
+
+
+async def time_scenario(make_call, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await make_call()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+async def run(repeat: int):
+    rows = []
+    for name, make_call in SCENARIOS.items():
+        await make_call()
+        rows.append({"endpoint": name, "median_us": round(await time_scenario(make_call, repeat) * 1e6, 1)})
+    return rows
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.repeat))
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    for row in rows:
+        print(f"{row['endpoint']:<30}{row['median_us']:>10} us")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,59 @@
+"""Compare parser backends on saved (or synthetic) engine result pages.
+
+Usage, from the repository root:
+
+    python -m benchmarks.bench_parsers [--pages DIR] [--size BYTES] [--repeat N]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from extractors import EXTRACTORS
+from parsers import BACKENDS
+from benchmarks.sample_pages import load_pages, DEFAULT_PAGE_BYTES
+
+
+def time_backend(backend, engine: str, html: str, repeat: int) -> float:
+    selector = EXTRACTORS[engine].selectors
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        backend.extract(html, selector)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", help="directory of saved <engine>.html pages")
+    parser.add_argument("--size", type=int, default=DEFAULT_PAGE_BYTES, help="synthetic page size in bytes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages, sorted(EXTRACTORS), args.size)
+    rows = []
+    for engine, html in pages.items():
+        selector = EXTRACTORS[engine].selectors
+        baseline = BACKENDS["bs4"].extract(html, selector)
+        for name, backend in BACKENDS.items():
+            seconds = time_backend(backend, engine, html, args.repeat)
+            rows.append({
+                "engine": engine,
+                "backend": name,
+                "page_bytes": len(html),
+                "median_ms": round(seconds * 1000, 2),
+                "matches_bs4": backend.extract(html, selector) == baseline,
+            })
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'engine':<8}{'backend':<12}{'page KB':>9}{'median ms':>11}  same as bs4")
+    for row in rows:
+        print(f"{row['engine']:<8}{row['backend']:<12}{row['page_bytes'] // 1024:>9}{row['median_ms']:>11}  {row['matches_bs4']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Bytes on the wire and latency per endpoint, per content encoding.
+
+Requests go through the whole ASGI app (middleware included) in process, so
+the numbers cover routing, rendering, compression and conditional handling but
+no sockets. ``304`` is a repeat visit sending back the ETag of the first
+response.
+
+Usage, from the repository root:
+
+    python -m benchmarks.bench_responses [--repeat N] [--json]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+import main
+from compression import BROTLI_AVAILABLE
+
+QUERY = "fastapi streaming responses & <tags>"
+
+ENDPOINTS = [
+    "/",
+    f"/unified-search?q={QUERY}",
+    f"/browser-search?q={QUERY}&engine=all",
+    "/engines",
+    "/opensearch.xml",
+    f"{main.ASSETS['home.css'].url}",
+]
+
+MODES = {
+    "identity": {"Accept-Encoding": "identity"},
+    "gzip": {"Accept-Encoding": "gzip"},
+}
+if BROTLI_AVAILABLE:
+    MODES["br"] = {"Accept-Encoding": "br"}
+
+
+def wire_bytes(response: httpx.Response) -> int:
+    """Body size as sent, before httpx decodes it"""
+    return int(response.headers.get("content-length", len(response.content)))
+
+
+async def measure(client: httpx.AsyncClient, path: str, headers, repeat: int):
+    response = await client.get(path, headers=headers)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await client.get(path, headers=headers)
+        samples.append(time.perf_counter() - started)
+    return response, statistics.median(samples)
+
+
+async def run(repeat: int):
+    rows = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ENDPOINTS:
+            row = {"endpoint": path.split("?")[0] if path.startswith("/static") else path.replace(QUERY, "…")}
+            etag = None
+            for mode, headers in MODES.items():
+                response, latency = await measure(client, path, headers, repeat)
+                row[f"{mode}_bytes"] = wire_bytes(response)
+                row[f"{mode}_us"] = round(latency * 1e6, 1)
+                etag = etag or response.headers.get("etag")
+            if etag:
+                response, latency = await measure(client, path, {**MODES["gzip"], "If-None-Match": etag}, repeat)
+                row["304_status"] = response.status_code
+                row["304_bytes"] = wire_bytes(response)
+                row["304_us"] = round(latency * 1e6, 1)
+            rows.append(row)
+    return rows
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.repeat))
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        return
+    modes = list(MODES) + ["304"]
+    print(f"{'endpoint':<36}" + "".join(f"{mode:>20}" for mode in modes))
+    for row in rows:
+        cells = []
+        for mode in modes:
+            if f"{mode}_bytes" in row:
+                cells.append(f"{row[f'{mode}_bytes']:>8} B {row[f'{mode}_us']:>7} us")
+            else:
+                cells.append(f"{'-':>20}")
+        print(f"{row['endpoint']:<36}" + "".join(f"{cell:>20}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main_cli()
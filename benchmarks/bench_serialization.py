@@ -0,0 +1,113 @@
+"""Serialization time and payload size of a 19-engine /multi-search response.
+
+Compares the way the endpoints used to respond (a nested dict run through
+FastAPI's ``jsonable_encoder`` and ``JSONResponse``) with the response models
+rendered by ``JSONBytesResponse``, with orjson and with the standard library
+fallback, and shows what ``fields=`` saves. Results are synthetic: ten parsed
+results per engine, or a 500-character preview without ``parse``.
+
+Usage, from the repository root:
+
+    python -m benchmarks.bench_serialization [--repeat N] [--json]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import responses
+from engines import ENGINES
+from responses import ENGINE_RESULT_SELECTABLE, EngineResult, JSONBytesResponse, MultiSearchResponse, parse_fields
+
+
+def parsed_results(engine: str):
+    return [
+        {
+            "title": f"{engine} result {rank}: FastAPI streaming responses tutorial",
+            "link": f"https://example.com/{engine}/articles/fastapi-streaming-{rank}?ref=search",
+            "snippet": "Learn how to stream large responses from FastAPI with StreamingResponse, "
+                       "async generators and server-sent events, with examples.",
+        }
+        for rank in range(1, 11)
+    ]
+
+
+def model(parse: bool) -> MultiSearchResponse:
+    return MultiSearchResponse(
+        query="fastapi streaming",
+        engines=list(ENGINES),
+        results=[
+            EngineResult(
+                engine=engine,
+                url=f"https://{engine}.example/search?q=fastapi+streaming",
+                status_code=200,
+                parsed_results=parsed_results(engine) if parse else None,
+                content_preview=None if parse else "<!doctype html><html>" + "x" * 476 + "...",
+            )
+            for engine in ENGINES
+        ],
+    )
+
+
+def without_orjson(call):
+    responses.ORJSON_AVAILABLE = False
+    try:
+        return call()
+    finally:
+        responses.ORJSON_AVAILABLE = True
+
+
+def time_call(call, repeat: int) -> float:
+    call()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def run(repeat: int):
+    rows = []
+    for parse in (False, True):
+        response = model(parse)
+        as_dict = response.to_dict()
+        fields = parse_fields("status_code,parsed_results" if parse else "status_code", ENGINE_RESULT_SELECTABLE)
+        variants = {
+            "dict + jsonable_encoder": lambda: JSONResponse(jsonable_encoder(as_dict)).body,
+            "model": lambda: JSONBytesResponse(response).body,
+            "model, fields=": lambda: JSONBytesResponse(response, fields).body,
+        }
+        if responses.ORJSON_AVAILABLE:
+            variants["model, json fallback"] = lambda: without_orjson(lambda: JSONBytesResponse(response).body)
+
+        for name, call in variants.items():
+            rows.append({
+                "payload": "parse=true" if parse else "parse=false",
+                "variant": name,
+                "median_us": round(time_call(call, repeat) * 1e6, 1),
+                "bytes": len(call()),
+            })
+    return rows
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    rows = run(args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"JSON library: {'orjson' if responses.ORJSON_AVAILABLE else 'json (orjson not installed)'}")
+    for row in rows:
+        print(f"{row['payload']:<13}{row['variant']:<28}{row['median_us']:>10} us{row['bytes']:>10} bytes")
+
+
+if __name__ == "__main__":
+    main_cli()
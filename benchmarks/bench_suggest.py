@@ -0,0 +1,103 @@
+"""Completion index: lookup latency by prefix length, insert cost, save and load time.
+
+The index is filled with synthetic queries whose popularity follows a Zipf
+curve, saved to a temporary file and loaded back as a restart would.
+
+Usage, from the repository root:
+
+    python -m benchmarks.bench_suggest [--entries N] [--repeat N] [--json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from suggest import SuggestionIndex
+
+WORDS = (
+    "python rust react fastapi docker kubernetes tutorial course async api design free best how to "
+    "learn vs example error install guide performance testing deploy linux database sql cache web "
+    "framework library github youtube video pricing review alternative open source ai model chat"
+).split()
+
+
+def synthetic_queries(count: int, rng: random.Random):
+    """Distinct 1-4 word queries, plus made-up words so the prefixes spread out"""
+    queries = set()
+    while len(queries) < count:
+        words = [rng.choice(WORDS) if rng.random() < 0.7 else "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 9)))
+                 for _ in range(rng.randint(1, 4))]
+        queries.add(" ".join(words))
+    return list(queries)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 1),
+        "p99_us": round(samples[min(int(len(samples) * 0.99), len(samples) - 1)] * 1e6, 1),
+        "max_us": round(samples[-1] * 1e6, 1),
+    }
+
+
+async def run(entries: int, repeat: int):
+    rng = random.Random(0)
+    queries = synthetic_queries(entries, rng)
+    path = os.path.join(tempfile.mkdtemp(), "suggestions.json")
+    # Every query is suggested, so lookups run against the full index
+    index = SuggestionIndex(path, max_entries=entries * 2, min_count=1)
+
+    inserts = []
+    for rank, query in enumerate(queries, start=1):
+        started = time.perf_counter()
+        index.record(query)
+        inserts.append(time.perf_counter() - started)
+        # Zipf-like popularity: the query at rank r is searched about entries/r times in total
+        index._add(query, entries // (rank * 50))
+        index.pending[query] += entries // (rank * 50)
+
+    started = time.perf_counter()
+    await index.save()
+    save_ms = (time.perf_counter() - started) * 1000
+    loaded = SuggestionIndex(path, max_entries=entries * 2, min_count=1)
+
+    rows = [{"operation": "record (new query)", **percentiles(inserts)}]
+    for length in (1, 2, 3, 5, 8):
+        prefixes = [query[:length] for query in rng.choices(queries, k=repeat)]
+        samples = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            loaded.suggest(prefix)
+            samples.append(time.perf_counter() - started)
+        rows.append({"operation": f"suggest, {length}-char prefix", **percentiles(samples)})
+    return {
+        "entries": len(loaded.keys),
+        "file_bytes": os.path.getsize(path),
+        "save_ms": round(save_ms, 1),
+        "load_ms": loaded.counters["load_ms"],
+        "rows": rows,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.entries, args.repeat))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['entries']} entries, {report['file_bytes']} bytes on disk, "
+          f"saved in {report['save_ms']} ms, loaded in {report['load_ms']} ms")
+    for row in report["rows"]:
+        print(f"{row['operation']:<28}{row['p50_us']:>10} us p50{row['p99_us']:>10} us p99{row['max_us']:>10} us max")
+
+
+if __name__ == "__main__":
+    main_cli()
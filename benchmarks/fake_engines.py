@@ -0,0 +1,213 @@
+"""Local stand-in for every search engine, for offline load tests.
+
+Each engine in ``SEARCH_ENGINES`` gets its own port (so the connection pool
+treats it as a separate host) and answers every request with the same
+recorded page: a saved ``<engine>.html`` from ``--pages``, the extractor
+fixture under ``fixtures/extractors/<engine>/``, or a synthetic page.
+
+Latency is drawn per request from a distribution given as ``kind:args`` in
+milliseconds:
+
+    const:50            always 50 ms
+    uniform:20:200      uniformly between 20 and 200 ms
+    lognormal:120:0.6   median 120 ms, log standard deviation 0.6 (long tail)
+    exp:80              exponential with mean 80 ms
+
+Errors are injected as ``outcome:rate`` pairs, where the outcome is an HTTP
+status, ``reset`` (close the connection without answering) or ``hang`` (never
+answer, so the caller times out), e.g. ``503:0.02,429:0.01,reset:0.005``.
+
+Usage, from the repository root:
+
+    python -m benchmarks.fake_engines [--latency SPEC] [--engine-latency gg=SPEC] [--errors SPEC]
+
+It prints the ``SEARCH_ENGINE_URLS`` value pointing the app at it and serves
+until interrupted.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.sample_pages import DEFAULT_PAGE_BYTES, synthetic_page
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "extractors")
+
+DEFAULT_LATENCY = "lognormal:150:0.5"
+
+REASONS = {200: "OK", 403: "Forbidden", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable"}
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Sampler returning a delay in seconds for a ``kind:args`` spec in milliseconds"""
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(value) for value in args.split(":")]
+    except ValueError:
+        values = []
+    if kind == "const" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        median, sigma = values
+        return lambda rng: median * rng.lognormvariate(0, sigma) / 1000
+    if kind == "exp" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0]) / 1000
+    raise ValueError(f"Bad latency spec: {spec!r}")
+
+
+def parse_errors(spec: str) -> List[Tuple[str, float]]:
+    """``[(outcome, rate)]`` from ``503:0.02,reset:0.01``"""
+    errors = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        outcome, _, rate = item.rpartition(":")
+        if not (outcome.isdigit() or outcome in ("reset", "hang")):
+            raise ValueError(f"Bad error spec: {item!r}")
+        errors.append((outcome, float(rate)))
+    if sum(rate for _, rate in errors) > 1:
+        raise ValueError("Error rates add up to more than 1")
+    return errors
+
+
+def recorded_page(engine: str, directory: Optional[str], size: int) -> bytes:
+    """Saved page from ``directory``, else the extractor fixture, else a synthetic page"""
+    candidates = [os.path.join(directory, f"{engine}.html")] if directory else []
+    candidates.append(os.path.join(FIXTURES_DIR, engine, "v1.html"))
+    for path in candidates:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+    return synthetic_page(engine, size).encode()
+
+
+class FakeEngine:
+    """Serves one engine's page over HTTP/1.1 keep-alive with injected latency and errors"""
+
+    def __init__(self, engine: str, page: bytes, latency: Callable[[random.Random], float], errors: List[Tuple[str, float]], seed: int = 0):
+        self.engine = engine
+        self.page = page
+        self.latency = latency
+        self.errors = errors
+        self.rng = random.Random(f"{engine}:{seed}")
+        self.requests = 0
+        self.injected: Dict[str, int] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self.server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        return self.server.sockets[0].getsockname()[1]
+
+    def outcome(self) -> str:
+        roll = self.rng.random()
+        for outcome, rate in self.errors:
+            if roll < rate:
+                self.injected[outcome] = self.injected.get(outcome, 0) + 1
+                return outcome
+            roll -= rate
+        return "200"
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                self.requests += 1
+                outcome = self.outcome()
+                await asyncio.sleep(self.latency(self.rng))
+                if outcome == "reset":
+                    break
+                if outcome == "hang":
+                    await asyncio.Event().wait()
+                status = int(outcome)
+                body = self.page if status == 200 else f"{status} {REASONS.get(status, 'Error')}".encode()
+                headers = [
+                    f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}",
+                    "Content-Type: text/html; charset=utf-8",
+                    f"Content-Length: {len(body)}",
+                ]
+                if status in (429, 503):
+                    headers.append("Retry-After: 1")
+                close = b"connection: close" in head.lower()
+                if close:
+                    headers.append("Connection: close")
+                writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + body)
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, **{f"injected_{outcome}": count for outcome, count in sorted(self.injected.items())}}
+
+
+async def start_fake_engines(
+    latency: str = DEFAULT_LATENCY,
+    engine_latency: Optional[Dict[str, str]] = None,
+    errors: str = "",
+    pages: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_BYTES,
+    seed: int = 0,
+) -> Tuple[Dict[str, FakeEngine], Dict[str, str]]:
+    """Start one fake per engine; returns the fakes and the URL templates to use"""
+    # Imported here so importing this module leaves SEARCH_ENGINE_URLS unread
+    from engines import SEARCH_ENGINES
+
+    engine_latency = engine_latency or {}
+    error_list = parse_errors(errors)
+    fakes, urls = {}, {}
+    for engine, template in SEARCH_ENGINES.items():
+        fake = FakeEngine(engine, recorded_page(engine, pages, page_size), parse_latency(engine_latency.get(engine, latency)), error_list, seed)
+        port = await fake.start()
+        fakes[engine] = fake
+        # Keep the path and query layout so extra parameters still reach the page
+        urls[engine] = f"http://127.0.0.1:{port}/{engine}?" + template.partition("?")[2]
+    return fakes, urls
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", default=DEFAULT_LATENCY, help="latency distribution for every engine")
+    parser.add_argument("--engine-latency", action="append", default=[], metavar="ENGINE=SPEC", help="override the latency of one engine")
+    parser.add_argument("--errors", default="", help="injected failures, e.g. 503:0.02,reset:0.01,hang:0.001")
+    parser.add_argument("--pages", help="directory of saved <engine>.html pages")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_BYTES, help="synthetic page size in bytes")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def engine_latency_overrides(items: List[str]) -> Dict[str, str]:
+    overrides = {}
+    for item in items:
+        engine, _, spec = item.partition("=")
+        parse_latency(spec)
+        overrides[engine] = spec
+    return overrides
+
+
+async def serve(args):
+    fakes, urls = await start_fake_engines(
+        args.latency, engine_latency_overrides(args.engine_latency), args.errors, args.pages, args.page_size, args.seed
+    )
+    print(json.dumps(urls), flush=True)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    for fake in fakes.values():
+        fake.server.close()
+    print(json.dumps({engine: fake.stats() for engine, fake in fakes.items()}), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
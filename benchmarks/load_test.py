@@ -0,0 +1,255 @@
+"""Throughput and latency of the main endpoints against fake engines.
+
+Starts ``benchmarks.fake_engines`` in a subprocess, points every engine at it
+through ``SEARCH_ENGINE_URLS`` and drives each scenario with a fixed number
+of concurrent clients for ``--duration`` seconds after a warm-up. Every
+request uses a fresh query unless ``--distinct-queries`` is set, so results
+come from the fake engines rather than the cache.
+
+By default the app runs in this process behind ``httpx.ASGITransport`` (no
+sockets on the client side, and the load generator shares its CPU). Pass
+``--target URL`` to load a server started separately instead, e.g. with
+``SEARCH_ENGINE_URLS`` printed by ``python -m benchmarks.fake_engines``; its
+RSS is read from ``/proc`` when ``--target-pid`` is given.
+
+The per-engine outbound rate limits would cap every scenario at a few
+requests per second, so they are lifted unless ``--keep-rate-limits`` is
+given.
+
+Reports requests per second, p50/p95/p99 latency, status counts, upstream
+status counts (in process only) and RSS per scenario. ``--output`` writes them as JSON (with the commit they were measured
+on) and ``--compare`` prints the change against an earlier run.
+
+Usage, from the repository root:
+
+    python -m benchmarks.load_test [--scenarios search,multi-search] [--concurrency N] [--duration S]
+        [--latency SPEC] [--errors SPEC] [--output FILE] [--compare FILE]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_engines import add_arguments, engine_latency_overrides
+
+SCENARIOS: Dict[str, Callable[[str], str]] = {
+    "search": lambda q: f"/search?q={q}&engine=gg",
+    "multi-search": lambda q: f"/multi-search?q={q}&engines=gg,gh,brave&parse=true",
+    "category-search": lambda q: f"/category-search?q={q}&category=Development",
+    "browser-search": lambda q: f"/browser-search?q={q}&engine=all",
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def memory_mb(pid: Optional[int]) -> Dict[str, Optional[float]]:
+    """Current and peak resident set size of ``pid`` in MiB, from /proc (Linux only)"""
+    usage: Dict[str, Optional[float]] = {"rss_mb": None, "peak_rss_mb": None}
+    if pid is None:
+        return usage
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key = "rss_mb" if line.startswith("VmRSS:") else "peak_rss_mb"
+                    usage[key] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return usage
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_fake_engines(args) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.fake_engines", "--latency", args.latency, "--errors", args.errors,
+               "--page-size", str(args.page_size), "--seed", str(args.seed)]
+    for item in args.engine_latency:
+        command += ["--engine-latency", item]
+    if args.pages:
+        command += ["--pages", args.pages]
+    return subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+
+
+def upstream_responses() -> Dict[str, float]:
+    """Upstream responses so far by status, when the app runs in this process"""
+    metrics = sys.modules.get("metrics")
+    totals: Dict[str, float] = {}
+    if metrics is not None:
+        for (_, status), count in metrics.UPSTREAM_RESPONSES.values.items():
+            totals[status] = totals.get(status, 0) + count
+    return totals
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, args, queries, pid: Optional[int]) -> Dict[str, Any]:
+    build_path = SCENARIOS[name]
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    recording = False
+    deadline = 0.0
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            path = build_path(next(queries))
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            if recording:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    deadline = time.perf_counter() + args.warmup
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    recording = True
+    upstream_before = upstream_responses()
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    upstream = {
+        status: int(count - upstream_before.get(status, 0))
+        for status, count in sorted(upstream_responses().items())
+        if count > upstream_before.get(status, 0)
+    }
+
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "ok_rate": round(ok / len(latencies), 4) if latencies else None,
+        **{f"p{int(q * 100)}_ms": round(percentile(latencies, q) * 1000, 1) if latencies else None for q in (0.50, 0.95, 0.99)},
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+        "statuses": dict(sorted(statuses.items())),
+        # Status 0: no response (timeout, connection error, circuit open or rate limited)
+        "upstream_statuses": upstream,
+        **memory_mb(pid),
+    }
+
+
+def query_source(distinct: int):
+    """Endless query strings: all different, or cycling through ``distinct`` of them"""
+    if distinct:
+        return itertools.cycle([f"load test query {i}" for i in range(distinct)])
+    return (f"load test query {i}" for i in itertools.count())
+
+
+async def run(args, engine_urls: Dict[str, str]) -> List[Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(60.0)
+    queries = query_source(args.distinct_queries)
+    if args.target:
+        async with httpx.AsyncClient(base_url=args.target, limits=limits, timeout=timeout) as client:
+            return [await run_scenario(client, name, args, queries, args.target_pid) for name in args.scenarios]
+
+    os.environ["SEARCH_ENGINE_URLS"] = json.dumps(engine_urls)
+    if not args.keep_rate_limits:
+        os.environ.update(RATE_LIMIT_DEFAULT_RATE="1000000", RATE_LIMIT_BURST="1000000", RATE_LIMIT_MAX_IN_FLIGHT="1000000")
+        import ratelimit
+        ratelimit.ENGINE_RATES.clear()
+    # Imported only now so the environment above is in place
+    import main
+    if not main.engine_url("gg", "q").startswith(engine_urls["gg"].partition("?")[0]):
+        raise RuntimeError("engines was imported before SEARCH_ENGINE_URLS was set; requests would go to the real engines")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", limits=limits, timeout=timeout) as client:
+            return [await run_scenario(client, name, args, queries, os.getpid()) for name in args.scenarios]
+
+
+def print_table(rows: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None):
+    columns = ("rps", "p50_ms", "p95_ms", "p99_ms", "ok_rate", "rss_mb")
+    print(f"{'scenario':<18}" + "".join(f"{column:>16}" for column in columns))
+    for row in rows:
+        cells = []
+        for column in columns:
+            value = row.get(column)
+            cell = "-" if value is None else str(value)
+            old = (baseline or {}).get(row["scenario"], {}).get(column)
+            if value is not None and old:
+                cell += f" ({(value - old) / old:+.0%})"
+            cells.append(f"{cell:>16}")
+        print(f"{row['scenario']:<18}" + "".join(cells))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated: " + ", ".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=20, help="seconds measured per scenario")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds run before measuring each scenario")
+    parser.add_argument("--distinct-queries", type=int, default=0, help="cycle through this many queries (0: never repeat)")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="keep the per-engine outbound rate limits")
+    parser.add_argument("--target", help="base URL of a separately started server to load instead")
+    parser.add_argument("--target-pid", type=int, help="process id of --target, for its RSS")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    add_arguments(parser)
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    engine_latency_overrides(args.engine_latency)
+
+    fakes = None if args.target else start_fake_engines(args)
+    try:
+        engine_urls = json.loads(fakes.stdout.readline()) if fakes else {}
+        rows = asyncio.run(run(args, engine_urls))
+    finally:
+        if fakes:
+            fakes.terminate()
+            fakes.wait()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "measured_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            key: getattr(args, key)
+            for key in ("concurrency", "duration", "warmup", "distinct_queries", "keep_rate_limits", "target",
+                        "latency", "engine_latency", "errors", "page_size", "seed")
+        },
+        "scenarios": rows,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {row["scenario"]: row for row in json.load(f)["scenarios"]}
+    print_table(rows, baseline)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,82 @@
+"""Saved or synthesized engine result pages for offline benchmarks.
+
+Real pages can be dropped into a directory as ``<engine>.html`` (for example
+``gg.html`` or ``gh.html``) and loaded with :func:`load_pages`. When none are
+available, :func:`synthetic_page` builds a page of a realistic size with the
+markup shape each selector set expects.
+"""
+import os
+import random
+from typing import Dict, Optional
+
+# Typical size of a results page, in bytes
+DEFAULT_PAGE_BYTES = 800_000
+
+_FILLER_WORDS = "search result rust python async engine fast api query index page link repo".split()
+
+
+def _filler(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_FILLER_WORDS) for _ in range(words))
+
+
+def _google_result(rng: random.Random, i: int) -> str:
+    return (
+        f'<div class="g"><a href="/url?q=https://example.com/{i}&amp;sa=U"><h3>{_filler(rng, 6)} {i}</h3></a>'
+        f'<div class="VwiC3b"><span>{_filler(rng, 30)}</span></div></div>'
+    )
+
+
+def _github_result(rng: random.Random, i: int) -> str:
+    return (
+        f'<div class="Box-row"><a data-testid="results-list" href="/owner{i}/repo{i}">'
+        f'<span class="text-normal">owner{i}/repo{i}</span></a><p>{_filler(rng, 25)}</p></div>'
+    )
+
+
+def _brave_result(rng: random.Random, i: int) -> str:
+    return (
+        f'<div class="snippet" data-type="web" data-pos="{i}"><a href="https://example.com/{i}?utm_source=brave">'
+        f'<div class="title search-snippet-title">{_filler(rng, 6)} {i}</div></a>'
+        f'<div class="snippet-description">{_filler(rng, 30)}</div></div>'
+    )
+
+
+def _generic_result(rng: random.Random, i: int) -> str:
+    return (
+        f'<article><h2>{_filler(rng, 7)} {i}</h2><a href="https://example.com/{i}?utm_source=x">{_filler(rng, 3)}</a>'
+        f'<p>{_filler(rng, 30)}</p></article>'
+    )
+
+
+def synthetic_page(engine: str, size: int = DEFAULT_PAGE_BYTES, seed: int = 0) -> str:
+    """Build a results page of roughly ``size`` bytes for ``engine``"""
+    rng = random.Random(f"{engine}:{seed}")
+    make_result = {"gg": _google_result, "gh": _github_result, "brave": _brave_result}.get(engine, _generic_result)
+    head = (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>results</title>"
+        f"<style>{'.c{color:#000} ' * 200}</style></head><body><nav><a href=\"/\">home</a></nav><main>"
+    )
+    parts = [head]
+    length = len(head)
+    i = 0
+    while length < size:
+        # Real pages pad results with scripts, inline JSON and tracking markup
+        chunk = make_result(rng, i) + f"<script>window.__d{i}={{\"k\":\"{_filler(rng, 40)}\"}}</script>"
+        parts.append(chunk)
+        length += len(chunk)
+        i += 1
+    parts.append("</main></body></html>")
+    return "".join(parts)
+
+
+def load_pages(directory: Optional[str], engines, size: int = DEFAULT_PAGE_BYTES) -> Dict[str, str]:
+    """Saved pages from ``directory`` where present, synthetic pages otherwise"""
+    pages = {}
+    for engine in engines:
+        path = os.path.join(directory, f"{engine}.html") if directory else ""
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages[engine] = f.read()
+        else:
+            pages[engine] = synthetic_page(engine, size)
+    return pages
@@ -0,0 +1,154 @@
+"""Per-engine circuit breakers driven by rolling error rate and latency.
+
+Each engine keeps its last ``BREAKER_WINDOW`` upstream outcomes (younger than
+``BREAKER_WINDOW_SECONDS``). Once there are enough of them and too many failed
+or were slow, the circuit opens and fetches for that engine are skipped
+outright instead of waiting on a timeout. After ``BREAKER_OPEN_SECONDS`` the
+circuit goes half-open and lets a single probe through: a good probe closes
+it, a bad one reopens it for twice as long.
+"""
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+BREAKER_WINDOW = int(os.environ.get("BREAKER_WINDOW", "50"))
+BREAKER_WINDOW_SECONDS = float(os.environ.get("BREAKER_WINDOW_SECONDS", "120"))
+# Half-open circuits admit another probe after this long if the last one never reported back
+BREAKER_PROBE_SECONDS = float(os.environ.get("BREAKER_PROBE_SECONDS", "10"))
+# Outcomes needed before the error rate is trusted
+BREAKER_MIN_SAMPLES = int(os.environ.get("BREAKER_MIN_SAMPLES", "8"))
+BREAKER_FAILURE_RATE = float(os.environ.get("BREAKER_FAILURE_RATE", "0.5"))
+# Responses slower than this count as slow; too many slow ones also open the circuit
+BREAKER_SLOW_SECONDS = float(os.environ.get("BREAKER_SLOW_SECONDS", "5"))
+BREAKER_SLOW_RATE = float(os.environ.get("BREAKER_SLOW_RATE", "0.8"))
+BREAKER_OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS", "30"))
+BREAKER_MAX_OPEN_SECONDS = float(os.environ.get("BREAKER_MAX_OPEN_SECONDS", "600"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_failure(status_code: int) -> bool:
+    """No response, blocked (403/429) or a server error"""
+    return status_code == 0 or status_code in (403, 429) or status_code >= 500
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class CircuitBreaker:
+    """Rolling outcome window and circuit state for one engine"""
+
+    def __init__(self, engine: str, probe_interval: float = BREAKER_PROBE_SECONDS):
+        self.engine = engine
+        self.probe_interval = probe_interval
+        self.state = CLOSED
+        # (finished at, failed, latency in seconds)
+        self.outcomes: Deque[Tuple[float, bool, float]] = deque(maxlen=BREAKER_WINDOW)
+        self.open_seconds = BREAKER_OPEN_SECONDS
+        self.open_until = 0.0
+        self.next_probe = 0.0
+        self.trips = 0
+        self.skipped = 0
+
+    def _expire(self, now: float):
+        horizon = now - BREAKER_WINDOW_SECONDS
+        while self.outcomes and self.outcomes[0][0] < horizon:
+            self.outcomes.popleft()
+
+    def allow(self) -> bool:
+        """Whether a fetch may go upstream now (a half-open circuit admits a probe)"""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN and now >= self.open_until:
+            self.state = HALF_OPEN
+            self.next_probe = now
+        if self.state == HALF_OPEN and now >= self.next_probe:
+            self.next_probe = now + self.probe_interval
+            return True
+        self.skipped += 1
+        return False
+
+    def release_probe(self):
+        """A probe admitted by ``allow`` never went upstream: let the next fetch probe instead"""
+        if self.state == HALF_OPEN:
+            self.next_probe = time.monotonic()
+
+    def retry_in(self) -> float:
+        now = time.monotonic()
+        if self.state == OPEN:
+            return max(self.open_until - now, 0.0)
+        if self.state == HALF_OPEN:
+            return max(self.next_probe - now, 0.0)
+        return 0.0
+
+    def record(self, status_code: int, latency: float):
+        now = time.monotonic()
+        failed = is_failure(status_code) or latency >= BREAKER_SLOW_SECONDS
+        self.outcomes.append((now, is_failure(status_code), latency))
+        if self.state == HALF_OPEN:
+            if failed:
+                self._open(now, min(self.open_seconds * 2, BREAKER_MAX_OPEN_SECONDS))
+            else:
+                self.state = CLOSED
+                self.open_seconds = BREAKER_OPEN_SECONDS
+                self.outcomes.clear()
+                self.outcomes.append((now, False, latency))
+            return
+        if self.state == CLOSED and failed:
+            self._expire(now)
+            if len(self.outcomes) >= BREAKER_MIN_SAMPLES:
+                failures = sum(1 for _, outcome_failed, _ in self.outcomes if outcome_failed)
+                slow = sum(1 for _, _, outcome_latency in self.outcomes if outcome_latency >= BREAKER_SLOW_SECONDS)
+                if failures / len(self.outcomes) >= BREAKER_FAILURE_RATE or slow / len(self.outcomes) >= BREAKER_SLOW_RATE:
+                    self._open(now, self.open_seconds)
+
+    def _open(self, now: float, seconds: float):
+        self.state = OPEN
+        self.open_seconds = seconds
+        self.open_until = now + seconds
+        self.trips += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        self._expire(time.monotonic())
+        latencies = sorted(latency for _, _, latency in self.outcomes)
+        samples = len(self.outcomes)
+        successes = sum(1 for _, failed, _ in self.outcomes if not failed)
+        p50 = percentile(latencies, 0.50)
+        p95 = percentile(latencies, 0.95)
+        return {
+            "state": self.state,
+            "samples": samples,
+            "success_rate": round(successes / samples, 4) if samples else None,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "retry_in_s": round(self.retry_in(), 2),
+            "trips": self.trips,
+            "skipped": self.skipped,
+        }
+
+
+class CircuitBreakers:
+    """One breaker per engine"""
+
+    def __init__(self, engines):
+        self._breakers: Dict[str, CircuitBreaker] = {engine: CircuitBreaker(engine) for engine in engines}
+
+    def get(self, engine: str) -> CircuitBreaker:
+        breaker = self._breakers.get(engine)
+        if breaker is None:
+            breaker = self._breakers[engine] = CircuitBreaker(engine)
+        return breaker
+
+    def open_engines(self) -> List[str]:
+        return sorted(engine for engine, breaker in self._breakers.items() if breaker.state != CLOSED)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {engine: breaker.to_dict() for engine, breaker in sorted(self._breakers.items())}
@@ -0,0 +1,288 @@
+"""Tiered result cache: bounded in-memory LRU in front of an optional SQLite store.
+
+With several workers the SQLite store is shared (see shared.py) and each
+worker keeps its own memory layer in front of it.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Tuple
+
+# Cache configuration (overridable through the environment)
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_DISK_PATH = os.environ.get("CACHE_DISK_PATH", "")
+CACHE_DEFAULT_TTL = float(os.environ.get("CACHE_DEFAULT_TTL", "300"))
+CACHE_STALE_TTL = float(os.environ.get("CACHE_STALE_TTL", "600"))
+# Bound on the payloads kept in the SQLite store (0 = unbounded), enforced by each purge
+CACHE_DISK_MAX_BYTES = int(os.environ.get("CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+# Seconds between purges of expired (and, over the bound, soonest-expiring) disk entries
+CACHE_PURGE_INTERVAL = float(os.environ.get("CACHE_PURGE_INTERVAL", "300"))
+
+# Per-engine freshness in seconds; engines not listed use CACHE_DEFAULT_TTL
+ENGINE_TTLS = {
+    "gg": 600,
+    "brave": 600,
+    "gh": 900,
+    "yt": 1800,
+    "ud": 3600,
+    "pht": 1800,
+    "x": 60,
+}
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so trivially different queries share an entry"""
+    return " ".join(query.lower().split())
+
+
+def make_key(engine: str, query: str, parse: bool) -> str:
+    return f"{engine}\x1f{normalize_query(query)}\x1f{int(parse)}"
+
+
+class CacheEntry:
+    __slots__ = ("payload", "size", "fresh_until", "stale_until")
+
+    def __init__(self, payload: bytes, fresh_until: float, stale_until: float):
+        self.payload = payload
+        self.size = len(payload)
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+    def state(self, now: float) -> str:
+        if now < self.fresh_until:
+            return FRESH
+        if now < self.stale_until:
+            return STALE
+        return MISS
+
+
+class MemoryLRU:
+    """LRU bounded by the total size of the stored payloads"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        if entry.size > self.max_bytes:
+            return
+        self.delete(key)
+        self._entries[key] = entry
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    def delete(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+
+class DiskStore:
+    """Persistent layer backed by a single SQLite file.
+
+    Entries past their stale TTL and, once the payloads exceed ``max_bytes``,
+    the entries expiring soonest are deleted by ``purge`` rather than on every
+    write, so the bound can be overshot by what is written between purges.
+    """
+
+    def __init__(self, path: str, max_bytes: int = CACHE_DISK_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, payload BLOB NOT NULL, "
+            "fresh_until REAL NOT NULL, stale_until REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload, fresh_until, stale_until FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(row[0], row[1], row[2])
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, payload, fresh_until, stale_until) VALUES (?, ?, ?, ?)",
+                (key, entry.payload, entry.fresh_until, entry.stale_until),
+            )
+
+    def purge_expired(self, now: float) -> int:
+        with self._lock:
+            deleted = self._db.execute("DELETE FROM results WHERE stale_until <= ?", (now,)).rowcount
+        self.expired += deleted
+        return deleted
+
+    def evict_over_limit(self) -> int:
+        """Keep the latest-expiring entries whose payloads fit in ``max_bytes``"""
+        if not self.max_bytes:
+            return 0
+        with self._lock:
+            deleted = self._db.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM (SELECT key, SUM(length(payload)) OVER "
+                "(ORDER BY stale_until DESC, key ROWS UNBOUNDED PRECEDING) AS kept FROM results) "
+                "WHERE kept > ?)",
+                (self.max_bytes,),
+            ).rowcount
+        self.evictions += deleted
+        return deleted
+
+    def purge(self, now: float) -> int:
+        return self.purge_expired(now) + self.evict_over_limit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ResultCache:
+    """Two-layer cache of serialized search results with per-engine TTLs.
+
+    Entries past their TTL stay usable for ``stale_ttl`` more seconds; callers
+    get them back flagged ``STALE`` and are expected to refresh in the background.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = CACHE_MAX_BYTES,
+        disk_path: str = CACHE_DISK_PATH,
+        default_ttl: float = CACHE_DEFAULT_TTL,
+        stale_ttl: float = CACHE_STALE_TTL,
+        engine_ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.memory = MemoryLRU(max_bytes)
+        self.disk = DiskStore(disk_path) if disk_path else None
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.engine_ttls = ENGINE_TTLS if engine_ttls is None else engine_ttls
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "stale_hits": 0, "misses": 0, "stores": 0}
+
+    def ttl_for(self, engine: str) -> float:
+        return self.engine_ttls.get(engine, self.default_ttl)
+
+    async def get(self, key: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Return ``(state, value)`` where state is FRESH, STALE or MISS"""
+        now = time.time()
+        entry = self.memory.get(key)
+        layer = "memory_hits"
+        if entry is None and self.disk is not None:
+            entry = await asyncio.to_thread(self.disk.get, key)
+            layer = "disk_hits"
+            if entry is not None:
+                self.memory.set(key, entry)
+
+        if entry is not None and layer == "memory_hits" and self.disk is not None and entry.state(now) != FRESH:
+            # Another worker sharing the disk layer may have refreshed it already
+            stored = await asyncio.to_thread(self.disk.get, key)
+            if stored is not None and stored.fresh_until > entry.fresh_until:
+                entry = stored
+                self.memory.set(key, entry)
+
+        state = entry.state(now) if entry is not None else MISS
+        if state == MISS:
+            if entry is not None:
+                self.memory.delete(key)
+            self.counters["misses"] += 1
+            return MISS, None
+
+        self.counters[layer] += 1
+        if state == STALE:
+            self.counters["stale_hits"] += 1
+        return state, json.loads(entry.payload)
+
+    async def get_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        """A fresh value another worker stored in the disk layer, if there is one yet.
+
+        Used while waiting on another worker's fetch, so it skips the counters.
+        """
+        if self.disk is None:
+            return None
+        entry = await asyncio.to_thread(self.disk.get, key)
+        if entry is None or entry.state(time.time()) != FRESH:
+            return None
+        self.memory.set(key, entry)
+        return json.loads(entry.payload)
+
+    async def set(self, key: str, engine: str, value: Dict[str, Any]):
+        now = time.time()
+        fresh_until = now + self.ttl_for(engine)
+        entry = CacheEntry(
+            json.dumps(value, separators=(",", ":")).encode("utf-8"),
+            fresh_until,
+            fresh_until + self.stale_ttl,
+        )
+        self.memory.set(key, entry)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, entry)
+        self.counters["stores"] += 1
+
+    async def run_purger(self, interval: float = CACHE_PURGE_INTERVAL):
+        """Purge the disk layer periodically until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.disk.purge, time.time())
+            except sqlite3.OperationalError:
+                # Typically another worker holding the lock; the next purge catches up
+                pass
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+    async def stats(self) -> Dict[str, Any]:
+        """Counters and sizes; the disk layer is counted in a thread, off the event loop"""
+        disk_entries = await asyncio.to_thread(self.disk.count) if self.disk is not None else None
+        lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        hits = lookups - self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.bytes,
+            "memory_max_bytes": self.memory.max_bytes,
+            "memory_evictions": self.memory.evictions,
+            "disk_path": self.disk.path if self.disk is not None else None,
+            "disk_entries": disk_entries,
+            "disk_max_bytes": self.disk.max_bytes if self.disk is not None else None,
+            "disk_expired": self.disk.expired if self.disk is not None else None,
+            "disk_evictions": self.disk.evictions if self.disk is not None else None,
+            "default_ttl": self.default_ttl,
+            "stale_ttl": self.stale_ttl,
+        }
@@ -0,0 +1,195 @@
+"""Response compression and conditional requests.
+
+Constant payloads (the home page, assets, the OpenSearch descriptor) are wrapped in ``Precompressed`` once: every encoding is produced
+up front at maximum compression along with a strong ETag, so serving one is a
+dictionary lookup and repeat visits get a 304.
+
+Payloads that change rarely but are built per request (``/engines``) go through
+``conditional_response``, which still answers 304 when nothing changed.
+Everything else goes through ``CompressionMiddleware``, which compresses
+complete HTML/JSON/XML bodies on the fly at a cheaper level. Streaming
+responses (SSE/NDJSON) are passed through untouched so frames are never held
+back in a compressor buffer.
+"""
+import gzip
+import hashlib
+import os
+from typing import Dict, Mapping, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Bodies smaller than this are not worth a Content-Encoding
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "512"))
+# Levels for on-the-fly compression; precompressed payloads always use the maximum
+COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", "4"))
+
+# Server preference when the client accepts several encodings
+ENCODINGS = ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+COMPRESSIBLE_TYPES = ("text/html", "text/css", "application/javascript", "application/json", "application/opensearchdescription+xml")
+
+# Constant pages are cached by browsers but revalidated on every visit
+REVALIDATE = "no-cache"
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == "gzip":
+        # mtime=0 keeps the output (and therefore the ETag) reproducible
+        return gzip.compress(body, compresslevel=9 if best else COMPRESS_GZIP_LEVEL, mtime=0)
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else COMPRESS_BROTLI_QUALITY)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred encoding the client accepts (honouring ``q=0``), or None"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def strong_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class Precompressed:
+    """A constant body with its ETag and every encoding prepared ahead of time"""
+
+    __slots__ = ("body", "media_type", "etag", "variants")
+
+    def __init__(self, body: bytes, media_type: str):
+        self.body = body
+        self.media_type = media_type
+        # One ETag per representation: the encoding is appended for compressed variants
+        self.etag = strong_etag(body)
+        self.variants: Dict[str, bytes] = {}
+        if len(body) >= COMPRESS_MIN_BYTES:
+            for encoding in ENCODINGS:
+                compressed = compress(body, encoding, best=True)
+                if len(compressed) < len(body):
+                    self.variants[encoding] = compressed
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def response(self, request: Request, cache_control: str = REVALIDATE, headers: Optional[Mapping[str, str]] = None) -> Response:
+        """The best variant for ``request``, or a bodiless 304 if the client has it"""
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        if encoding not in self.variants:
+            encoding = None
+        etag = self.etag_for(encoding)
+        response_headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if headers:
+            response_headers.update(headers)
+
+        if_none_match = request.headers.get("if-none-match", "")
+        # A cached copy of any variant is the same resource
+        if if_none_match and any(etag_matches(if_none_match, self.etag_for(candidate)) for candidate in (None, *self.variants)):
+            return Response(status_code=304, headers=response_headers)
+        if encoding is None:
+            return Response(content=self.body, media_type=self.media_type, headers=response_headers)
+        response_headers["Content-Encoding"] = encoding
+        return Response(content=self.variants[encoding], media_type=self.media_type, headers=response_headers)
+
+
+def conditional_response(request: Request, body: bytes, media_type: str) -> Response:
+    """Response for a body built per request, validated by a weak ETag.
+
+    The ETag is weak because the middleware may still compress the body.
+    """
+    etag = "W/" + strong_etag(body)
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE}
+    if etag_matches(request.headers.get("if-none-match", ""), etag[2:]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+class CompressionMiddleware:
+    """Compresses complete responses of compressible types on the fly.
+
+    Responses that already carry a Content-Encoding (``Precompressed``) and
+    streaming responses are left alone.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                media_type = headers.get("content-type", "").partition(";")[0].strip()
+                if "content-encoding" in headers or media_type not in COMPRESSIBLE_TYPES:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streaming or tiny body: send as is
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            compressed = compress(body, encoding)
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
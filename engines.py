@@ -0,0 +1,141 @@
+"""Search engine definitions and the immutable registry built from them"""
+import json
+import os
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
+from urllib.parse import quote_plus
+
+# Search engine configurations
+SEARCH_ENGINES = {
+    # AI Search Engines
+    "andi": "https://andisearch.com/search?q={}",
+    "brave": "https://search.brave.com/search?q={}",
+    "ds": "https://search.deepseek.com/search?q={}",
+    "felo": "https://felo.ai/search?q={}",
+    "gg": "https://www.google.com/search?q={}",
+    "komo": "https://komo.ai/search?q={}",
+    "p": "https://www.perplexity.ai/search?q={}",
+    "ph": "https://www.phind.com/search?q={}",
+    "you": "https://you.com/search?q={}",
+    
+    # Development & Design
+    "gh": "https://github.com/search?q={}",
+    "pht": "https://www.producthunt.com/search?q={}",
+    "tf": "https://taaft.com/search?q={}",
+    "gw": "https://godly.website/search?q={}",
+    "mb": "https://mobbin.com/browse?q={}",
+    "v0": "https://v0.dev/search?q={}",
+    "sp": "https://community.spline.design/search?q={}",
+    
+    # Social & Entertainment
+    "x": "https://x.com/search?q={}",
+    "yt": "https://www.youtube.com/results?search_query={}",
+    
+    # Education
+    "ud": "https://www.udemy.com/courses/search/?q={}&price=price-free",
+}
+
+# JSON object of engine -> URL template replacing entries above, e.g. to point
+# every engine at a local stub server (see benchmarks/fake_engines.py)
+SEARCH_ENGINES.update(json.loads(os.environ.get("SEARCH_ENGINE_URLS", "{}")))
+
+# Engine categories for better organization
+ENGINE_CATEGORIES = {
+    "AI Search": ["andi", "brave", "ds", "felo", "gg", "komo", "p", "ph", "you"],
+    "Development": ["gh", "pht", "tf", "gw", "mb", "v0", "sp"],
+    "Social & Entertainment": ["x", "yt"],
+    "Education": ["ud"]
+}
+
+# Human-readable engine names
+ENGINE_NAMES = {
+    "andi": "Andi Search",
+    "brave": "Brave Search",
+    "ds": "DeepSeek",
+    "felo": "Felo AI",
+    "gg": "Google",
+    "komo": "Komo.ai",
+    "p": "Perplexity AI",
+    "ph": "Phind",
+    "you": "You.com",
+    "gh": "GitHub",
+    "pht": "Product Hunt",
+    "tf": "Taaft",
+    "gw": "Godly.website",
+    "mb": "Mobbin",
+    "v0": "v0.dev",
+    "sp": "Spline Community",
+
+    "x": "X.com (Twitter)",
+    "yt": "YouTube",
+    "ud": "Free Udemy"
+}
+
+# Engine-specific icons
+ENGINE_ICONS = {
+    "gg": "🔍", "gh": "🐙", "yt": "📺", "x": "🐦",
+    "p": "🔮", "you": "💭", "andi": "🤖", "felo": "🧠",
+    "brave": "🦁", "ds": "🔬", "komo": "🌟", "ph": "💡",
+    "pht": "🚀", "tf": "🎨", "gw": "✨", "mb": "📱",
+    "v0": "⚡", "sp": "🎭", "ud": "🎓"
+}
+
+# Category icons mapping
+CATEGORY_ICONS = {
+    "AI Search": "🤖",
+    "Development": "💻",
+    "Social & Entertainment": "🎭",
+    "Education": "📚"
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Engine:
+    """One search engine with everything the pages need, computed once"""
+
+    key: str
+    name: str
+    icon: str
+    category: str
+    prefix: str
+    suffix: str
+
+    def url(self, encoded_query: str) -> str:
+        """Search URL for an already ``quote_plus``-encoded query"""
+        return self.prefix + encoded_query + self.suffix
+
+
+def get_engine_name(engine_key: str) -> str:
+    """Get human-readable name for engine"""
+    return ENGINE_NAMES.get(engine_key, engine_key.upper())
+
+
+def build_registry(search_engines: Dict[str, str], categories: Dict[str, list]) -> Mapping[str, Engine]:
+    """Split every URL template once and attach names, icons and categories"""
+    category_of = {engine: category for category, engines in categories.items() for engine in engines}
+    registry = {}
+    for key, template in search_engines.items():
+        prefix, suffix = template.split("{}", 1)
+        registry[key] = Engine(
+            key=key,
+            name=get_engine_name(key),
+            icon=ENGINE_ICONS.get(key, "🔗"),
+            category=category_of.get(key, "Other"),
+            prefix=prefix,
+            suffix=suffix,
+        )
+    return MappingProxyType(registry)
+
+
+ENGINES = build_registry(SEARCH_ENGINES, ENGINE_CATEGORIES)
+
+# (category, icon, engines) in display order, skipping unknown shortcuts
+CATEGORY_ROUTES: Tuple[Tuple[str, str, Tuple[Engine, ...]], ...] = tuple(
+    (category, CATEGORY_ICONS.get(category, "🔍"), tuple(ENGINES[key] for key in keys if key in ENGINES))
+    for category, keys in ENGINE_CATEGORIES.items()
+)
+
+
+def engine_url(engine: str, query: str) -> str:
+    return ENGINES[engine].url(quote_plus(query))
@@ -0,0 +1,214 @@
+"""Parsing executor that keeps HTML parsing off the event loop"""
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from metrics import PARSE_DURATION
+from parsers import extract_results
+
+# "process", "thread" (for GIL-releasing parsers) or "inline" (parse on the loop)
+PARSE_EXECUTOR = os.environ.get("PARSE_EXECUTOR", "process")
+# Each web worker has its own pool, so the default splits the cores between them
+PARSE_WORKERS = int(os.environ.get(
+    "PARSE_WORKERS", str(max(min(4, (os.cpu_count() or 1) // int(os.environ.get("WEB_CONCURRENCY", "1"))), 1))
+))
+# Jobs allowed to wait for a worker; beyond that callers are held back
+PARSE_MAX_QUEUE = int(os.environ.get("PARSE_MAX_QUEUE", "64"))
+
+
+def timed_extract(engine: str, html: Union[str, bytes], submitted: float) -> Tuple[float, float, List[Dict[str, str]]]:
+    """Worker entry point: returns (queue wait, parse time, results) in seconds"""
+    started = time.time()
+    results = extract_results(engine, html)
+    return started - submitted, time.time() - started, results
+
+
+def timed_call(function: Callable[..., Any], args: Tuple, submitted: float) -> Tuple[float, float, Any]:
+    """Lane entry point for one incremental parse step: returns (queue wait, run time, result)"""
+    started = time.time()
+    result = function(*args)
+    return started - submitted, time.time() - started, result
+
+
+def warm_up() -> int:
+    """No-op job that makes a worker import the parser stack ahead of traffic"""
+    return os.getpid()
+
+
+class EngineParseStats:
+    __slots__ = ("jobs", "errors", "streamed", "early_stops", "stream_fallbacks", "queue_wait_total", "queue_wait_max", "parse_total", "parse_max")
+
+    def __init__(self):
+        self.jobs = 0
+        self.errors = 0
+        self.streamed = 0
+        self.early_stops = 0
+        self.stream_fallbacks = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.parse_total = 0.0
+        self.parse_max = 0.0
+
+    def record(self, queue_wait: float, parse_time: float):
+        self.jobs += 1
+        self.queue_wait_total += queue_wait
+        self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+        self.parse_total += parse_time
+        self.parse_max = max(self.parse_max, parse_time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        jobs = self.jobs or 1
+        return {
+            "jobs": self.jobs,
+            "errors": self.errors,
+            "streamed": self.streamed,
+            "early_stops": self.early_stops,
+            "stream_fallbacks": self.stream_fallbacks,
+            "queue_wait_avg_ms": round(self.queue_wait_total / jobs * 1000, 2),
+            "queue_wait_max_ms": round(self.queue_wait_max * 1000, 2),
+            "parse_avg_ms": round(self.parse_total / jobs * 1000, 2),
+            "parse_max_ms": round(self.parse_max * 1000, 2),
+        }
+
+
+class ParseExecutor:
+    """Bounded pool of parser workers with per-engine timing.
+
+    At most ``workers + max_queue`` jobs are admitted at once; further callers
+    wait for a slot, which pushes back on the fetches feeding the pool instead
+    of letting parked HTML pile up in memory.
+    """
+
+    def __init__(self, kind: str = PARSE_EXECUTOR, workers: int = PARSE_WORKERS, max_queue: int = PARSE_MAX_QUEUE):
+        if kind not in ("process", "thread", "inline"):
+            raise ValueError(f"Unknown parse executor: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._open = False
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._admitted = 0
+        self._stats: Dict[str, EngineParseStats] = {}
+        # Single-thread executors for incremental parses, handed out round-robin
+        self._stream_lanes: List[ThreadPoolExecutor] = []
+        self._next_lane = 0
+
+    def open(self):
+        """Start accepting jobs; the pool itself is only started by the first ``extract``"""
+        self._open = True
+
+    def _pool(self) -> Optional[Executor]:
+        # Streaming parses run on the lanes, so with every extractor streamed a
+        # web worker never pays for (or waits on) a pool it would not use
+        if self._executor is None and self._open:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                # Every worker imports the parsers while the first jobs queue
+                for _ in range(self.workers):
+                    self._executor.submit(warm_up)
+            elif self.kind == "thread":
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="parse")
+        return self._executor
+
+    def close(self):
+        self._open = False
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for lane in self._stream_lanes:
+            lane.shutdown(wait=False, cancel_futures=True)
+        self._stream_lanes = []
+
+    def stream_lane(self) -> Executor:
+        """Thread to run every step of one incremental parse on.
+
+        An lxml parser must stay on the thread that created it (mixing threads
+        corrupts its string dictionary), so a page is created, fed and closed
+        on a single lane.
+        """
+        if not self._stream_lanes:
+            self._stream_lanes = [
+                ThreadPoolExecutor(1, thread_name_prefix=f"stream-parse-{index}") for index in range(self.workers)
+            ]
+        lane = self._stream_lanes[self._next_lane % len(self._stream_lanes)]
+        self._next_lane += 1
+        return lane
+
+    def engine_stats(self, engine: str) -> EngineParseStats:
+        stats = self._stats.get(engine)
+        if stats is None:
+            stats = self._stats[engine] = EngineParseStats()
+        return stats
+
+    @asynccontextmanager
+    async def _admission(self):
+        """Hold one of the ``workers + max_queue`` slots shared by every kind of job"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers + self.max_queue)
+        async with self._slots:
+            self._admitted += 1
+            try:
+                yield
+            finally:
+                self._admitted -= 1
+
+    async def run_on_lane(self, lane: Executor, function: Callable[..., Any], *args) -> Tuple[float, float, Any]:
+        """Run one step of an incremental parse on its lane, admitted like an ``extract`` job.
+
+        Returns (queue wait, run time, result); the wait covers both the slot
+        and the lane's backlog of steps from other pages.
+        """
+        submitted = time.time()
+        async with self._admission():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(lane, timed_call, function, args, submitted)
+
+    def record_streamed(self, engine: str, queue_wait: float, parse_time: float, early_stop: bool):
+        """Account for a page parsed incrementally while it was downloaded"""
+        stats = self.engine_stats(engine)
+        stats.record(queue_wait, parse_time)
+        PARSE_DURATION.observe(parse_time, engine, "streamed")
+        stats.streamed += 1
+        if early_stop:
+            stats.early_stops += 1
+
+    def record_stream_fallback(self, engine: str):
+        """Account for an incremental parse that failed and was redone on the buffered page"""
+        self.engine_stats(engine).stream_fallbacks += 1
+
+    async def extract(self, engine: str, html: Union[str, bytes]) -> List[Dict[str, str]]:
+        stats = self.engine_stats(engine)
+
+        submitted = time.time()
+        async with self._admission():
+            try:
+                pool = self._pool()
+                if pool is None:
+                    queue_wait, parse_time, results = timed_extract(engine, html, submitted)
+                else:
+                    loop = asyncio.get_running_loop()
+                    queue_wait, parse_time, results = await loop.run_in_executor(
+                        pool, timed_extract, engine, html, submitted
+                    )
+            except Exception:
+                stats.errors += 1
+                raise
+
+        stats.record(queue_wait, parse_time)
+        PARSE_DURATION.observe(parse_time, engine, self.kind)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._admitted,
+            "queued": max(self._admitted - self.workers, 0),
+            "engines": {engine: stats.to_dict() for engine, stats in sorted(self._stats.items())},
+        }
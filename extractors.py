@@ -0,0 +1,146 @@
+"""Per-engine result extractors.
+
+Each engine whose result page can be scraped reliably registers an
+``Extractor`` describing where one result lives (the container) and where its
+title, link and snippet are inside it. Selectors are validated and compiled
+when this module is imported. Engines without an extractor (JavaScript-only
+pages such as Perplexity or YouTube) are not fetched at all for ``parse=true``.
+
+Every extractor is pinned to a fixture corpus under
+``fixtures/extractors/<engine>/v<version>.html`` with the expected output next
+to it as ``v<version>.json``. Bump ``version`` and add a new fixture whenever
+an engine's markup changes, then check the corpus with::
+
+    python -m pytest tests/test_extractors.py
+"""
+import os
+from typing import Dict, List, Optional
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "extractors")
+
+
+def class_xpath(*names: str) -> str:
+    """XPath predicate matching any of the given CSS class names"""
+    return " or ".join(f'contains(concat(" ", normalize-space(@class), " "), " {name} ")' for name in names)
+
+
+class SelectorSet:
+    """Where results live on a page, as CSS (bs4/selectolax) and XPath (lxml).
+
+    ``result`` selects one container per result; the title, link and snippet
+    selectors are relative to it. A missing link selector means the container
+    is itself the link, and a missing snippet selector falls back to the title.
+    """
+
+    __slots__ = (
+        "result_css", "title_css", "link_css", "snippet_css",
+        "result_xpath", "title_xpath", "link_xpath", "snippet_xpath",
+    )
+
+    def __init__(
+        self,
+        result_css: str,
+        title_css: str,
+        result_xpath: str,
+        title_xpath: str,
+        link_css: Optional[str] = None,
+        link_xpath: Optional[str] = None,
+        snippet_css: Optional[str] = None,
+        snippet_xpath: Optional[str] = None,
+    ):
+        self.result_css = result_css
+        self.title_css = title_css
+        self.link_css = link_css
+        self.snippet_css = snippet_css
+        self.result_xpath = result_xpath
+        self.title_xpath = title_xpath
+        self.link_xpath = link_xpath
+        self.snippet_xpath = snippet_xpath
+
+    def xpaths(self) -> List[str]:
+        return [xpath for xpath in (self.result_xpath, self.title_xpath, self.link_xpath, self.snippet_xpath) if xpath]
+
+
+class Extractor:
+    """Base class for an engine's extractor; subclasses only declare selectors"""
+
+    engine = ""
+    version = 1
+    selectors: SelectorSet
+
+
+EXTRACTORS: Dict[str, Extractor] = {}
+
+# XPath compiled at import, shared read-only as the template for per-thread copies
+COMPILED_XPATHS: Dict[str, "etree.XPath"] = {}
+
+
+def register(cls):
+    """Class decorator adding an extractor to the registry"""
+    extractor = cls()
+    if not extractor.engine:
+        raise ValueError(f"{cls.__name__} does not declare an engine")
+    if etree is not None:
+        for xpath in extractor.selectors.xpaths():
+            if xpath not in COMPILED_XPATHS:
+                COMPILED_XPATHS[xpath] = etree.XPath(xpath)
+    EXTRACTORS[extractor.engine] = extractor
+    return cls
+
+
+def get_extractor(engine: str) -> Optional[Extractor]:
+    return EXTRACTORS.get(engine)
+
+
+def has_extractor(engine: str) -> bool:
+    return engine in EXTRACTORS
+
+
+@register
+class GoogleExtractor(Extractor):
+    engine = "gg"
+    version = 1
+    selectors = SelectorSet(
+        result_css="a:has(> h3)",
+        title_css="h3",
+        result_xpath="//a[h3]",
+        title_xpath="./h3",
+    )
+
+
+@register
+class GitHubExtractor(Extractor):
+    engine = "gh"
+    version = 1
+    selectors = SelectorSet(
+        result_css='a[data-testid="results-list"]',
+        title_css=".text-normal",
+        result_xpath='//a[@data-testid="results-list"]',
+        title_xpath=f'.//*[{class_xpath("text-normal")}]',
+    )
+
+
+@register
+class BraveExtractor(Extractor):
+    engine = "brave"
+    version = 1
+    selectors = SelectorSet(
+        result_css='div.snippet[data-type="web"]',
+        title_css=".title, .snippet-title",
+        link_css="a[href]",
+        snippet_css=".snippet-description",
+        result_xpath=f'//div[{class_xpath("snippet")}][@data-type="web"]',
+        title_xpath=f'.//*[{class_xpath("title", "snippet-title")}]',
+        link_xpath=".//a[@href]",
+        snippet_xpath=f'.//*[{class_xpath("snippet-description")}]',
+    )
+
+
+def fixture_paths(engine: str, version: int):
+    base = os.path.join(FIXTURES_DIR, engine, f"v{version}")
+    return base + ".html", base + ".json"
@@ -0,0 +1,166 @@
+"""Merging parsed results from several engines into one ranked list.
+
+Links are canonicalized first: relative links are resolved against the
+engine's page, redirect wrappers such as Google's ``/url?q=`` are unwrapped
+and tracking parameters are dropped. Two results are the same item when their
+canonical URLs match (ignoring scheme, ``www.`` and a trailing slash) or when
+their titles hash the same after normalization, which catches one page
+listed under a mirror or with a site suffix in the title. A suffix is only
+dropped when it names the result's own host ("... - Stack Overflow" on
+stackoverflow.com), so "Python - Wikipedia" and "Python - Tutorial" stay
+apart.
+
+Items are ranked by reciprocal rank fusion: an item scores
+``1 / (RRF_K + rank)`` for every engine that returned it. Each result is
+visited once with constant-time dictionary lookups; only the merged list is
+sorted at the end.
+"""
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# Damping constant from the original reciprocal rank fusion paper
+RRF_K = 60
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = frozenset({
+    "gclid", "dclid", "gbraid", "wbraid", "fbclid", "msclkid", "yclid", "twclid", "igshid",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "mkt_tok", "ref_src", "ref_url", "spm", "srsltid",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "piwik_")
+
+# Redirect wrappers: host suffix, path, and the parameters that may hold the target
+REDIRECTS = (
+    ("google.", "/url", ("q", "url")),
+    ("duckduckgo.com", "/l/", ("uddg",)),
+    ("bing.com", "/ck/a", ("u",)),
+)
+
+# Trailing " - Site name" / " | Site" / " · Site" parts of a title
+TITLE_SUFFIX = re.compile(r"\s+[-|·–—:]\s+([^-|·–—:]{1,40})$")
+WORD = re.compile(r"\w+")
+# Shorter titles ("Home", "Login") are too generic to merge on
+MIN_TITLE_WORDS = 3
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def unwrap_redirect(url: str) -> str:
+    """The target of a known redirect wrapper, or ``url`` itself.
+
+    Relative links (as scraped from the engine's own page) match on the path alone.
+    """
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    for host_part, path, params in REDIRECTS:
+        if (host_part in host or not parts.netloc) and parts.path.startswith(path):
+            query = dict(parse_qsl(parts.query))
+            for param in params:
+                target = query.get(param, "")
+                if target.startswith(("http://", "https://")):
+                    return target
+    return url
+
+
+def canonical_url(link: str, base: str = "") -> str:
+    """Absolute link with redirects unwrapped, tracking parameters and fragment removed"""
+    url = unwrap_redirect(link.strip())
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        return url
+    host = (parts.hostname or "").lower()
+    if parts.port and (parts.scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = parts.query
+    if query:
+        query = urlencode([(name, value) for name, value in parse_qsl(query, keep_blank_values=True) if not _is_tracking(name)])
+    return urlunsplit((parts.scheme, host, parts.path or "/", query, ""))
+
+
+def url_key(url: str) -> str:
+    """Identity of a canonical URL for deduplication"""
+    parts = urlsplit(url)
+    host = parts.netloc.removeprefix("www.")
+    query = "&".join(sorted(parts.query.split("&"))) if parts.query else ""
+    return f"{host}{parts.path.rstrip('/')}?{query}"
+
+
+def names_host(suffix: str, host: str) -> bool:
+    """Whether a title suffix is the site's name, e.g. "Stack Overflow" for stackoverflow.com"""
+    name = "".join(WORD.findall(suffix.lower()))
+    if not name:
+        return False
+    labels = host.lower().removeprefix("www.").split(".")
+    if len(name) < 3:
+        # Too short to find inside a host name: "Go" names go.dev, not google.com
+        return name in labels[:-1]
+    # "Python.org" names docs.python.org; "GitHub Docs" names github.com, but "com" names nothing
+    return name in "".join(labels) or any(len(label) >= 3 and label in name for label in labels[:-1])
+
+
+def title_key(title: str, link: str = "") -> Optional[bytes]:
+    """Hash of a title's words without the suffix naming ``link``'s site; None for titles too short to trust"""
+    suffix = TITLE_SUFFIX.search(title)
+    if suffix is not None and names_host(suffix.group(1), urlsplit(link).hostname or ""):
+        title = title[:suffix.start()]
+    words = WORD.findall(title.lower())
+    if len(words) < MIN_TITLE_WORDS:
+        return None
+    return hashlib.blake2b(" ".join(words).encode(), digest_size=8).digest()
+
+
+def merge_results(ranked_lists: Sequence[Tuple[str, str, List[Dict[str, str]]]], k: int = RRF_K) -> List[Dict[str, Any]]:
+    """One deduplicated list from ``(engine, page url, parsed results)`` triples.
+
+    Results are visited rank by rank across engines, so the first copy of an
+    item seen is its best-ranked one and supplies the title and snippet, and
+    ``engines`` lists the engines from best to worst rank.
+    """
+    items: List[Dict[str, Any]] = []
+    by_url: Dict[str, Dict[str, Any]] = {}
+    by_title: Dict[bytes, Dict[str, Any]] = {}
+    # Lists that still have results at the current rank, so exhausted ones cost nothing
+    active = [ranked for ranked in ranked_lists if ranked[2]]
+    index = 0
+
+    while active:
+        rank = index + 1
+        for engine, page_url, results in active:
+            result = results[index]
+            link = canonical_url(result["link"], page_url)
+            ukey = url_key(link)
+            tkey = title_key(result["title"], link)
+            item = by_url.get(ukey)
+            if item is None and tkey is not None:
+                item = by_title.get(tkey)
+            if item is None:
+                item = {
+                    "title": result["title"],
+                    "link": link,
+                    "snippet": result["snippet"],
+                    "score": 0.0,
+                    "engines": [],
+                }
+                items.append(item)
+            elif item["snippet"] == item["title"] and result["snippet"] != result["title"]:
+                # The first copy had no snippet of its own
+                item["snippet"] = result["snippet"]
+            if engine not in item["engines"]:
+                item["engines"].append(engine)
+                item["score"] += 1 / (k + rank)
+            by_url.setdefault(ukey, item)
+            if tkey is not None:
+                by_title.setdefault(tkey, item)
+        index += 1
+        active = [ranked for ranked in active if len(ranked[2]) > index]
+
+    items.sort(key=lambda item: item["score"], reverse=True)
+    for item in items:
+        item["score"] = round(item["score"], 6)
+    return items
@@ -0,0 +1,170 @@
+"""Hedged upstream requests for engines with a long latency tail.
+
+Every successful primary fetch feeds its engine's ``LatencyHistogram`` (when
+a hedge answers first, with the time since the primary started); hedges
+themselves never do, as their latency only counts from the hedge delay. An
+engine is hedged once its histogram has ``HEDGE_MIN_SAMPLES`` and its p95 is
+at least ``HEDGE_MIN_SPREAD`` times its median: a fetch still outstanding
+after the engine's live p90 gets a second, identical request, and whichever
+answers first wins.
+
+Hedges are extra load on engines that may already be struggling, so they are
+capped globally: each primary fetch earns ``HEDGE_MAX_RATIO`` of a hedge
+token (at most ``HEDGE_BURST`` saved up), every hedge spends one, and no more
+than ``HEDGE_MAX_IN_FLIGHT`` hedges run at once.
+"""
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+HEDGE_REQUESTS = os.environ.get("HEDGE_REQUESTS", "true").lower() in ("1", "true", "yes")
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MIN_SPREAD = float(os.environ.get("HEDGE_MIN_SPREAD", "2"))
+# Extra requests hedging may add, as a fraction of primary upstream fetches
+HEDGE_MAX_RATIO = float(os.environ.get("HEDGE_MAX_RATIO", "0.05"))
+HEDGE_BURST = float(os.environ.get("HEDGE_BURST", "5"))
+HEDGE_MAX_IN_FLIGHT = int(os.environ.get("HEDGE_MAX_IN_FLIGHT", "4"))
+# The histogram is halved after this many samples so it follows current conditions
+HEDGE_DECAY_SAMPLES = int(os.environ.get("HEDGE_DECAY_SAMPLES", "500"))
+
+# Log-spaced buckets from 1 ms up to about two minutes, each 15% wider than the last
+BUCKET_MIN = 0.001
+BUCKET_GROWTH = 1.15
+BUCKET_COUNT = int(math.log(120 / BUCKET_MIN, BUCKET_GROWTH)) + 1
+
+
+class LatencyHistogram:
+    """Exponentially bucketed latency counts that fade as new samples arrive"""
+
+    __slots__ = ("counts", "total", "since_decay", "decay_every")
+
+    def __init__(self, decay_every: int = HEDGE_DECAY_SAMPLES):
+        self.counts: List[float] = [0.0] * BUCKET_COUNT
+        self.total = 0.0
+        self.since_decay = 0
+        self.decay_every = decay_every
+
+    def record(self, seconds: float):
+        if seconds <= BUCKET_MIN:
+            index = 0
+        else:
+            index = min(int(math.log(seconds / BUCKET_MIN, BUCKET_GROWTH)), BUCKET_COUNT - 1)
+        self.counts[index] += 1
+        self.total += 1
+        self.since_decay += 1
+        if self.since_decay >= self.decay_every:
+            self.counts = [count / 2 for count in self.counts]
+            self.total /= 2
+            self.since_decay = 0
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given quantile, in seconds"""
+        if not self.total:
+            return None
+        target = fraction * self.total
+        cumulative = 0.0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return BUCKET_MIN * BUCKET_GROWTH ** (index + 1)
+        return BUCKET_MIN * BUCKET_GROWTH ** BUCKET_COUNT
+
+
+class EngineHedging:
+    __slots__ = ("histogram", "samples", "primaries", "hedges", "hedge_wins")
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.samples = 0
+        self.primaries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def delay(self) -> Optional[float]:
+        """The engine's p90 if its tail is long enough to be worth hedging"""
+        if self.samples < HEDGE_MIN_SAMPLES:
+            return None
+        p50 = self.histogram.quantile(0.50)
+        p95 = self.histogram.quantile(0.95)
+        if p95 < p50 * HEDGE_MIN_SPREAD:
+            return None
+        return self.histogram.quantile(0.90)
+
+    def to_dict(self) -> Dict[str, Any]:
+        quantiles = {f"p{int(q * 100)}_ms": self.histogram.quantile(q) for q in (0.50, 0.90, 0.95)}
+        delay = self.delay()
+        return {
+            "samples": self.samples,
+            **{key: round(value * 1000, 1) if value is not None else None for key, value in quantiles.items()},
+            "hedge_after_ms": round(delay * 1000, 1) if delay is not None else None,
+            "primaries": self.primaries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+class Hedger:
+    """Per-engine hedging thresholds plus the global budget on extra requests"""
+
+    def __init__(
+        self,
+        enabled: bool = HEDGE_REQUESTS,
+        max_ratio: float = HEDGE_MAX_RATIO,
+        burst: float = HEDGE_BURST,
+        max_in_flight: int = HEDGE_MAX_IN_FLIGHT,
+    ):
+        self.enabled = enabled
+        self.max_ratio = max_ratio
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.budget = burst
+        self.in_flight = 0
+        self.denied = 0
+        self._engines: Dict[str, EngineHedging] = {}
+
+    def engine(self, engine: str) -> EngineHedging:
+        hedging = self._engines.get(engine)
+        if hedging is None:
+            hedging = self._engines[engine] = EngineHedging()
+        return hedging
+
+    def record(self, engine: str, seconds: float):
+        """Feed a successful upstream fetch's latency into the engine's histogram"""
+        hedging = self.engine(engine)
+        hedging.histogram.record(seconds)
+        hedging.samples += 1
+
+    def hedge_delay(self, engine: str) -> Optional[float]:
+        """Account for a primary fetch; return how long to wait before hedging it, if at all"""
+        hedging = self.engine(engine)
+        hedging.primaries += 1
+        self.budget = min(self.burst, self.budget + self.max_ratio)
+        if not self.enabled:
+            return None
+        return hedging.delay()
+
+    def try_start(self, engine: str) -> bool:
+        """Spend a hedge from the global budget, if any is left"""
+        if self.budget < 1 or self.in_flight >= self.max_in_flight:
+            self.denied += 1
+            return False
+        self.budget -= 1
+        self.in_flight += 1
+        self.engine(engine).hedges += 1
+        return True
+
+    def finish(self, engine: str, hedge_won: bool):
+        self.in_flight -= 1
+        if hedge_won:
+            self.engine(engine).hedge_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "max_ratio": self.max_ratio,
+            "budget": round(self.budget, 2),
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "denied": self.denied,
+            "engines": {engine: hedging.to_dict() for engine, hedging in sorted(self._engines.items())},
+        }
@@ -0,0 +1,195 @@
+"""In-memory full-text index over every result the aggregator has parsed.
+
+Each distinct page is one document, keyed by ``fusion.url_key`` of its
+canonical link, made of its title (counted ``TITLE_WEIGHT`` times), its
+snippet and the words of its host and path. A term's postings are two
+``array`` columns, document ids (4 bytes each) and term frequencies (1
+byte), rather than lists of Python objects. Documents are only ever
+appended, so every posting list is sorted by id and dropping the oldest
+documents once ``LOCAL_INDEX_MAX_DOCS`` is reached is one slice per term.
+
+Queries are scored with BM25. Terms are visited from rarest to most common,
+and no posting list is walked further than its newest ``BM25_SCAN_LIMIT``
+entries: a longer list only adds to the scores of documents a rarer term
+already matched, or, when every query term is that common, supplies its
+newest documents as the candidates. Such terms have an idf near zero, so
+this bounds the time of a query without changing what ranks first.
+"""
+import bisect
+import heapq
+import math
+import os
+import re
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from fusion import canonical_url, url_key
+
+LOCAL_INDEX_MAX_DOCS = int(os.environ.get("LOCAL_INDEX_MAX_DOCS", "200000"))
+# Usual BM25 parameters: term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Most postings of one term walked per query (see above)
+BM25_SCAN_LIMIT = 2000
+# A title word counts as much as this many snippet words
+TITLE_WEIGHT = 2
+# Longer "words" are hashes, ids and base64 that nobody searches for
+MAX_TERM_CHARS = 40
+
+WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [term for term in WORD.findall(text.lower()) if len(term) <= MAX_TERM_CHARS]
+
+
+class Document:
+    __slots__ = ("key", "title", "link", "snippet", "engines")
+
+    def __init__(self, key: str, title: str, link: str, snippet: str, engine: str):
+        self.key = key
+        self.title = title
+        self.link = link
+        self.snippet = snippet
+        self.engines = [engine]
+
+
+class LocalIndex:
+    """BM25 over parsed results, deduplicated by canonical URL, oldest dropped first"""
+
+    def __init__(self, max_docs: int = LOCAL_INDEX_MAX_DOCS):
+        self.max_docs = max_docs
+        # Id of docs[0]; ids below it have been dropped
+        self.base = 0
+        self.docs: List[Document] = []
+        # Weighted term count of each document, parallel to docs
+        self.lengths = array("H")
+        self.total_length = 0
+        self.ids: Dict[str, int] = {}
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.counters = {"results_seen": 0, "documents_added": 0, "documents_dropped": 0, "queries": 0}
+
+    def add(self, engine: str, page_url: str, results: Sequence[Dict[str, str]]):
+        """Index the parsed results of one page; pages already indexed only gain the engine"""
+        for result in results:
+            self.counters["results_seen"] += 1
+            link = canonical_url(result["link"], page_url)
+            key = url_key(link)
+            doc_id = self.ids.get(key)
+            if doc_id is not None:
+                doc = self.docs[doc_id - self.base]
+                if engine not in doc.engines:
+                    doc.engines.append(engine)
+                continue
+
+            title, snippet = result["title"], result["snippet"]
+            terms = Counter(tokenize(title) * TITLE_WEIGHT)
+            if snippet != title:
+                terms.update(tokenize(snippet))
+            parts = urlsplit(link)
+            terms.update(tokenize(f"{parts.netloc.removeprefix('www.')} {parts.path}"))
+            if not terms:
+                continue
+
+            doc_id = self.base + len(self.docs)
+            for term, count in terms.items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = self.postings[term] = (array("I"), array("B"))
+                posting[0].append(doc_id)
+                posting[1].append(count if count < 256 else 255)
+            length = min(sum(terms.values()), 65535)
+            self.docs.append(Document(key, title, link, snippet, engine))
+            self.lengths.append(length)
+            self.total_length += length
+            self.ids[key] = doc_id
+            self.counters["documents_added"] += 1
+
+        if len(self.docs) > self.max_docs:
+            # Drop a quarter at once so the slicing is paid rarely
+            self.drop_oldest(len(self.docs) - self.max_docs * 3 // 4)
+
+    def drop_oldest(self, count: int):
+        cutoff = self.base + count
+        for term, (doc_ids, frequencies) in list(self.postings.items()):
+            start = bisect.bisect_left(doc_ids, cutoff)
+            if start == len(doc_ids):
+                del self.postings[term]
+            elif start:
+                del doc_ids[:start]
+                del frequencies[:start]
+        for doc in self.docs[:count]:
+            del self.ids[doc.key]
+        self.total_length -= sum(self.lengths[:count])
+        del self.docs[:count]
+        del self.lengths[:count]
+        self.base = cutoff
+        self.counters["documents_dropped"] += count
+
+    def search(self, query: str, limit: int = 10) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """The ``limit`` best documents for ``query``, how many matched and whether that count is exact.
+
+        When a posting list was cut at ``BM25_SCAN_LIMIT`` the count is a
+        lower bound: counting the union of long lists would cost more than
+        the whole query.
+        """
+        self.counters["queries"] += 1
+        count = len(self.docs)
+        postings = [self.postings[term] for term in set(tokenize(query)) if term in self.postings]
+        if not count or not postings:
+            return [], 0, True
+
+        norm = BM25_K1 * (1 - BM25_B)
+        scale = BM25_K1 * BM25_B * count / self.total_length
+        base, lengths = self.base, self.lengths
+        scores: Dict[int, float] = {}
+        truncated = False
+        for doc_ids, frequencies in sorted(postings, key=lambda posting: len(posting[0])):
+            df = len(doc_ids)
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            if df > BM25_SCAN_LIMIT:
+                truncated = True
+            if df > BM25_SCAN_LIMIT and scores:
+                # Only the candidates so far, found by binary search in the long list
+                for doc_id in scores:
+                    i = bisect.bisect_left(doc_ids, doc_id)
+                    if i < df and doc_ids[i] == doc_id:
+                        tf = frequencies[i]
+                        scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm + scale * lengths[doc_id - base])
+                continue
+            start = max(df - BM25_SCAN_LIMIT, 0)
+            for doc_id, tf in zip(doc_ids[start:], frequencies[start:]):
+                score = idf * tf * (BM25_K1 + 1) / (tf + norm + scale * lengths[doc_id - base])
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        hits = []
+        for doc_id, score in best:
+            doc = self.docs[doc_id - base]
+            hits.append({
+                "title": doc.title,
+                "link": doc.link,
+                "snippet": doc.snippet,
+                "score": round(score, 4),
+                "engines": list(doc.engines),
+            })
+        if not truncated:
+            return hits, len(scores), True
+        # Every document of the longest list matched; with one term that is the exact count
+        longest = max(len(doc_ids) for doc_ids, _ in postings)
+        return hits, max(len(scores), longest), len(postings) == 1
+
+    def stats(self) -> Dict[str, Any]:
+        postings = sum(len(doc_ids) for doc_ids, _ in self.postings.values())
+        return {
+            **self.counters,
+            "documents": len(self.docs),
+            "max_documents": self.max_docs,
+            "terms": len(self.postings),
+            "postings": postings,
+            # Ids plus frequencies, without the arrays' own headers
+            "postings_bytes": postings * 5,
+            "average_length": round(self.total_length / len(self.docs), 1) if self.docs else 0.0,
+        }
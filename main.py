@@ -1,618 +1,723 @@
-from fastapi import FastAPI, Query, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Query, HTTPException, Request
+from fastapi.responses import HTMLResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
+from contextlib import asynccontextmanager
 import httpx
 import asyncio
-from typing import List, Optional, Dict, Any
-from urllib.parse import quote_plus
-import json
-from bs4 import BeautifulSoup
+import codecs
+import functools
+from typing import List, Optional, Dict, Any, Tuple, FrozenSet
+import os
+import time
 import re
+import secrets
+
+from engines import SEARCH_ENGINES, ENGINE_CATEGORIES, ENGINES, engine_url
+from templates import HOME_PAGE, UNIFIED_PAGE, BROWSER_PAGE, ASSETS, ASSET_CACHE_CONTROL, page_values
+from compression import CompressionMiddleware, Precompressed, conditional_response
+from pool import EnginePool
+from cache import ResultCache, make_key, CACHE_DISK_PATH, FRESH, STALE
+from singleflight import SingleFlight
+from shared import SHARED_FLIGHT_POLL, open_shared_state
+from ratelimit import RateLimiter, RateLimited, ClientTagMiddleware
+from breaker import CircuitBreakers, CLOSED
+from hedging import Hedger
+from profiling import TracedRoute, TracingMiddleware, current_trace, sample_stacks, PROFILE_MAX_SECONDS
+from metrics import (
+    REGISTRY, TEXT_CONTENT_TYPE, MetricsMiddleware,
+    UPSTREAM_DURATION, UPSTREAM_RESPONSES, UPSTREAM_BYTES, UPSTREAM_TIMEOUTS,
+)
+from executor import ParseExecutor
+from parsers import IncrementalExtractor, LXML_AVAILABLE
+from extractors import EXTRACTORS, has_extractor
+from fusion import merge_results
+from suggest import SuggestionIndex, SUGGEST_MAX_LIMIT
+from localsearch import LocalIndex
+from responses import (
+    JSONBytesResponse, EngineResult, SearchResponse, MultiSearchResponse, dumps, parse_fields, wants,
+    ENGINE_RESULT_SELECTABLE, SEARCH_RESPONSE_SELECTABLE,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources at startup and release them at shutdown"""
+    engine_pool.open()
+    parse_executor.open()
+    cache_purger = None
+    if result_cache.disk is not None:
+        await asyncio.to_thread(result_cache.disk.purge, time.time())
+        cache_purger = asyncio.create_task(result_cache.run_purger())
+    if shared_state is not None:
+        await asyncio.to_thread(shared_state.purge_expired, time.time())
+    suggestion_saver = asyncio.create_task(suggestion_index.run_saver())
+    yield
+    suggestion_saver.cancel()
+    if cache_purger is not None:
+        cache_purger.cancel()
+    await suggestion_index.save()
+    await engine_pool.close()
+    parse_executor.close()
+    result_cache.close()
+    if shared_state is not None:
+        await asyncio.to_thread(shared_state.close)
 
 app = FastAPI(
     title="Aggregate Search Engine",
     description="A FastAPI-based aggregate search engine with multiple shortcuts",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+# Lets traced requests tell endpoint time apart from response serialization
+app.router.route_class = TracedRoute
 
-# Search engine configurations
-SEARCH_ENGINES = {
-    # AI Search Engines
-    "andi": "https://andisearch.com/search?q={}",
-    "brave": "https://search.brave.com/search?q={}",
-    "ds": "https://search.deepseek.com/search?q={}",
-    "felo": "https://felo.ai/search?q={}",
-    "gg": "https://www.google.com/search?q={}",
-    "komo": "https://komo.ai/search?q={}",
-    "p": "https://www.perplexity.ai/search?q={}",
-    "ph": "https://www.phind.com/search?q={}",
-    "you": "https://you.com/search?q={}",
-    
-    # Development & Design
-    "gh": "https://github.com/search?q={}",
-    "pht": "https://www.producthunt.com/search?q={}",
-    "tf": "https://taaft.com/search?q={}",
-    "gw": "https://godly.website/search?q={}",
-    "mb": "https://mobbin.com/browse?q={}",
-    "v0": "https://v0.dev/search?q={}",
-    "sp": "https://community.spline.design/search?q={}",
-    
-    # Social & Entertainment
-    "x": "https://x.com/search?q={}",
-    "yt": "https://www.youtube.com/results?search_query={}",
-    
-    # Education
-    "ud": "https://www.udemy.com/courses/search/?q={}&price=price-free",
-}
+# Compress HTML/JSON bodies that are not already precompressed (streams pass through)
+app.add_middleware(CompressionMiddleware)
+# Tag each request so queued upstream fetches are served fairly across clients
+app.add_middleware(ClientTagMiddleware)
+# Opt-in per-request phase timings (X-Trace header or debug=true)
+app.add_middleware(TracingMiddleware)
+# Outermost, so route latency includes compression
+app.add_middleware(MetricsMiddleware)
 
-# Engine categories for better organization
-ENGINE_CATEGORIES = {
-    "AI Search": ["andi", "brave", "ds", "felo", "gg", "komo", "p", "ph", "you"],
-    "Development": ["gh", "pht", "tf", "gw", "mb", "v0", "sp"],
-    "Social & Entertainment": ["x", "yt"],
-    "Education": ["ud"]
-}
+# Keep-alive connections to every engine host, shared across requests
+engine_pool = EnginePool(SEARCH_ENGINES)
+
+# HTML parsing runs in a worker pool so it never blocks the event loop
+parse_executor = ParseExecutor()
+
+# Cache, fetch leases and token buckets shared with the other workers (None with a single worker)
+shared_state = open_shared_state()
+
+# Cached results keyed by (engine, normalized query, parse flag); the disk layer is shared between workers
+result_cache = ResultCache(disk_path=CACHE_DISK_PATH or (shared_state.path if shared_state is not None else ""))
+
+# Per-engine upstream timeout in seconds; requests can set a tighter deadline_ms
+FETCH_TIMEOUT = float(os.environ.get("FETCH_TIMEOUT", "10"))
+
+# Parse pages while they download and hang up once enough results are extracted
+STREAMING_PARSE = os.environ.get("STREAMING_PARSE", "true").lower() in ("1", "true", "yes") and LXML_AVAILABLE
+# Bytes buffered between incremental parse steps
+STREAM_PARSE_CHUNK = 64 * 1024
+
+# Only the head of the page is ever shown, so cache entries keep just that much
+CACHED_CONTENT_CHARS = 4096
+# Raw bytes that always hold that many characters (at most 4 bytes each)
+HEAD_BYTES = CACHED_CONTENT_CHARS * 4
+
+# Largest number of (query, engine) fetches one /batch-search request may ask for
+BATCH_MAX_FETCHES = int(os.environ.get("BATCH_MAX_FETCHES", "5000"))
+# Fetches running at once across every /batch-search request
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", "32"))
+batch_slots = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+# Identical concurrent fetches share one upstream request
+single_flight = SingleFlight()
+
+# Per-engine token bucket and in-flight cap in front of every upstream request
+rate_limiter = RateLimiter(bucket_factory=shared_state.bucket if shared_state is not None else None)
+
+# Engines that keep failing or timing out are skipped until a probe succeeds
+circuit_breakers = CircuitBreakers(SEARCH_ENGINES)
+
+# Second requests for fetches stuck in an engine's latency tail, under a global budget
+hedger = Hedger()
+
+# Browser search box completions from past searches, seeded with engine shortcuts and names
+suggestion_index = SuggestionIndex(seeds=[*ENGINES, *(engine.name for engine in ENGINES.values())])
+
+# Every parsed result fetched by this worker, searchable through /local-search without upstream calls
+local_index = LocalIndex()
+
+# Strong references to in-flight background refreshes
+_refresh_tasks = set()
+
+# Token required in X-Admin-Token by the /admin endpoints; they do not exist while it is unset
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Only one sampling profile runs at a time
+_profile_running = False
 
 class SearchResult:
-    def __init__(self, engine: str, url: str, status_code: int, content: str = "", error: str = ""):
+    """One engine's answer: the raw page bytes, decoded only as far as a preview needs.
+
+    Pages are often megabytes while responses show at most the first
+    ``CACHED_CONTENT_CHARS`` characters, so once a page has been parsed (or
+    will not be) ``release`` drops everything past that head.
+    """
+
+    __slots__ = ("engine", "url", "status_code", "body", "encoding", "error", "parsed_results")
+
+    def __init__(self, engine: str, url: str, status_code: int, body: bytes = b"", error: str = "", encoding: str = "utf-8"):
         self.engine = engine
         self.url = url
         self.status_code = status_code
-        self.content = content
+        self.body = body
+        self.encoding = encoding
         self.error = error
         self.parsed_results = []
 
-    def parse_results(self):
-        """Basic result parsing - can be extended for specific engines"""
-        if self.status_code != 200 or not self.content:
+    def head(self, chars: int) -> str:
+        """The first ``chars`` characters of the page, decoding no more bytes than they can take"""
+        # No supported encoding needs more than 4 bytes per character; a
+        # character cut in half at the end is held back by the decoder
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        return decoder.decode(self.body[:chars * 4])[:chars]
+
+    def preview(self, chars: int) -> str:
+        """The head of the page, marked with "..." when there is more"""
+        text = self.head(chars + 1)
+        return f"{text[:chars]}..." if len(text) > chars else text
+
+    def text(self) -> str:
+        return self.body.decode(self.encoding, errors="replace")
+
+    def release(self):
+        """Keep only the head that previews and the cache can use, re-encoded as UTF-8"""
+        if len(self.body) > CACHED_CONTENT_CHARS:
+            self.body = self.head(CACHED_CONTENT_CHARS + 1).encode("utf-8")
+            self.encoding = "utf-8"
+
+    def to_cache(self) -> Dict[str, Any]:
+        """Compact, JSON-serializable form stored in the result cache"""
+        return {
+            "url": self.url,
+            "status_code": self.status_code,
+            "content": self.head(CACHED_CONTENT_CHARS),
+            "parsed_results": self.parsed_results
+        }
+
+    @classmethod
+    def from_cache(cls, engine: str, data: Dict[str, Any]) -> "SearchResult":
+        result = cls(engine, data["url"], data["status_code"], data["content"].encode("utf-8"))
+        result.parsed_results = data["parsed_results"]
+        return result
+
+    async def parse_results(self):
+        """Extract titles and links in the parse executor (backends live in parsers.py)"""
+        if self.status_code != 200 or not self.body:
             return
         
+        started = time.perf_counter()
         try:
-            soup = BeautifulSoup(self.content, 'html.parser')
-            
-            # Generic parsing - extract titles and links
-            results = []
-            
-            # Common selectors for different engines
-            selectors = {
-                'github': {'title': 'a[data-testid="results-list"] .text-normal', 'link': 'a[data-testid="results-list"]'},
-                'google': {'title': 'h3', 'link': 'a'},
-                'generic': {'title': 'h1, h2, h3, h4', 'link': 'a'}
-            }
-            
-            # Use appropriate selector based on engine
-            if self.engine == 'gh':
-                selector = selectors['github']
-            elif self.engine == 'gg':
-                selector = selectors['google']
-            else:
-                selector = selectors['generic']
-            
-            titles = soup.select(selector['title'])[:10]  # Limit to 10 results
-            links = soup.select(selector['link'])[:10]
-            
-            for i, title in enumerate(titles):
-                if i < len(links):
-                    results.append({
-                        'title': title.get_text(strip=True),
-                        'link': links[i].get('href', ''),
-                        'snippet': title.get_text(strip=True)[:200] + '...' if len(title.get_text(strip=True)) > 200 else title.get_text(strip=True)
-                    })
-            
-            self.parsed_results = results
+            # UTF-8 pages go to the parser as they arrived; others are decoded first
+            html = self.body if self.encoding == "utf-8" else self.text()
+            self.parsed_results = await parse_executor.extract(self.engine, html)
         except Exception as e:
             self.error = f"Parsing error: {str(e)}"
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add("parse", time.perf_counter() - started, self.engine)
 
-async def fetch_search_result(session: httpx.AsyncClient, engine: str, query: str) -> SearchResult:
-    """Fetch search results from a single engine"""
-    if engine not in SEARCH_ENGINES:
-        return SearchResult(engine, "", 0, error="Unknown engine shortcut")
-    
-    url = SEARCH_ENGINES[engine].format(quote_plus(query))
-    
+def response_encoding(response: httpx.Response) -> str:
+    """Canonical name of the page's charset, or UTF-8 when it is missing or unknown"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        return codecs.lookup(response.encoding or "utf-8").name
+    except LookupError:
+        return "utf-8"
+
+async def fetch_streaming_parse(engine: str, url: str) -> SearchResult:
+    """Download and parse a page incrementally, stopping once enough results are found"""
+    async with engine_pool.stream(engine, url, timeout=FETCH_TIMEOUT) as response:
+        rate_limiter.record(engine, response.status_code, response.headers.get("retry-after"))
+        if response.status_code != 200:
+            await response.aread()
+            UPSTREAM_BYTES.inc(engine, amount=response.num_bytes_downloaded)
+            return SearchResult(engine, url, response.status_code, response.content, encoding=response_encoding(response))
         
-        response = await session.get(url, headers=headers, timeout=10.0)
-        result = SearchResult(engine, url, response.status_code, response.text)
-        result.parse_results()
-        return result
+        lane = parse_executor.stream_lane()
+        # Lane time per step: waiting for a slot and the lane, then parsing
+        queue_wait = 0.0
+        parse_time = 0.0
+        try:
+            waited, took, extractor = await parse_executor.run_on_lane(
+                lane, functools.partial(IncrementalExtractor, engine, encoding=response.charset_encoding)
+            )
+            queue_wait += waited
+            parse_time += took
+        except Exception:
+            # e.g. a charset lxml does not know; the buffered parse below copes
+            extractor = None
+        # Kept until the parse has succeeded, for the buffered fallback
+        received = []
+        pending = []
+        pending_bytes = 0
+        early_stop = False
+        # Lane time spent while the body was still arriving
+        interleaved = 0.0
         
-    except httpx.TimeoutException:
-        return SearchResult(engine, url, 0, error="Request timeout")
-    except Exception as e:
-        return SearchResult(engine, url, 0, error=str(e))
-
-@app.get("/")
-async def root():
-    """Root endpoint with GitGod.ai interface"""
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>GitGod.ai - AI-Powered Search Engine</title>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <style>
-            * {{
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }}
-            
-            body {{
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', sans-serif;
-                background: #0d1117;
-                color: #e6edf3;
-                min-height: 100vh;
-                display: flex;
-                flex-direction: column;
-            }}
-            
-            .header {{
-                background: #161b22;
-                border-bottom: 1px solid #30363d;
-                padding: 1rem 2rem;
-                display: flex;
-                align-items: center;
-                justify-content: space-between;
-            }}
-            
-            .logo {{
-                display: flex;
-                align-items: center;
-                gap: 0.5rem;
-                font-size: 1.5rem;
-                font-weight: 600;
-                color: #58a6ff;
-            }}
-            
-            .logo-icon {{
-                width: 32px;
-                height: 32px;
-                background: linear-gradient(135deg, #58a6ff, #7c3aed);
-                border-radius: 8px;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                font-size: 1.2rem;
-            }}
-            
-            .main-container {{
-                flex: 1;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                justify-content: center;
-                padding: 2rem;
-                max-width: 800px;
-                margin: 0 auto;
-                width: 100%;
-            }}
-            
-            .hero-section {{
-                text-align: center;
-                margin-bottom: 3rem;
-            }}
-            
-            .hero-title {{
-                font-size: 3rem;
-                font-weight: 700;
-                background: linear-gradient(135deg, #58a6ff, #7c3aed, #f78166);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-                background-clip: text;
-                margin-bottom: 1rem;
-            }}
-            
-            .hero-subtitle {{
-                font-size: 1.2rem;
-                color: #8b949e;
-                margin-bottom: 2rem;
-            }}
-            
-            .search-container {{
-                width: 100%;
-                max-width: 600px;
-                margin-bottom: 3rem;
-            }}
-            
-            .search-box {{
-                position: relative;
-                background: #21262d;
-                border: 1px solid #30363d;
-                border-radius: 12px;
-                padding: 1rem;
-                transition: all 0.2s ease;
-            }}
-            
-            .search-box:hover {{
-                border-color: #58a6ff;
-                box-shadow: 0 0 0 3px rgba(88, 166, 255, 0.1);
-            }}
-            
-            .search-input {{
-                width: 100%;
-                background: transparent;
-                border: none;
-                outline: none;
-                color: #e6edf3;
-                font-size: 1.1rem;
-                padding: 0.5rem 0;
-            }}
-            
-            .search-input::placeholder {{
-                color: #8b949e;
-            }}
-            
-            .search-actions {{
-                display: flex;
-                gap: 0.5rem;
-                margin-top: 1rem;
-                flex-wrap: wrap;
-            }}
-            
-            .search-btn {{
-                background: #238636;
-                color: white;
-                border: none;
-                padding: 0.75rem 1.5rem;
-                border-radius: 8px;
-                font-size: 0.9rem;
-                font-weight: 500;
-                cursor: pointer;
-                transition: all 0.2s ease;
-                text-decoration: none;
-                display: inline-block;
-            }}
-            
-            .search-btn:hover {{
-                background: #2ea043;
-                transform: translateY(-1px);
-            }}
-            
-            .search-btn.secondary {{
-                background: #21262d;
-                border: 1px solid #30363d;
-                color: #e6edf3;
-            }}
-            
-            .search-btn.secondary:hover {{
-                background: #30363d;
-                border-color: #58a6ff;
-            }}
-            
-            .features-grid {{
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-                gap: 1.5rem;
-                width: 100%;
-                margin-bottom: 3rem;
-            }}
-            
-            .feature-card {{
-                background: #161b22;
-                border: 1px solid #30363d;
-                border-radius: 12px;
-                padding: 1.5rem;
-                transition: all 0.2s ease;
-            }}
-            
-            .feature-card:hover {{
-                border-color: #58a6ff;
-                transform: translateY(-2px);
-                box-shadow: 0 8px 24px rgba(0, 0, 0, 0.3);
-            }}
-            
-            .feature-icon {{
-                font-size: 2rem;
-                margin-bottom: 1rem;
-            }}
-            
-            .feature-title {{
-                font-size: 1.2rem;
-                font-weight: 600;
-                margin-bottom: 0.5rem;
-                color: #e6edf3;
-            }}
-            
-            .feature-desc {{
-                color: #8b949e;
-                line-height: 1.5;
-            }}
-            
-            .engines-section {{
-                width: 100%;
-                background: #161b22;
-                border: 1px solid #30363d;
-                border-radius: 12px;
-                padding: 2rem;
-                margin-bottom: 2rem;
-            }}
-            
-            .engines-title {{
-                font-size: 1.5rem;
-                font-weight: 600;
-                margin-bottom: 1.5rem;
-                color: #e6edf3;
-                text-align: center;
-            }}
-            
-            .category {{
-                margin-bottom: 2rem;
-            }}
-            
-            .category h3 {{
-                color: #58a6ff;
-                font-size: 1.1rem;
-                margin-bottom: 0.75rem;
-                padding-bottom: 0.5rem;
-                border-bottom: 1px solid #30363d;
-            }}
-            
-            .engines {{
-                display: flex;
-                flex-wrap: wrap;
-                gap: 0.5rem;
-            }}
-            
-            .engine {{
-                background: #21262d;
-                color: #e6edf3;
-                padding: 0.4rem 0.8rem;
-                border-radius: 6px;
-                font-size: 0.85rem;
-                border: 1px solid #30363d;
-                transition: all 0.2s ease;
-            }}
-            
-            .engine:hover {{
-                background: #30363d;
-                border-color: #58a6ff;
-            }}
-            
-            .footer {{
-                text-align: center;
-                padding: 2rem;
-                color: #8b949e;
-                border-top: 1px solid #30363d;
-            }}
-            
-            .api-link {{
-                color: #58a6ff;
-                text-decoration: none;
-                font-weight: 500;
-            }}
-            
-            .api-link:hover {{
-                text-decoration: underline;
-            }}
-            
-            @media (max-width: 768px) {{
-                .hero-title {{
-                    font-size: 2rem;
-                }}
-                
-                .main-container {{
-                    padding: 1rem;
-                }}
-                
-                .search-actions {{
-                    justify-content: center;
-                }}
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <div class="logo">
-                <div class="logo-icon">🚀</div>
-                <span>GitGod.ai</span>
-            </div>
-            <a href="/docs" class="api-link">API Docs</a>
-        </div>
+        async for chunk in response.aiter_bytes():
+            received.append(chunk)
+            if extractor is None:
+                continue
+            pending.append(chunk)
+            pending_bytes += len(chunk)
+            if pending_bytes >= STREAM_PARSE_CHUNK:
+                try:
+                    waited, took, early_stop = await parse_executor.run_on_lane(lane, extractor.feed, b"".join(pending))
+                    queue_wait += waited
+                    parse_time += took
+                    interleaved += waited + took
+                except Exception:
+                    extractor = None
+                pending = []
+                pending_bytes = 0
+                if early_stop:
+                    break
         
-        <div class="main-container">
-            <div class="hero-section">
-                <h1 class="hero-title">GitGod.ai</h1>
-                <p class="hero-subtitle">AI-Powered Multi-Engine Search Platform</p>
-            </div>
-            
-            <div class="search-container">
-                <div class="search-box">
-                    <input type="text" class="search-input" placeholder="Search across 26+ engines instantly..." id="searchInput">
-                    <div class="search-actions">
-                        <button class="search-btn" onclick="searchAll()">🚀 Search All Engines</button>
-                        <button class="search-btn secondary" onclick="searchGitHub()">🐙 GitHub</button>
-                        <button class="search-btn secondary" onclick="searchGoogle()">🔍 Google</button>
-                        <button class="search-btn secondary" onclick="searchYouTube()">📺 YouTube</button>
-                        <button class="search-btn secondary" onclick="searchAI()">🤖 AI Search</button>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="features-grid">
-                <div class="feature-card">
-                    <div class="feature-icon">⚡</div>
-                    <div class="feature-title">Lightning Fast</div>
-                    <div class="feature-desc">Search across 26+ engines simultaneously with optimized performance</div>
-                </div>
-                <div class="feature-card">
-                    <div class="feature-icon">🎯</div>
-                    <div class="feature-title">Smart Categories</div>
-                    <div class="feature-desc">AI, Development, Social, and Education engines organized intelligently</div>
-                </div>
-                <div class="feature-card">
-                    <div class="feature-icon">🔗</div>
-                    <div class="feature-title">Browser Integration</div>
-                    <div class="feature-desc">Add as custom search engine in Chrome, Firefox, and Safari</div>
-                </div>
-                <div class="feature-card">
-                    <div class="feature-icon">🛠️</div>
-                    <div class="feature-title">Developer API</div>
-                    <div class="feature-desc">RESTful API with JSON responses for seamless integration</div>
-                </div>
-            </div>
-            
-            <div class="engines-section">
-                <h2 class="engines-title">🔍 Available Search Engines</h2>
+        if extractor is not None and not early_stop:
+            try:
+                if pending:
+                    waited, took, _ = await parse_executor.run_on_lane(lane, extractor.feed, b"".join(pending))
+                    queue_wait += waited
+                    parse_time += took
+                waited, took, _ = await parse_executor.run_on_lane(lane, extractor.close)
+                queue_wait += waited
+                parse_time += took
+            except Exception:
+                extractor = None
+        if extractor is None:
+            body = b"".join(received)
+        else:
+            # Parsed: only the head that previews show is kept
+            head = bytearray()
+            for chunk in received:
+                head += chunk[:HEAD_BYTES - len(head)]
+                if len(head) >= HEAD_BYTES:
+                    break
+            body = bytes(head)
+        received = pending = None
+        UPSTREAM_BYTES.inc(engine, amount=response.num_bytes_downloaded)
+        result = SearchResult(engine, url, response.status_code, body, encoding=response_encoding(response))
+        if extractor is not None:
+            parse_executor.record_streamed(engine, queue_wait, parse_time, early_stop)
+            trace = current_trace.get()
+            if trace is not None:
+                # Steps taken mid-body fall inside the download span; count them only as parse
+                # As for a buffered parse, the span includes the wait for the executor
+                trace.add("parse", queue_wait + parse_time, engine)
+                trace.add("download", -interleaved, engine)
+            result.parsed_results = extractor.results
+            return result
+    
+    # The incremental parser failed: parse the whole page as a buffered fetch would, with its bs4 fallback
+    parse_executor.record_stream_fallback(engine)
+    await result.parse_results()
+    return result
+
+async def fetch_head(engine: str, url: str) -> SearchResult:
+    """Download a page for its preview: the rest is read off the connection and dropped"""
+    async with engine_pool.stream(engine, url, timeout=FETCH_TIMEOUT) as response:
+        rate_limiter.record(engine, response.status_code, response.headers.get("retry-after"))
+        head = bytearray()
+        # Reading to the end keeps the connection reusable
+        async for chunk in response.aiter_bytes():
+            if len(head) < HEAD_BYTES:
+                head += chunk[:HEAD_BYTES - len(head)]
+        UPSTREAM_BYTES.inc(engine, amount=response.num_bytes_downloaded)
+        return SearchResult(engine, url, response.status_code, bytes(head), encoding=response_encoding(response))
+
+async def fetch_upstream(engine: str, query: str, parse: bool = True, hedge: bool = False) -> SearchResult:
+    """Fetch (and optionally parse) a results page straight from the engine.
+
+    A ``hedge`` request started late, so its latency is left out of the
+    engine's hedging histogram (``fetch_hedged`` accounts for it).
     """
+    url = engine_url(engine, query)
+    breaker = circuit_breakers.get(engine)
+    if not breaker.allow():
+        return SearchResult(engine, url, 0, error=f"Circuit open: {engine} is failing, skipped (retry in {breaker.retry_in():.0f}s)")
+    streamed = parse and STREAMING_PARSE and has_extractor(engine)
     
-    for category, engines in ENGINE_CATEGORIES.items():
-        html_content += f"""
-                <div class="category">
-                    <h3>{category}</h3>
-                    <div class="engines">
-        """
-        for engine in engines:
-            html_content += f'<span class="engine">{engine}</span>'
-        html_content += "</div></div>"
+    try:
+        async with rate_limiter.slot(engine):
+            started = time.perf_counter()
+            try:
+                if streamed:
+                    result = await fetch_streaming_parse(engine, url)
+                elif not parse:
+                    result = await fetch_head(engine, url)
+                else:
+                    response = await engine_pool.get(engine, url, timeout=FETCH_TIMEOUT)
+                    rate_limiter.record(engine, response.status_code, response.headers.get("retry-after"))
+                    UPSTREAM_BYTES.inc(engine, amount=response.num_bytes_downloaded)
+                    result = SearchResult(engine, url, response.status_code, response.content, encoding=response_encoding(response))
+            except httpx.TimeoutException:
+                UPSTREAM_TIMEOUTS.inc(engine)
+                result = SearchResult(engine, url, 0, error="Request timeout")
+            except Exception as e:
+                result = SearchResult(engine, url, 0, error=str(e))
+            elapsed = time.perf_counter() - started
+            UPSTREAM_DURATION.observe(elapsed, engine)
+            UPSTREAM_RESPONSES.inc(engine, str(result.status_code))
+            breaker.record(result.status_code, elapsed)
+            if result.status_code == 200 and not result.error and not hedge:
+                hedger.record(engine, elapsed)
+    except RateLimited as e:
+        # Throttled here, not by the engine: a half-open circuit learned nothing
+        breaker.release_probe()
+        return SearchResult(engine, url, 429, error=str(e))
     
-    html_content += """
-            </div>
-        </div>
+    if parse and not streamed:
+        await result.parse_results()
+    result.release()
+    return result
+
+async def fetch_hedged(engine: str, query: str, parse: bool = True) -> SearchResult:
+    """Upstream fetch that sends a second request once it is slower than the engine's p90.
+
+    The first good response wins and the other request is cancelled.
+    """
+    delay = hedger.hedge_delay(engine)
+    started = time.perf_counter()
+    primary = asyncio.ensure_future(fetch_upstream(engine, query, parse))
+    hedge = None
+    winner = None
+    # Cancelling the caller must cancel the requests too: asyncio.wait does not
+    try:
+        if delay is None:
+            return await primary
         
-        <div class="footer">
-            <p>Powered by GitGod.ai • <a href="/docs" class="api-link">API Documentation</a> • <a href="/opensearch.xml" class="api-link">OpenSearch</a></p>
-        </div>
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or circuit_breakers.get(engine).state != CLOSED or not hedger.try_start(engine):
+            return await primary
         
-        <script>
-            function getSearchQuery() {
-                const input = document.getElementById('searchInput');
-                const query = input.value.trim();
-                if (!query) {
-                    alert('Please enter a search query');
-                    return null;
-                }
-                return encodeURIComponent(query);
-            }
-            
-            function searchAll() {
-                const query = getSearchQuery();
-                if (query) {
-                    window.open(`/unified-search?q=${query}`, '_blank');
-                }
-            }
-            
-            function searchGitHub() {
-                const query = getSearchQuery();
-                if (query) {
-                    window.open(`/browser-search?q=${query}&engine=gh&redirect=true`, '_blank');
-                }
-            }
-            
-            function searchGoogle() {
-                const query = getSearchQuery();
-                if (query) {
-                    window.open(`/browser-search?q=${query}&engine=gg&redirect=true`, '_blank');
-                }
-            }
-            
-            function searchYouTube() {
-                const query = getSearchQuery();
-                if (query) {
-                    window.open(`/browser-search?q=${query}&engine=yt&redirect=true`, '_blank');
-                }
-            }
-            
-            function searchAI() {
-                const query = getSearchQuery();
-                if (query) {
-                    window.open(`/multi-search?q=${query}&engines=p,you,andi,felo&parse=true`, '_blank');
-                }
-            }
-            
-            // Enter key support
-            document.getElementById('searchInput').addEventListener('keypress', function(e) {
-                if (e.key === 'Enter') {
-                    searchAll();
-                }
-            });
-            
-            // Focus search input on page load
-            document.addEventListener('DOMContentLoaded', function() {
-                document.getElementById('searchInput').focus();
-            });
-        </script>
-    </body>
-    </html>
-    """
+        hedge = asyncio.ensure_future(fetch_upstream(engine, query, parse, hedge=True))
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                # An error only wins if the other request has failed as well
+                if winner is None and (result.status_code == 200 and not result.error or not pending):
+                    winner = task
+            if winner is not None:
+                break
+        return winner.result()
+    finally:
+        primary.cancel()
+        if hedge is not None:
+            hedge.cancel()
+            hedger.finish(engine, hedge_won=winner is hedge)
+            if winner is hedge:
+                # The cancelled primary never reports its latency; record how long it
+                # had been outstanding so the tail stays in the histogram
+                hedger.record(engine, time.perf_counter() - started)
+
+async def fetch_and_store(key: str, engine: str, query: str, parse: bool) -> SearchResult:
+    """Fetch from upstream and cache the result if it is worth keeping"""
+    result = await fetch_hedged(engine, query, parse)
+    if result.status_code == 200 and not result.error:
+        await result_cache.set(key, engine, result.to_cache())
+        if result.parsed_results:
+            local_index.add(engine, result.url, result.parsed_results)
+    return result
+
+async def fetch_across_workers(key: str, engine: str, query: str, parse: bool) -> SearchResult:
+    """``fetch_and_store``, unless another worker is fetching ``key``: then wait for its result"""
+    if shared_state is None:
+        return await fetch_and_store(key, engine, query, parse)
+    
+    # Past this point the other worker's lease has expired anyway
+    wait_until = time.monotonic() + FETCH_TIMEOUT * 2
+    waited = False
+    while not await asyncio.to_thread(shared_state.try_lease, key, FETCH_TIMEOUT * 2):
+        if not waited:
+            shared_state.counters["waits"] += 1
+            waited = True
+        await asyncio.sleep(SHARED_FLIGHT_POLL)
+        cached = await result_cache.get_shared(key)
+        if cached is not None:
+            shared_state.counters["shared_hits"] += 1
+            return SearchResult.from_cache(engine, cached)
+        if time.monotonic() > wait_until:
+            shared_state.counters["wait_timeouts"] += 1
+            break
     
-    return HTMLResponse(content=html_content)
+    try:
+        # The previous holder may have stored the result just before letting go
+        cached = await result_cache.get_shared(key) if waited else None
+        if cached is not None:
+            shared_state.counters["shared_hits"] += 1
+            return SearchResult.from_cache(engine, cached)
+        return await fetch_and_store(key, engine, query, parse)
+    finally:
+        await asyncio.to_thread(shared_state.release, key)
+
+def fetch_shared(key: str, engine: str, query: str, parse: bool):
+    """Fetch through the single-flight layer so concurrent misses share one request"""
+    return single_flight.do(key, lambda: fetch_across_workers(key, engine, query, parse))
+
+def refresh_in_background(key: str, engine: str, query: str, parse: bool):
+    """Revalidate a stale cache entry without making the caller wait"""
+    if key in single_flight:
+        return
+    task = asyncio.create_task(fetch_shared(key, engine, query, parse))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+async def fetch_search_result(engine: str, query: str, parse: bool = True) -> SearchResult:
+    """Fetch search results from a single engine"""
+    if engine not in ENGINES:
+        return SearchResult(engine, "", 0, error="Unknown engine shortcut")
+    
+    # Pages no extractor understands cannot yield results, so don't fetch them
+    if parse and not has_extractor(engine):
+        url = engine_url(engine, query)
+        return SearchResult(engine, url, 0, error="No result extractor for this engine; fetch skipped")
+    
+    key = make_key(engine, query, parse)
+    state, cached = await result_cache.get(key)
+    if state == STALE:
+        refresh_in_background(key, engine, query, parse)
+    if state in (FRESH, STALE):
+        return SearchResult.from_cache(engine, cached)
+    
+    return await fetch_shared(key, engine, query, parse)
+
+@app.get("/")
+async def root(request: Request):
+    """Root endpoint with GitGod.ai interface"""
+    return HOME_PAGE.response(request)
 
 @app.get("/search")
 async def single_search(
     q: str = Query(..., description="Your search query"),
     engine: str = Query(..., description="Engine shortcut (e.g., 'gh', 'gg', 'you')"),
-    parse: bool = Query(False, description="Whether to parse and extract structured results")
+    parse: bool = Query(False, description="Whether to parse and extract structured results"),
+    debug: bool = Query(False, description="Include a per-phase timing breakdown (also sent as Server-Timing)"),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields to keep (e.g. 'results'); query and engine are always kept")
 ):
     """Search using a single engine"""
-    async with httpx.AsyncClient() as client:
-        result = await fetch_search_result(client, engine, q)
+    selected = selected_fields(fields, SEARCH_RESPONSE_SELECTABLE)
+    if engine in ENGINES:
+        suggestion_index.record(q)
+    result = await fetch_search_result(engine, q, parse)
+    
+    response = SearchResponse(
+        query=q,
+        engine=result.engine,
+        url=result.url,
+        status_code=result.status_code,
+        error=result.error if result.error else None
+    )
+    
+    if parse and result.parsed_results:
+        response.results = result.parsed_results
+    elif not parse and wants(selected, "content"):
+        response.content = result.preview(1000)
+    
+    if debug:
+        response.trace = trace_data()
+    return JSONBytesResponse(response, selected)
+
+# Streaming formats supported by /multi-search and /category-search
+STREAM_MEDIA_TYPES = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson"
+}
+
+def selected_fields(fields: Optional[str], selectable: FrozenSet[str]) -> Optional[FrozenSet[str]]:
+    """The ``fields=`` parameter as a set of names, or None for every field"""
+    try:
+        return parse_fields(fields, selectable)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def multi_result_data(result: SearchResult, parse: bool, merge: bool = False, fields: Optional[FrozenSet[str]] = None) -> EngineResult:
+    """Per-engine entry of a multi-search response; with ``merge`` the results go in the merged list instead"""
+    result_data = EngineResult(
+        engine=result.engine,
+        url=result.url,
+        status_code=result.status_code,
+        error=result.error if result.error else None
+    )
+    
+    if merge:
+        result_data.result_count = len(result.parsed_results)
+    elif parse and result.parsed_results:
+        result_data.parsed_results = result.parsed_results
+    elif not parse and wants(fields, "content_preview"):
+        result_data.content_preview = result.preview(500)
+    
+    return result_data
+
+def merged_results(results: List[SearchResult]) -> List[Dict[str, Any]]:
+    """Every engine's parsed results as one deduplicated list, ranked by reciprocal rank fusion"""
+    return merge_results([(result.engine, result.url, result.parsed_results) for result in results if result.parsed_results])
+
+def stream_frame(event: str, data: Dict[str, Any], fmt: str) -> bytes:
+    """Encode one frame as a Server-Sent Event or an NDJSON line"""
+    if fmt == "sse":
+        return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+    return dumps({"event": event, **data}) + b"\n"
+
+def trace_data() -> Optional[Dict[str, Any]]:
+    """The request's phase timings, for debug=true"""
+    trace = current_trace.get()
+    return trace.to_dict() if trace is not None else None
+
+def attach_trace(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the request's phase timings to a response dict, for debug=true"""
+    trace = trace_data()
+    if trace is not None:
+        data["trace"] = trace
+    return data
+
+def timed_out_data(engine: str, q: str) -> EngineResult:
+    """Placeholder entry for an engine that missed the request deadline"""
+    return EngineResult(engine=engine, url=engine_url(engine, q), status_code=0, status="timed_out")
+
+async def stream_multi_search(q: str, engine_list: List[str], parse: bool, fmt: str, deadline_ms: Optional[int] = None, debug: bool = False, merge: bool = False, fields: Optional[FrozenSet[str]] = None):
+    """Yield each engine's result as soon as it completes, then a summary frame (with the merged list for ``merge``)"""
+    started = time.perf_counter()
+    deadline = started + deadline_ms / 1000 if deadline_ms else None
+    tasks = {asyncio.ensure_future(fetch_search_result(engine, q, parse)): engine for engine in engine_list}
+    pending = set(tasks)
+    completed = []
+    errors = []
+    finished = []
+    
+    try:
+        while pending:
+            timeout = None if deadline is None else max(deadline - time.perf_counter(), 0)
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                result = task.result()
+                completed.append(result.engine)
+                finished.append(result)
+                if result.error:
+                    errors.append(result.engine)
+                data = multi_result_data(result, parse, fields=fields)
+                if deadline is not None:
+                    data.status = "complete"
+                data.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+                yield stream_frame("result", data.to_dict(fields), fmt)
         
-        response_data = {
+        timed_out = [engine for task, engine in tasks.items() if task in pending]
+        for engine in timed_out:
+            yield stream_frame("result", timed_out_data(engine, q).to_dict(fields), fmt)
+        
+        summary = {
             "query": q,
-            "engine": result.engine,
-            "url": result.url,
-            "status_code": result.status_code,
-            "error": result.error if result.error else None
+            "engines": engine_list,
+            "completed": completed,
+            "errors": errors,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
         }
-        
-        if parse and result.parsed_results:
-            response_data["results"] = result.parsed_results
-        elif not parse:
-            response_data["content"] = result.content[:1000] + "..." if len(result.content) > 1000 else result.content
-        
-        return response_data
+        if deadline is not None:
+            summary["deadline_ms"] = deadline_ms
+            summary["timed_out"] = timed_out
+            summary["partial"] = bool(timed_out)
+        if merge:
+            # Engine order, not completion order, so ties rank the same as without streaming
+            order = {engine: index for index, engine in enumerate(engine_list)}
+            finished.sort(key=lambda result: order[result.engine])
+            summary["merged"] = merged_results(finished)
+        if debug:
+            attach_trace(summary)
+        yield stream_frame("summary", summary, fmt)
+    finally:
+        # Past the deadline, or the client went away mid-stream: stop waiting
+        # on the remaining engines
+        for task in tasks:
+            task.cancel()
+
+async def gather_with_deadline(q: str, engine_list: List[str], parse: bool, deadline_ms: int) -> List[Optional[SearchResult]]:
+    """Fetch every engine but give up on those still running after ``deadline_ms``.
+
+    Engines that miss the deadline come back as ``None``. Only our wait is
+    cancelled: the shared upstream fetch keeps running and warms the cache.
+    """
+    tasks = [asyncio.ensure_future(fetch_search_result(engine, q, parse)) for engine in engine_list]
+    done, pending = await asyncio.wait(tasks, timeout=deadline_ms / 1000)
+    for task in pending:
+        task.cancel()
+    return [task.result() if task in done else None for task in tasks]
 
 @app.get("/multi-search")
 async def multi_search(
     q: str = Query(..., description="Your search query"),
     engines: str = Query(..., description="Comma-separated engine shortcuts (e.g., 'gh,gg,you')"),
-    parse: bool = Query(False, description="Whether to parse and extract structured results")
+    parse: bool = Query(False, description="Whether to parse and extract structured results"),
+    stream: Optional[str] = Query(None, description="Stream each engine's result as it completes: 'sse' or 'ndjson'"),
+    deadline_ms: Optional[int] = Query(None, ge=1, description="Latency budget; engines still running when it expires are reported as timed_out"),
+    debug: bool = Query(False, description="Include a per-phase timing breakdown (also sent as Server-Timing)"),
+    merge: bool = Query(False, description="Return one deduplicated list ranked across engines (implies parse)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to keep in each engine entry (e.g. 'status_code,parsed_results'); engine is always kept")
 ):
     """Search across multiple engines simultaneously"""
     engine_list = [engine.strip() for engine in engines.split(",")]
+    parse = parse or merge
+    selected = selected_fields(fields, ENGINE_RESULT_SELECTABLE)
     
     # Validate engines
-    invalid_engines = [engine for engine in engine_list if engine not in SEARCH_ENGINES]
+    invalid_engines = [engine for engine in engine_list if engine not in ENGINES]
     if invalid_engines:
         raise HTTPException(status_code=400, detail=f"Invalid engines: {invalid_engines}")
     
-    async with httpx.AsyncClient() as client:
-        tasks = [fetch_search_result(client, engine, q) for engine in engine_list]
-        results = await asyncio.gather(*tasks)
-        
-        response_data = {
-            "query": q,
-            "engines": engine_list,
-            "results": []
-        }
-        
-        for result in results:
-            result_data = {
-                "engine": result.engine,
-                "url": result.url,
-                "status_code": result.status_code,
-                "error": result.error if result.error else None
-            }
-            
-            if parse and result.parsed_results:
-                result_data["parsed_results"] = result.parsed_results
-            elif not parse:
-                result_data["content_preview"] = result.content[:500] + "..." if len(result.content) > 500 else result.content
-            
-            response_data["results"].append(result_data)
-        
-        return response_data
+    if stream is not None and stream not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Invalid stream format. Available: {list(STREAM_MEDIA_TYPES)}")
+    
+    suggestion_index.record(q)
+    
+    if stream:
+        return StreamingResponse(
+            stream_multi_search(q, engine_list, parse, stream, deadline_ms, debug, merge, selected),
+            media_type=STREAM_MEDIA_TYPES[stream],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    if deadline_ms is not None:
+        results = await gather_with_deadline(q, engine_list, parse, deadline_ms)
+        timed_out = [engine for engine, result in zip(engine_list, results) if result is None]
+        response = MultiSearchResponse(
+            query=q,
+            engines=engine_list,
+            deadline_ms=deadline_ms,
+            partial=bool(timed_out),
+            timed_out=timed_out
+        )
+        for engine, result in zip(engine_list, results):
+            if result is None:
+                response.results.append(timed_out_data(engine, q))
+            else:
+                result_data = multi_result_data(result, parse, merge, selected)
+                result_data.status = "complete"
+                response.results.append(result_data)
+        if merge:
+            response.merged = merged_results([result for result in results if result is not None])
+        if debug:
+            response.trace = trace_data()
+        return JSONBytesResponse(response, selected)
+    
+    tasks = [fetch_search_result(engine, q, parse) for engine in engine_list]
+    results = await asyncio.gather(*tasks)
+    
+    response = MultiSearchResponse(
+        query=q,
+        engines=engine_list,
+        results=[multi_result_data(result, parse, merge, selected) for result in results]
+    )
+    if merge:
+        response.merged = merged_results(results)
+    
+    if debug:
+        response.trace = trace_data()
+    return JSONBytesResponse(response, selected)
 
 @app.get("/category-search")
 async def category_search(
     q: str = Query(..., description="Your search query"),
     category: str = Query(..., description="Engine category (e.g., 'AI Search', 'Development')"),
-    parse: bool = Query(False, description="Whether to parse and extract structured results")
+    parse: bool = Query(False, description="Whether to parse and extract structured results"),
+    stream: Optional[str] = Query(None, description="Stream each engine's result as it completes: 'sse' or 'ndjson'"),
+    deadline_ms: Optional[int] = Query(None, ge=1, description="Latency budget; engines still running when it expires are reported as timed_out"),
+    debug: bool = Query(False, description="Include a per-phase timing breakdown (also sent as Server-Timing)"),
+    merge: bool = Query(False, description="Return one deduplicated list ranked across engines (implies parse)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to keep in each engine entry (e.g. 'status_code,parsed_results'); engine is always kept")
 ):
     """Search across all engines in a specific category"""
     if category not in ENGINE_CATEGORIES:
@@ -621,292 +726,123 @@ async def category_search(
     engines = ENGINE_CATEGORIES[category]
     engines_str = ",".join(engines)
     
-    return await multi_search(q=q, engines=engines_str, parse=parse)
+    return await multi_search(q=q, engines=engines_str, parse=parse, stream=stream, deadline_ms=deadline_ms, debug=debug, merge=merge, fields=fields)
 
-@app.get("/engines")
-async def list_engines():
-    """List all available search engines and categories"""
+class BatchSearchGroup(BaseModel):
+    """Every query in ``queries`` against every engine in ``engines`` (or in ``category``)"""
+    queries: List[str]
+    engines: Optional[List[str]] = None
+    category: Optional[str] = None
+
+class BatchSearchRequest(BaseModel):
+    searches: List[BatchSearchGroup]
+    parse: bool = False
+
+def batch_fetches(batch: BatchSearchRequest) -> List[Tuple[str, str]]:
+    """Expand a batch into its (query, engine) pairs, rejecting invalid ones up front"""
+    fetches = []
+    for group in batch.searches:
+        if (group.engines is None) == (group.category is None):
+            raise HTTPException(status_code=400, detail="Each search needs either engines or category")
+        if group.category is not None:
+            if group.category not in ENGINE_CATEGORIES:
+                raise HTTPException(status_code=400, detail=f"Invalid category. Available: {list(ENGINE_CATEGORIES.keys())}")
+            engine_list = ENGINE_CATEGORIES[group.category]
+        else:
+            engine_list = [engine.strip() for engine in group.engines]
+            invalid_engines = [engine for engine in engine_list if engine not in ENGINES]
+            if invalid_engines:
+                raise HTTPException(status_code=400, detail=f"Invalid engines: {invalid_engines}")
+        fetches.extend((query, engine) for query in group.queries for engine in engine_list)
+        if len(fetches) > BATCH_MAX_FETCHES:
+            raise HTTPException(status_code=413, detail=f"Batch too large: at most {BATCH_MAX_FETCHES} query/engine pairs")
+    if not fetches:
+        raise HTTPException(status_code=400, detail="Batch contains no queries")
+    return fetches
+
+async def stream_batch_search(fetches: List[Tuple[str, str]], parse: bool):
+    """Yield one NDJSON frame per (query, engine) in completion order, then a summary.
+
+    Only ``BATCH_MAX_CONCURRENCY`` fetches are started at a time, and each
+    holds one of the slots shared by all batches while it runs.
+    """
+    started = time.perf_counter()
+    remaining = iter(fetches)
+    pending = set()
+    completed = 0
+    errors = 0
+    
+    async def run_fetch(query: str, engine: str) -> Tuple[str, SearchResult]:
+        async with batch_slots:
+            return query, await fetch_search_result(engine, query, parse)
+    
+    def start_more():
+        for query, engine in remaining:
+            pending.add(asyncio.ensure_future(run_fetch(query, engine)))
+            if len(pending) >= BATCH_MAX_CONCURRENCY:
+                return
+    
+    try:
+        start_more()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+            start_more()
+            for task in done:
+                query, result = task.result()
+                completed += 1
+                if result.error:
+                    errors += 1
+                data = {"query": query, **multi_result_data(result, parse).to_dict()}
+                data["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                yield stream_frame("result", data, "ndjson")
+        
+        yield stream_frame("summary", {
+            "fetches": len(fetches),
+            "completed": completed,
+            "errors": errors,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }, "ndjson")
+    finally:
+        # The client went away mid-stream: drop the fetches not yet reported
+        for task in pending:
+            task.cancel()
+
+@app.post("/batch-search")
+async def batch_search(batch: BatchSearchRequest):
+    """Run many queries against many engines, streaming results as NDJSON as they complete"""
+    fetches = batch_fetches(batch)
+    return StreamingResponse(
+        stream_batch_search(fetches, batch.parse),
+        media_type=STREAM_MEDIA_TYPES["ndjson"],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def engines_listing() -> Dict[str, Any]:
     return {
         "engines": SEARCH_ENGINES,
         "categories": ENGINE_CATEGORIES,
+        "extractors": {engine: extractor.version for engine, extractor in sorted(EXTRACTORS.items())},
         "total_engines": len(SEARCH_ENGINES)
     }
 
+# The static part of the listing, built once
+ENGINES_LISTING = engines_listing()
+
+@app.get("/engines")
+async def list_engines(request: Request):
+    """List all available search engines and categories, with each engine's health"""
+    listing = {**ENGINES_LISTING, "health": circuit_breakers.stats()}
+    body = dumps(listing)
+    return conditional_response(request, body, "application/json")
+
 @app.get("/unified-search")
 async def unified_search(
     q: str = Query(..., description="Search query for unified results page")
 ):
     """Unified search results page displaying all engines in one place"""
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>GitGod.ai - Unified Search Results for "{q}"</title>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <style>
-            * {{
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }}
-            
-            body {{
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', sans-serif;
-                background: #0d1117;
-                color: #e6edf3;
-                min-height: 100vh;
-                padding: 2rem;
-                line-height: 1.6;
-            }}
-            
-            .header {{
-                display: flex;
-                align-items: center;
-                justify-content: space-between;
-                margin-bottom: 2rem;
-                padding-bottom: 1rem;
-                border-bottom: 1px solid #30363d;
-            }}
-            
-            .logo {{
-                display: flex;
-                align-items: center;
-                gap: 0.5rem;
-                font-size: 1.5rem;
-                font-weight: 600;
-                color: #58a6ff;
-            }}
-            
-            .logo-icon {{
-                width: 32px;
-                height: 32px;
-                background: linear-gradient(135deg, #58a6ff, #7c3aed);
-                border-radius: 8px;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                font-size: 1.2rem;
-            }}
-            
-            .back-btn {{
-                background: #21262d;
-                color: #e6edf3;
-                border: 1px solid #30363d;
-                padding: 0.5rem 1rem;
-                border-radius: 6px;
-                text-decoration: none;
-                font-size: 0.9rem;
-                transition: all 0.2s ease;
-            }}
-            
-            .back-btn:hover {{
-                background: #30363d;
-                border-color: #58a6ff;
-            }}
-            
-            .container {{
-                max-width: 1200px;
-                margin: 0 auto;
-            }}
-            
-            .search-header {{
-                text-align: center;
-                margin-bottom: 2rem;
-            }}
-            
-            .search-title {{
-                font-size: 2.5rem;
-                font-weight: 700;
-                background: linear-gradient(135deg, #58a6ff, #7c3aed, #f78166);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-                background-clip: text;
-                margin-bottom: 0.5rem;
-            }}
-            
-            .search-query {{
-                font-size: 1.2rem;
-                color: #8b949e;
-                margin-bottom: 1.5rem;
-            }}
-            
-            .category {{
-                margin: 3rem 0;
-            }}
-            
-            .category-title {{
-                font-size: 1.5rem;
-                font-weight: 600;
-                color: #58a6ff;
-                margin-bottom: 1.5rem;
-                padding-bottom: 0.5rem;
-                border-bottom: 2px solid #30363d;
-                display: flex;
-                align-items: center;
-                gap: 0.5rem;
-            }}
-            
-            .search-grid {{
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(350px, 1fr));
-                gap: 1.5rem;
-            }}
-            
-            .search-card {{
-                background: #161b22;
-                border: 1px solid #30363d;
-                border-radius: 12px;
-                padding: 1.5rem;
-                transition: all 0.3s ease;
-                position: relative;
-                overflow: hidden;
-            }}
-            
-            .search-card::before {{
-                content: '';
-                position: absolute;
-                top: 0;
-                left: 0;
-                right: 0;
-                height: 3px;
-                background: linear-gradient(90deg, #58a6ff, #7c3aed);
-                opacity: 0;
-                transition: opacity 0.3s ease;
-            }}
-            
-            .search-card:hover {{
-                border-color: #58a6ff;
-                transform: translateY(-4px);
-                box-shadow: 0 12px 32px rgba(0, 0, 0, 0.4);
-            }}
-            
-            .search-card:hover::before {{
-                opacity: 1;
-            }}
-            
-            .engine-header {{
-                display: flex;
-                align-items: center;
-                justify-content: space-between;
-                margin-bottom: 1rem;
-            }}
-            
-            .engine-name {{
-                font-weight: 600;
-                color: #e6edf3;
-                font-size: 1.1rem;
-            }}
-            
-            .engine-icon {{
-                font-size: 1.5rem;
-            }}
-            
-            .search-link {{
-                display: inline-block;
-                background: #238636;
-                color: white;
-                text-decoration: none;
-                padding: 0.75rem 1.5rem;
-                border-radius: 8px;
-                font-weight: 500;
-                transition: all 0.2s ease;
-                width: 100%;
-                text-align: center;
-            }}
-            
-            .search-link:hover {{
-                background: #2ea043;
-                transform: translateY(-1px);
-                box-shadow: 0 4px 12px rgba(46, 160, 67, 0.3);
-            }}
-            
-            .category-icons {{
-                'AI Search': '🤖',
-                'Development': '💻',
-                'Social & Entertainment': '🎭',
-                'Education': '📚'
-            }}
-            
-            @media (max-width: 768px) {{
-                body {{
-                    padding: 1rem;
-                }}
-                
-                .search-title {{
-                    font-size: 2rem;
-                }}
-                
-                .search-grid {{
-                    grid-template-columns: 1fr;
-                }}
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <div class="logo">
-                <div class="logo-icon">🚀</div>
-                <span>GitGod.ai</span>
-            </div>
-            <a href="/" class="back-btn">← Back to Home</a>
-        </div>
-        
-        <div class="container">
-            <div class="search-header">
-                <h1 class="search-title">Unified Search Results</h1>
-                <div class="search-query">Query: "{q}"</div>
-            </div>
-    """
-    
-    # Category icons mapping
-    category_icons = {
-        "AI Search": "🤖",
-        "Development": "💻", 
-        "Social & Entertainment": "🎭",
-        "Education": "📚"
-    }
-    
-    # Group by categories
-    for category, engines in ENGINE_CATEGORIES.items():
-        icon = category_icons.get(category, "🔍")
-        html_content += f'<div class="category"><div class="category-title">{icon} {category}</div><div class="search-grid">'
-        
-        for engine in engines:
-            if engine in SEARCH_ENGINES:
-                search_url = SEARCH_ENGINES[engine].format(quote_plus(q))
-                engine_name = get_engine_name(engine)
-                
-                # Engine-specific icons
-                engine_icons = {
-                    "gg": "🔍", "gh": "🐙", "yt": "📺", "x": "🐦",
-                    "p": "🔮", "you": "💭", "andi": "🤖", "felo": "🧠",
-                    "brave": "🦁", "ds": "🔬", "komo": "🌟", "ph": "💡",
-                    "pht": "🚀", "tf": "🎨", "gw": "✨", "mb": "📱",
-                    "v0": "⚡", "sp": "🎭", "ud": "🎓"
-                }
-                
-                engine_icon = engine_icons.get(engine, "🔗")
-                
-                html_content += f"""
-                <div class="search-card">
-                    <div class="engine-header">
-                        <div class="engine-name">{engine_name}</div>
-                        <div class="engine-icon">{engine_icon}</div>
-                    </div>
-                    <a href="{search_url}" target="_blank" class="search-link">Search on {engine_name}</a>
-                </div>
-                """
-        
-        html_content += '</div></div>'
-    
-    html_content += """
-        </div>
-    </body>
-    </html>
-    """
-    
-    return HTMLResponse(content=html_content)
+    suggestion_index.record(q)
+    return HTMLResponse(content=UNIFIED_PAGE.render(page_values(q)))
 
 @app.get("/browser-search")
 async def browser_search(
@@ -915,258 +851,17 @@ async def browser_search(
     redirect: bool = Query(False, description="Whether to redirect to single engine (only works with specific engine)")
 ):
     """Browser-compatible search endpoint for adding as custom search engine"""
+    suggestion_index.record(q)
     if engine == "all":
         # Search all engines and return aggregate results page
-        search_links = []
-        for eng_key, url_template in SEARCH_ENGINES.items():
-            search_url = url_template.format(quote_plus(q))
-            search_links.append({
-                "engine": eng_key,
-                "url": search_url,
-                "name": get_engine_name(eng_key)
-            })
-        
-        # Create HTML page with all search links
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>GitGod.ai - Search Results for "{q}"</title>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                * {{
-                    margin: 0;
-                    padding: 0;
-                    box-sizing: border-box;
-                }}
-                
-                body {{
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', sans-serif;
-                    background: #0d1117;
-                    color: #e6edf3;
-                    min-height: 100vh;
-                    padding: 2rem;
-                }}
-                
-                .header {{
-                    display: flex;
-                    align-items: center;
-                    justify-content: space-between;
-                    margin-bottom: 2rem;
-                    padding-bottom: 1rem;
-                    border-bottom: 1px solid #30363d;
-                }}
-                
-                .logo {{
-                    display: flex;
-                    align-items: center;
-                    gap: 0.5rem;
-                    font-size: 1.5rem;
-                    font-weight: 600;
-                    color: #58a6ff;
-                }}
-                
-                .logo-icon {{
-                    width: 32px;
-                    height: 32px;
-                    background: linear-gradient(135deg, #58a6ff, #7c3aed);
-                    border-radius: 8px;
-                    display: flex;
-                    align-items: center;
-                    justify-content: center;
-                    font-size: 1.2rem;
-                }}
-                
-                .back-btn {{
-                    background: #21262d;
-                    color: #e6edf3;
-                    border: 1px solid #30363d;
-                    padding: 0.5rem 1rem;
-                    border-radius: 6px;
-                    text-decoration: none;
-                    font-size: 0.9rem;
-                    transition: all 0.2s ease;
-                }}
-                
-                .back-btn:hover {{
-                    background: #30363d;
-                    border-color: #58a6ff;
-                }}
-                
-                .container {{
-                    max-width: 1200px;
-                    margin: 0 auto;
-                }}
-                
-                .search-header {{
-                    text-align: center;
-                    margin-bottom: 2rem;
-                }}
-                
-                .search-title {{
-                    font-size: 2rem;
-                    font-weight: 700;
-                    background: linear-gradient(135deg, #58a6ff, #7c3aed, #f78166);
-                    -webkit-background-clip: text;
-                    -webkit-text-fill-color: transparent;
-                    background-clip: text;
-                    margin-bottom: 0.5rem;
-                }}
-                
-                .search-query {{
-                    font-size: 1.2rem;
-                    color: #8b949e;
-                    margin-bottom: 1.5rem;
-                }}
-                
-                .open-all {{
-                    text-align: center;
-                    margin-bottom: 2rem;
-                }}
-                
-                .open-all button {{
-                    background: #238636;
-                    color: white;
-                    border: none;
-                    padding: 1rem 2rem;
-                    border-radius: 8px;
-                    font-size: 1rem;
-                    font-weight: 600;
-                    cursor: pointer;
-                    transition: all 0.2s ease;
-                }}
-                
-                .open-all button:hover {{
-                    background: #2ea043;
-                    transform: translateY(-1px);
-                    box-shadow: 0 4px 12px rgba(46, 160, 67, 0.3);
-                }}
-                
-                .category {{
-                    margin: 2rem 0;
-                }}
-                
-                .category-title {{
-                    font-size: 1.3rem;
-                    font-weight: 600;
-                    color: #58a6ff;
-                    margin-bottom: 1rem;
-                    padding-bottom: 0.5rem;
-                    border-bottom: 1px solid #30363d;
-                }}
-                
-                .search-grid {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(320px, 1fr));
-                    gap: 1rem;
-                }}
-                
-                .search-card {{
-                    background: #161b22;
-                    border: 1px solid #30363d;
-                    border-radius: 8px;
-                    padding: 1rem;
-                    transition: all 0.2s ease;
-                }}
-                
-                .search-card:hover {{
-                    border-color: #58a6ff;
-                    transform: translateY(-2px);
-                    box-shadow: 0 8px 24px rgba(0, 0, 0, 0.3);
-                }}
-                
-                .engine-name {{
-                    font-weight: 600;
-                    color: #e6edf3;
-                    margin-bottom: 0.5rem;
-                    font-size: 1rem;
-                }}
-                
-                .search-link {{
-                    color: #58a6ff;
-                    text-decoration: none;
-                    font-size: 0.85rem;
-                    word-break: break-all;
-                    line-height: 1.4;
-                }}
-                
-                .search-link:hover {{
-                    text-decoration: underline;
-                }}
-                
-                @media (max-width: 768px) {{
-                    body {{
-                        padding: 1rem;
-                    }}
-                    
-                    .search-title {{
-                        font-size: 1.5rem;
-                    }}
-                    
-                    .search-grid {{
-                        grid-template-columns: 1fr;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <div class="logo">
-                    <div class="logo-icon">🚀</div>
-                    <span>GitGod.ai</span>
-                </div>
-                <a href="/" class="back-btn">← Back to Home</a>
-            </div>
-            
-            <div class="container">
-                <div class="search-header">
-                    <h1 class="search-title">Search Results</h1>
-                    <div class="search-query">Query: "{q}"</div>
-                </div>
-                
-                <div class="open-all">
-                    <button onclick="openAllLinks()">🚀 Open All Search Results</button>
-                </div>
-        """
-        
-        # Group by categories
-        for category, engines in ENGINE_CATEGORIES.items():
-            html_content += f'<div class="category"><div class="category-title">{category}</div><div class="search-grid">'
-            for engine in engines:
-                if engine in SEARCH_ENGINES:
-                    search_url = SEARCH_ENGINES[engine].format(quote_plus(q))
-                    engine_name = get_engine_name(engine)
-                    html_content += f"""
-                    <div class="search-card">
-                        <div class="engine-name">{engine_name}</div>
-                        <a href="{search_url}" target="_blank" class="search-link">{search_url}</a>
-                    </div>
-                    """
-            html_content += '</div></div>'
-        
-        html_content += """
-                <script>
-                function openAllLinks() {
-                    const links = document.querySelectorAll('.search-link');
-                    links.forEach(link => {
-                        window.open(link.href, '_blank');
-                    });
-                }
-                </script>
-            </div>
-        </body>
-        </html>
-        """
-        
-        return HTMLResponse(content=html_content)
+        return HTMLResponse(content=BROWSER_PAGE.render(page_values(q)))
     
     else:
         # Single engine search
-        if engine not in SEARCH_ENGINES:
+        if engine not in ENGINES:
             engine = "gg"  # Default to Google if invalid engine
         
-        search_url = SEARCH_ENGINES[engine].format(quote_plus(q))
+        search_url = engine_url(engine, q)
         
         if redirect:
             from fastapi.responses import RedirectResponse
@@ -1174,36 +869,16 @@ async def browser_search(
         else:
             return {"query": q, "engine": engine, "redirect_url": search_url}
 
-def get_engine_name(engine_key: str) -> str:
-    """Get human-readable name for engine"""
-    engine_names = {
-        "andi": "Andi Search",
-        "brave": "Brave Search",
-        "ds": "DeepSeek",
-        "felo": "Felo AI",
-        "gg": "Google",
-        "komo": "Komo.ai",
-        "p": "Perplexity AI",
-        "ph": "Phind",
-        "you": "You.com",
-        "gh": "GitHub",
-        "pht": "Product Hunt",
-        "tf": "Taaft",
-        "gw": "Godly.website",
-        "mb": "Mobbin",
-        "v0": "v0.dev",
-        "sp": "Spline Community",
-
-        "x": "X.com (Twitter)",
-        "yt": "YouTube",
-        "ud": "Free Udemy"
-    }
-    return engine_names.get(engine_key, engine_key.upper())
+@app.get("/static/{name}")
+async def static_asset(name: str, request: Request):
+    """Versioned CSS/JS for the HTML pages, cacheable forever and revalidated by ETag"""
+    asset = ASSETS.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    
+    return asset.response(request, ASSET_CACHE_CONTROL)
 
-@app.get("/opensearch.xml")
-async def opensearch_descriptor():
-    """OpenSearch descriptor for browser integration"""
-    xml_content = f"""
+OPENSEARCH_XML = Precompressed(f"""
 <?xml version="1.0" encoding="UTF-8"?>
 <OpenSearchDescription xmlns="http://a9.com/-/spec/opensearch/1.1/">
     <ShortName>Aggregate Search</ShortName>
@@ -1214,15 +889,170 @@ async def opensearch_descriptor():
     <Url type="application/x-suggestions+json" template="http://localhost:8001/suggestions?q={{searchTerms}}"/>
     <Image height="16" width="16" type="image/x-icon">data:image/x-icon;base64,AAABAAEAEBAAAAEAIABoBAAAFgAAACgAAAAQAAAAIAAAAAEAIAAAAAAAAAQAABILAAASCwAAAAAAAAAAAAD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///8A////AP///wD///wAAAAA</Image>
 </OpenSearchDescription>
-    """.strip()
-    
-    from fastapi.responses import Response
-    return Response(content=xml_content, media_type="application/opensearchdescription+xml")
+    """.strip().encode("utf-8"), "application/opensearchdescription+xml")
+
+@app.get("/opensearch.xml")
+async def opensearch_descriptor(request: Request):
+    """OpenSearch descriptor for browser integration"""
+    return OPENSEARCH_XML.response(request)
+
+@app.get("/local-search")
+async def local_search(
+    q: str = Query(..., description="Your search query"),
+    limit: int = Query(10, ge=1, le=100, description="Most results to return")
+):
+    """Search every result fetched so far, ranked by BM25, without contacting any engine"""
+    started = time.perf_counter()
+    results, total, exact = local_index.search(q, limit)
+    return {
+        "query": q,
+        "total_matches": total,
+        # "gte" when total_matches is only a lower bound (a very common term was not counted in full)
+        "total_matches_relation": "eq" if exact else "gte",
+        "indexed_documents": len(local_index.docs),
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+@app.get("/suggestions")
+async def suggestions(
+    q: str = Query("", description="What has been typed so far"),
+    limit: int = Query(8, ge=1, le=SUGGEST_MAX_LIMIT, description="Most completions to return")
+):
+    """OpenSearch completions for the browser search box, most searched first"""
+    body = dumps([q, suggestion_index.suggest(q, limit)])
+    # Browsers ask on every keystroke; a short max-age lets them reuse answers while editing
+    return Response(body, media_type="application/x-suggestions+json", headers={"Cache-Control": "max-age=60"})
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "engines_available": len(SEARCH_ENGINES)}
+    open_engines = circuit_breakers.open_engines()
+    return {
+        "status": "degraded" if open_engines else "healthy",
+        "engines_available": len(SEARCH_ENGINES) - len(open_engines),
+        "engines_open": open_engines,
+        "engines": {
+            engine: {key: health[key] for key in ("state", "success_rate", "p50_ms", "p95_ms")}
+            for engine, health in circuit_breakers.stats().items()
+        }
+    }
+
+@app.get("/pool-stats")
+async def pool_stats():
+    """Outbound connection pool statistics (open connections, reuse rate)"""
+    return engine_pool.stats()
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """Result cache hit/miss counters and sizes"""
+    return await result_cache.stats()
+
+@app.get("/parse-stats")
+async def parse_stats():
+    """Parse executor queue depth plus queue wait and parse time per engine"""
+    return parse_executor.stats()
+
+@app.get("/rate-limits")
+async def rate_limits():
+    """Current per-engine rate, in-flight count, queue depth and backoff"""
+    return rate_limiter.stats()
+
+@app.get("/suggestion-stats")
+async def suggestion_stats():
+    """Completion index size, lookups, searches recorded and the last save"""
+    return suggestion_index.stats()
+
+@app.get("/local-index-stats")
+async def local_index_stats():
+    """Documents, terms and postings held by the /local-search index"""
+    return local_index.stats()
+
+@app.get("/hedge-stats")
+async def hedge_stats():
+    """Per-engine latency quantiles, hedge thresholds and how often hedges won"""
+    return hedger.stats()
+
+def collect_runtime():
+    """Scrape-time gauges and counters read from the cache, pool and limiters"""
+    counters = result_cache.counters
+    yield "cache_lookups_total", "counter", "Result cache lookups by outcome", [
+        ({"result": name}, counters[name]) for name in ("memory_hits", "disk_hits", "stale_hits", "misses")
+    ]
+    yield "cache_stores_total", "counter", "Results written to the cache", [({}, counters["stores"])]
+    yield "cache_memory_bytes", "gauge", "Bytes held by the in-memory cache", [({}, result_cache.memory.bytes)]
+    yield "cache_memory_entries", "gauge", "Entries held by the in-memory cache", [({}, len(result_cache.memory))]
+    yield "cache_memory_evictions_total", "counter", "Entries evicted from the in-memory cache", [({}, result_cache.memory.evictions)]
+    if result_cache.disk is not None:
+        # Counted by the purges; the row count itself would block the scrape on SQLite
+        disk = result_cache.disk
+        yield "cache_disk_purged_total", "counter", "Entries deleted from the disk cache by reason", [
+            ({"reason": "expired"}, disk.expired), ({"reason": "evicted"}, disk.evictions)
+        ]
+    
+    hosts = engine_pool.stats()["hosts"]
+    yield "pool_open_connections", "gauge", "Open upstream connections per host", [
+        ({"host": host}, stats["open_connections"]) for host, stats in hosts.items()
+    ]
+    yield "pool_requests_total", "counter", "Upstream requests per host", [
+        ({"host": host}, stats["requests"]) for host, stats in hosts.items()
+    ]
+    yield "pool_new_connections_total", "counter", "New upstream connections per host", [
+        ({"host": host}, stats["new_connections"]) for host, stats in hosts.items()
+    ]
+    
+    limits = rate_limiter.stats()["engines"]
+    yield "ratelimit_in_flight", "gauge", "Upstream requests in flight per engine", [
+        ({"engine": engine}, stats["in_flight"]) for engine, stats in limits.items()
+    ]
+    yield "ratelimit_queued", "gauge", "Fetches waiting for a rate limit slot per engine", [
+        ({"engine": engine}, stats["queued"]) for engine, stats in limits.items()
+    ]
+    open_engines = set(circuit_breakers.open_engines())
+    yield "circuit_open", "gauge", "1 while an engine's circuit is open or half-open", [
+        ({"engine": engine}, int(engine in open_engines)) for engine in sorted(SEARCH_ENGINES)
+    ]
+    yield "parse_in_flight", "gauge", "Parse jobs admitted to the executor", [({}, parse_executor.stats()["in_flight"])]
+
+REGISTRY.add_collector(collect_runtime)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    return Response(content=REGISTRY.render(), media_type=TEXT_CONTENT_TYPE)
+
+def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profile")
+async def admin_profile(
+    request: Request,
+    seconds: float = Query(5, gt=0, le=PROFILE_MAX_SECONDS, description="How long to sample"),
+    interval_ms: float = Query(5, ge=1, le=1000, description="Time between samples")
+):
+    """Sample every thread's stack; returns collapsed stacks for flamegraph.pl or speedscope"""
+    global _profile_running
+    require_admin(request)
+    if _profile_running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    
+    _profile_running = True
+    try:
+        stacks = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+    finally:
+        _profile_running = False
+    return Response(content=stacks, media_type="text/plain; charset=utf-8")
+
+@app.get("/singleflight-stats")
+async def singleflight_stats():
+    """How many requests each shared upstream fetch served"""
+    stats = single_flight.stats()
+    if shared_state is not None:
+        stats["cross_worker"] = await asyncio.to_thread(shared_state.stats)
+    return stats
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,183 @@
+"""Prometheus metrics without a client library.
+
+Counters and histograms are plain dictionaries of numbers keyed by label
+values. They are only ever updated from the event loop thread, so recording
+needs no locks: a histogram observation is one dictionary lookup, one bisect
+and two additions. Values that other components already track (cache, pool,
+rate limiter, breakers) are read by collectors at scrape time instead of
+being counted twice.
+
+``/metrics`` renders everything in the Prometheus text exposition format.
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+NAMESPACE = "aggsearch"
+
+# Upper bounds in seconds, from a cache hit to an upstream timeout
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+TEXT_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = f"{NAMESPACE}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = f"{NAMESPACE}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: one count per bucket plus +Inf, then the sum
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        bounds = self.buckets + (float("inf"),)
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = f'le="{format_value(bound)}"'
+                yield f"{self.name}_bucket{format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(series[-1])}"
+            yield f"{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}"
+
+
+# A collector returns (name, type, help, [(labels dict, value), ...]) families at scrape time
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List = []
+        self.collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collector in self.collectors:
+            for name, kind, documentation, samples in collector():
+                name = f"{NAMESPACE}_{name}"
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{format_labels(list(labels), list(labels.values()))} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter("http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status")))
+HTTP_DURATION = REGISTRY.register(Histogram("http_request_duration_seconds", "Time to complete an HTTP response, by route", ("route",)))
+UPSTREAM_DURATION = REGISTRY.register(Histogram("upstream_request_duration_seconds", "Upstream fetch time per engine", ("engine",)))
+UPSTREAM_RESPONSES = REGISTRY.register(Counter("upstream_responses_total", "Upstream responses by engine and status code (0: no response)", ("engine", "status")))
+UPSTREAM_BYTES = REGISTRY.register(Counter("upstream_response_bytes_total", "Response body bytes received from each engine, as sent (compressed)", ("engine",)))
+UPSTREAM_TIMEOUTS = REGISTRY.register(Counter("upstream_timeouts_total", "Upstream fetches that timed out, per engine", ("engine",)))
+PARSE_DURATION = REGISTRY.register(Histogram("parse_duration_seconds", "Result extraction time per engine and mode", ("engine", "mode")))
+
+
+class MetricsMiddleware:
+    """Counts and times every HTTP request by its route template.
+
+    Paths that match no route are reported as ``other`` so scanners cannot
+    blow up the number of series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or route_for(scope)
+            HTTP_REQUESTS.inc(route, scope["method"], str(status))
+            HTTP_DURATION.observe(time.perf_counter() - started, route)
+
+
+# Path -> route template, so the route table is scanned once per distinct path
+_route_cache: Dict[str, str] = {}
+ROUTE_CACHE_SIZE = 4096
+
+
+def route_for(scope) -> str:
+    """Route template for a request, for Starlette versions that do not set ``scope["route"]``"""
+    path = scope["path"]
+    route_path = _route_cache.get(path)
+    if route_path is not None:
+        return route_path
+    route_path = "other"
+    for route in getattr(scope.get("app"), "routes", ()):
+        match = getattr(route, "path_regex", None)
+        if match is not None and match.match(path):
+            route_path = route.path
+            break
+    if len(_route_cache) < ROUTE_CACHE_SIZE:
+        _route_cache[path] = route_path
+    return route_path
@@ -0,0 +1,250 @@
+"""HTML parser backends for extracting titles and links from result pages"""
+import os
+import threading
+from typing import Dict, List, Optional, Union
+
+from bs4 import BeautifulSoup
+
+from extractors import SelectorSet, COMPILED_XPATHS, get_extractor
+
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+# Backend used by SearchResult.parse_results ("lxml", "selectolax" or "bs4")
+PARSER_BACKEND = os.environ.get("PARSER_BACKEND", "lxml")
+
+# Only the first few results of a page are kept
+MAX_RESULTS = 10
+
+
+def collapse(text: str) -> str:
+    """Normalize whitespace the same way for every backend"""
+    return " ".join(text.split())
+
+
+def make_result(title: str, link: str, snippet: str = "") -> Dict[str, str]:
+    """Result dict returned by the API; the snippet falls back to the title"""
+    snippet = snippet or title
+    return {
+        'title': title,
+        'link': link,
+        'snippet': snippet[:200] + '...' if len(snippet) > 200 else snippet
+    }
+
+
+class ParserBackend:
+    """Extracts up to ``limit`` title/link pairs from an HTML document (text, or UTF-8 bytes)"""
+
+    name = ""
+
+    def extract(self, html: Union[str, bytes], selector: SelectorSet, limit: int = MAX_RESULTS) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+
+class BeautifulSoupBackend(ParserBackend):
+    """Pure-Python html.parser; slow but tolerant, kept as the fallback"""
+
+    name = "bs4"
+
+    def extract(self, html, selector, limit=MAX_RESULTS):
+        soup = BeautifulSoup(html, 'html.parser', from_encoding="utf-8" if isinstance(html, bytes) else None)
+        results = []
+        for container in soup.select(selector.result_css):
+            title = container.select_one(selector.title_css)
+            link = container.select_one(selector.link_css) if selector.link_css else container
+            if title is None or link is None:
+                continue
+            title_text = collapse(title.get_text())
+            href = link.get('href', '')
+            if not title_text or not href:
+                continue
+            snippet = container.select_one(selector.snippet_css) if selector.snippet_css else None
+            results.append(make_result(title_text, href, collapse(snippet.get_text()) if snippet is not None else ""))
+            if len(results) == limit:
+                break
+        return results
+
+
+class LxmlBackend(ParserBackend):
+    """libxml2 parsing with the extractors' XPath, compiled once per thread"""
+
+    name = "lxml"
+
+    def __init__(self):
+        # Neither lxml parsers nor compiled XPath objects should be shared
+        # between threads; the main thread reuses what extractors.py compiled
+        self._local = threading.local()
+
+    def _compiled(self) -> Dict[str, "etree.XPath"]:
+        compiled = getattr(self._local, "compiled", None)
+        if compiled is None:
+            if threading.current_thread() is threading.main_thread():
+                compiled = dict(COMPILED_XPATHS)
+            else:
+                compiled = {expression: etree.XPath(expression) for expression in COMPILED_XPATHS}
+            self._local.compiled = compiled
+        return compiled
+
+    def _parser(self) -> "lxml.html.HTMLParser":
+        parser = getattr(self._local, "parser", None)
+        if parser is None:
+            parser = self._local.parser = lxml.html.HTMLParser(encoding="utf-8")
+        return parser
+
+    def xpath(self, expression: str) -> "etree.XPath":
+        compiled = self._compiled()
+        xpath = compiled.get(expression)
+        if xpath is None:
+            xpath = compiled[expression] = etree.XPath(expression)
+        return xpath
+
+    def parse(self, html: Union[str, bytes]):
+        data = html if isinstance(html, bytes) else html.encode("utf-8")
+        return lxml.html.document_fromstring(data, parser=self._parser())
+
+    def text(self, element) -> str:
+        return collapse("".join(self.xpath('.//text()')(element)))
+
+    def _first(self, expression: str, container):
+        matches = self.xpath(expression)(container)
+        return matches[0] if matches else None
+
+    def extract_containers(self, containers, selector: SelectorSet, limit: int = MAX_RESULTS):
+        """Results from the given containers, plus how many containers were consumed"""
+        results = []
+        for used, container in enumerate(containers, 1):
+            title = self._first(selector.title_xpath, container)
+            link = self._first(selector.link_xpath, container) if selector.link_xpath else container
+            if title is None or link is None:
+                continue
+            title_text = self.text(title)
+            href = link.get('href', '')
+            if not title_text or not href:
+                continue
+            snippet = self._first(selector.snippet_xpath, container) if selector.snippet_xpath else None
+            results.append(make_result(title_text, href, self.text(snippet) if snippet is not None else ""))
+            if len(results) == limit:
+                return results, used
+        return results, len(containers)
+
+    def extract_tree(self, root, selector: SelectorSet, limit: int = MAX_RESULTS) -> List[Dict[str, str]]:
+        return self.extract_containers(self.xpath(selector.result_xpath)(root), selector, limit)[0]
+
+    def extract(self, html, selector, limit=MAX_RESULTS):
+        return self.extract_tree(self.parse(html), selector, limit)
+
+
+class IncrementalExtractor:
+    """Builds the lxml tree chunk by chunk and reports when enough results exist.
+
+    ``feed`` returns True once ``limit`` results are complete; the caller can
+    then stop downloading the page. A result only counts as complete when a
+    later result container has started, so a title whose text is still
+    arriving is never returned truncated. Pages with fewer matches are read in
+    full and extracted from the finished tree by ``close``.
+
+    Each check walks the partial tree, so checks are spaced geometrically
+    (every ~50% more bytes) to keep the total work linear in the page size.
+    """
+
+    def __init__(self, engine: str, limit: int = MAX_RESULTS, encoding: Optional[str] = None):
+        self.backend = BACKENDS["lxml"]
+        self.selector = get_extractor(engine).selectors
+        self.limit = limit
+        self.bytes_fed = 0
+        self.results: Optional[List[Dict[str, str]]] = None
+        self._parser = etree.HTMLPullParser(events=("start",), encoding=encoding)
+        self._root = None
+        self._next_check = 0
+
+    def feed(self, data: bytes) -> bool:
+        self._parser.feed(data)
+        self.bytes_fed += len(data)
+        for _, element in self._parser.read_events():
+            if self._root is None:
+                self._root = element.getroottree().getroot()
+        if self._root is None or self.bytes_fed < self._next_check:
+            return False
+        self._next_check = self.bytes_fed + self.bytes_fed // 2
+
+        containers = self.backend.xpath(self.selector.result_xpath)(self._root)
+        if len(containers) <= self.limit:
+            return False
+        results, used = self.backend.extract_containers(containers, self.selector, self.limit)
+        if len(results) < self.limit or used >= len(containers):
+            return False
+        self.results = results
+        return True
+
+    def close(self) -> List[Dict[str, str]]:
+        """Finish parsing a fully read page and extract from the complete tree"""
+        root = self._parser.close()
+        self.results = self.backend.extract_tree(root, self.selector, self.limit)
+        return self.results
+
+
+class SelectolaxBackend(ParserBackend):
+    """Lexbor-based parser with native CSS selector matching"""
+
+    name = "selectolax"
+
+    @staticmethod
+    def text(node) -> str:
+        return collapse(node.text(deep=True))
+
+    def extract(self, html, selector, limit=MAX_RESULTS):
+        tree = SelectolaxHTMLParser(html.decode("utf-8", errors="replace") if isinstance(html, bytes) else html)
+        results = []
+        for container in tree.css(selector.result_css):
+            title = container.css_first(selector.title_css)
+            link = container.css_first(selector.link_css) if selector.link_css else container
+            if title is None or link is None:
+                continue
+            title_text = self.text(title)
+            href = link.attributes.get('href') or ''
+            if not title_text or not href:
+                continue
+            snippet = container.css_first(selector.snippet_css) if selector.snippet_css else None
+            results.append(make_result(title_text, href, self.text(snippet) if snippet is not None else ""))
+            if len(results) == limit:
+                break
+        return results
+
+
+BACKENDS: Dict[str, ParserBackend] = {"bs4": BeautifulSoupBackend()}
+if LXML_AVAILABLE:
+    BACKENDS["lxml"] = LxmlBackend()
+if SELECTOLAX_AVAILABLE:
+    BACKENDS["selectolax"] = SelectolaxBackend()
+
+
+def get_backend(name: Optional[str] = None) -> ParserBackend:
+    """Return the named backend, falling back to BeautifulSoup if it is unavailable"""
+    return BACKENDS.get(name or PARSER_BACKEND, BACKENDS["bs4"])
+
+
+def extract_results(engine: str, html: Union[str, bytes], backend: Optional[str] = None) -> List[Dict[str, str]]:
+    """Extract results with the configured backend, retrying with BeautifulSoup on failure.
+
+    Engines without a registered extractor yield no results.
+    """
+    extractor = get_extractor(engine)
+    if extractor is None:
+        return []
+    parser = get_backend(backend)
+    try:
+        return parser.extract(html, extractor.selectors)
+    except Exception:
+        if parser is BACKENDS["bs4"]:
+            raise
+        return BACKENDS["bs4"].extract(html, extractor.selectors)
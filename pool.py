@@ -0,0 +1,161 @@
+"""Shared, app-lifetime HTTP client pool for outbound engine fetches"""
+import os
+from typing import Dict, Optional, Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from profiling import current_trace, http_tracer
+
+try:
+    import h2  # noqa: F401  (httpx only negotiates HTTP/2 when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Pool configuration (overridable through the environment, e.g. on Railway)
+POOL_HTTP2 = os.environ.get("POOL_HTTP2", "true").lower() in ("1", "true", "yes")
+POOL_MAX_CONNECTIONS_PER_HOST = int(os.environ.get("POOL_MAX_CONNECTIONS_PER_HOST", "20"))
+POOL_MAX_KEEPALIVE_PER_HOST = int(os.environ.get("POOL_MAX_KEEPALIVE_PER_HOST", "10"))
+POOL_KEEPALIVE_EXPIRY = float(os.environ.get("POOL_KEEPALIVE_EXPIRY", "30"))
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class HostStats:
+    """Request and connection counters for one upstream host"""
+
+    __slots__ = ("requests", "new_connections")
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+
+    @property
+    def reuse_rate(self) -> float:
+        if not self.requests:
+            return 0.0
+        return max(self.requests - self.new_connections, 0) / self.requests
+
+
+class EnginePool:
+    """One keep-alive client per engine host, shared by every request.
+
+    Each host gets its own ``httpx.AsyncClient`` so the connection caps apply
+    per host: a slow engine cannot starve the others of sockets.
+    """
+
+    def __init__(
+        self,
+        engines: Dict[str, str],
+        http2: bool = POOL_HTTP2,
+        max_connections_per_host: int = POOL_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_per_host: int = POOL_MAX_KEEPALIVE_PER_HOST,
+        keepalive_expiry: float = POOL_KEEPALIVE_EXPIRY,
+    ):
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_per_host,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._engine_hosts = {engine: urlsplit(template).netloc for engine, template in engines.items()}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, HostStats] = {host: HostStats() for host in set(self._engine_hosts.values())}
+
+    def open(self):
+        """Create the per-host clients (called once at application startup)"""
+        for host in self._stats:
+            self._client_for_host(host)
+
+    async def close(self):
+        """Close every client and drop its pooled connections"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def host_for(self, engine: str) -> str:
+        return self._engine_hosts[engine]
+
+    def _client_for_host(self, host: str) -> httpx.AsyncClient:
+        client = self._clients.get(host)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                headers=DEFAULT_HEADERS,
+                follow_redirects=False,
+            )
+            self._clients[host] = client
+        return client
+
+    def client_for(self, engine: str) -> httpx.AsyncClient:
+        return self._client_for_host(self.host_for(engine))
+
+    def _trace_for(self, host: str, engine: str):
+        stats = self._stats[host]
+        request_trace = current_trace.get()
+        on_event = http_tracer(request_trace, engine) if request_trace is not None else None
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == "connection.connect_tcp.complete":
+                stats.new_connections += 1
+            if on_event is not None:
+                on_event(event_name)
+
+        return trace
+
+    async def get(self, engine: str, url: str, timeout: Optional[float] = None) -> httpx.Response:
+        """GET ``url`` over the pooled client of ``engine``'s host"""
+        host = self.host_for(engine)
+        self._stats[host].requests += 1
+        return await self.client_for(engine).get(
+            url,
+            timeout=timeout,
+            extensions={"trace": self._trace_for(host, engine)},
+        )
+
+    def stream(self, engine: str, url: str, timeout: Optional[float] = None):
+        """Streaming GET; leaving the context early closes the connection"""
+        host = self.host_for(engine)
+        self._stats[host].requests += 1
+        return self.client_for(engine).stream(
+            "GET",
+            url,
+            timeout=timeout,
+            extensions={"trace": self._trace_for(host, engine)},
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Open connections and reuse rate per host"""
+        hosts = {}
+        for host, stats in sorted(self._stats.items()):
+            open_connections = idle_connections = 0
+            client = self._clients.get(host)
+            connection_pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            if connection_pool is not None:
+                connections = connection_pool.connections
+                open_connections = len(connections)
+                idle_connections = sum(1 for connection in connections if connection.is_idle())
+            hosts[host] = {
+                "open_connections": open_connections,
+                "idle_connections": idle_connections,
+                "requests": stats.requests,
+                "new_connections": stats.new_connections,
+                "reuse_rate": round(stats.reuse_rate, 4),
+            }
+
+        total_requests = sum(stats.requests for stats in self._stats.values())
+        total_new = sum(stats.new_connections for stats in self._stats.values())
+        return {
+            "http2": self.http2,
+            "max_connections_per_host": self.limits.max_connections,
+            "max_keepalive_per_host": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "open_connections": sum(host["open_connections"] for host in hosts.values()),
+            "requests": total_requests,
+            "reuse_rate": round(max(total_requests - total_new, 0) / total_requests, 4) if total_requests else 0.0,
+            "hosts": hosts,
+        }
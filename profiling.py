@@ -0,0 +1,184 @@
+"""Opt-in request tracing and an on-demand sampling profiler.
+
+A request sent with an ``X-Trace`` header (or ``debug=true`` on the search
+endpoints) carries a ``Trace`` in a context variable. Upstream fetches started
+for it add their phases: ``connect`` (DNS resolution happens inside the TCP
+connect, so it is included), ``tls``, ``ttfb`` (request sent until response
+headers), ``download`` and ``parse``. ``serialize`` runs from the endpoint
+returning until the response starts. The totals go out in a ``Server-Timing``
+header; phases of concurrent fetches are summed, so they can exceed ``total``.
+
+``sample_stacks`` polls every thread's stack at a fixed interval and returns
+them in the collapsed format read by flamegraph.pl and speedscope.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+
+TRACE_HEADER = b"x-trace"
+
+PHASES = ("connect", "tls", "ttfb", "download", "parse", "serialize")
+
+# httpcore trace steps timed as a phase, from their ".started" to ".complete" event
+TRACE_STEPS = {
+    "connection.connect_tcp": "connect",
+    "connection.start_tls": "tls",
+    "http11.receive_response_body": "download",
+    "http2.receive_response_body": "download",
+}
+REQUEST_SENT = ("http11.send_request_headers.started", "http2.send_request_headers.started")
+HEADERS_RECEIVED = ("http11.receive_response_headers.complete", "http2.receive_response_headers.complete")
+
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", "60"))
+
+
+class Trace:
+    """Phase totals for one client request, overall and per engine"""
+
+    __slots__ = ("started", "handler_done", "spans", "engines")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.handler_done: Optional[float] = None
+        self.spans: Dict[str, float] = {}
+        self.engines: Dict[str, Dict[str, float]] = {}
+
+    def add(self, phase: str, seconds: float, engine: Optional[str] = None):
+        self.spans[phase] = self.spans.get(phase, 0.0) + seconds
+        if engine is not None:
+            spans = self.engines.setdefault(engine, {})
+            spans[phase] = spans.get(phase, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        entries = [f"{phase};dur={self.spans[phase] * 1000:.1f}" for phase in PHASES if phase in self.spans]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "phases_ms": {phase: round(self.spans[phase] * 1000, 2) for phase in PHASES if phase in self.spans},
+            "engines": {
+                engine: {phase: round(seconds * 1000, 2) for phase, seconds in spans.items()}
+                for engine, spans in sorted(self.engines.items())
+            },
+        }
+
+
+current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+
+
+def http_tracer(trace: Trace, engine: str):
+    """httpcore trace callback feeding one upstream request's phases into ``trace``"""
+    marks: Dict[str, float] = {}
+
+    def on_event(event_name: str):
+        now = time.perf_counter()
+        step, _, stage = event_name.rpartition(".")
+        phase = TRACE_STEPS.get(step)
+        if phase is not None:
+            if stage == "started":
+                marks[step] = now
+            elif step in marks:
+                trace.add(phase, now - marks.pop(step), engine)
+        elif event_name in REQUEST_SENT:
+            marks["ttfb"] = now
+        elif event_name in HEADERS_RECEIVED and "ttfb" in marks:
+            trace.add("ttfb", now - marks.pop("ttfb"), engine)
+        elif step.endswith(".response_closed") and stage == "started":
+            # Closing a stream early: the body never reports completion
+            for step, started in list(marks.items()):
+                if TRACE_STEPS.get(step) == "download":
+                    trace.add("download", now - marks.pop(step), engine)
+
+    return on_event
+
+
+def traced_endpoint(endpoint):
+    """Mark when the endpoint returns, so the rest is attributed to serialization"""
+    if not asyncio.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        result = await endpoint(*args, **kwargs)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.handler_done = time.perf_counter()
+        return result
+
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, traced_endpoint(endpoint), **kwargs)
+
+
+class TracingMiddleware:
+    """Starts a trace for opted-in requests and reports it as ``Server-Timing``"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not wants_trace(scope):
+            await self.app(scope, receive, send)
+            return
+        trace = Trace()
+        current_trace.set(trace)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                if trace.handler_done is not None:
+                    trace.add("serialize", time.perf_counter() - trace.handler_done)
+                MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
+
+
+def wants_trace(scope) -> bool:
+    query_string = scope.get("query_string", b"")
+    if b"debug=" in query_string and parse_qs(query_string.decode("latin-1")).get("debug") == ["true"]:
+        return True
+    return any(name == TRACE_HEADER for name, _ in scope["headers"])
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float) -> str:
+    """Sample every other thread's stack for ``seconds``; return collapsed stacks.
+
+    Meant to run in a worker thread so the event loop keeps serving (and is
+    sampled) meanwhile. Parse workers in other processes are not visible.
+    """
+    own = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    counts: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
@@ -0,0 +1,375 @@
+"""Per-engine outbound rate limiting: token bucket, in-flight cap and backoff.
+
+Every upstream fetch takes a slot from its engine's limiter first. A slot
+needs a token (refilled at the engine's rate, up to ``burst``) and a free
+in-flight place. When an engine answers 429 or 503 its limiter stops issuing
+slots until ``Retry-After`` (or an exponential backoff) has passed and halves
+its rate; successful responses then raise the rate back step by step.
+
+Fetches waiting for a slot are grouped by the client request that caused them
+and served round-robin, so one large fan-out cannot starve other clients.
+Waits are bounded by ``max_wait``: a fetch that would wait longer fails fast
+with ``RateLimited`` instead of holding its client.
+"""
+import asyncio
+import contextvars
+import itertools
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+# Steady requests per second per engine; engines not listed use RATE_LIMIT_DEFAULT_RATE
+ENGINE_RATES = {
+    "gg": 2.0,
+    "brave": 1.0,
+    "gh": 1.0,
+}
+
+RATE_LIMIT_DEFAULT_RATE = float(os.environ.get("RATE_LIMIT_DEFAULT_RATE", "5"))
+RATE_LIMIT_BURST = int(os.environ.get("RATE_LIMIT_BURST", "5"))
+RATE_LIMIT_MAX_IN_FLIGHT = int(os.environ.get("RATE_LIMIT_MAX_IN_FLIGHT", "4"))
+# Longest a fetch may wait for a slot before it is answered with an error
+RATE_LIMIT_MAX_WAIT = float(os.environ.get("RATE_LIMIT_MAX_WAIT", "5"))
+# Cap on the backoff applied when an engine throttles without Retry-After
+RATE_LIMIT_MAX_BACKOFF = float(os.environ.get("RATE_LIMIT_MAX_BACKOFF", "300"))
+
+THROTTLE_STATUSES = (429, 503)
+
+# The client request a fetch is made for; tasks inherit it from their creator
+current_client: contextvars.ContextVar[int] = contextvars.ContextVar("current_client", default=0)
+_client_ids = itertools.count(1)
+
+
+class RateLimited(Exception):
+    def __init__(self, engine: str, retry_in: float):
+        super().__init__(f"Rate limited: {engine} is throttled, retry in {retry_in:.1f}s")
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at - (now if now is not None else time.time()), 0.0)
+
+
+class FairQueue:
+    """Waiters grouped by client, served round-robin across clients"""
+
+    def __init__(self):
+        self._clients: "OrderedDict[int, Deque[asyncio.Future]]" = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def push(self, client: int, waiter: "asyncio.Future"):
+        self._clients.setdefault(client, deque()).append(waiter)
+        self._size += 1
+
+    def pop(self) -> "asyncio.Future":
+        client, waiters = next(iter(self._clients.items()))
+        waiter = waiters.popleft()
+        if waiters:
+            self._clients.move_to_end(client)
+        else:
+            del self._clients[client]
+        self._size -= 1
+        return waiter
+
+    def remove(self, client: int, waiter: "asyncio.Future"):
+        waiters = self._clients.get(client)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del self._clients[client]
+        self._size -= 1
+
+
+class TokenBucket:
+    """Tokens, current rate and backoff deadline for one engine, in this process.
+
+    ``shared.SharedTokenBucket`` has the same interface and keeps its state
+    where every worker process sees it. Times are ``time.monotonic()``.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        # No tokens accrue while backing off, so a throttled engine resumes gently
+        start = max(self._updated, min(self.blocked_until, now))
+        self.tokens = min(self.burst, self.tokens + (now - start) * self.rate)
+        self._updated = now
+
+    def take(self, now: float) -> bool:
+        self._refill(now)
+        if now < self.blocked_until or self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def put_back(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def wait_for(self, tokens: float, now: float) -> float:
+        """Rough time until ``tokens`` tokens are available"""
+        self._refill(now)
+        wait = max(self.blocked_until - now, 0.0)
+        deficit = tokens - self.tokens
+        if deficit > 0:
+            wait = max(wait, deficit / self.rate)
+        return wait
+
+    def throttle(self, until: float, min_rate: float, now: float):
+        """Stop issuing tokens until ``until`` and halve the rate (not below ``min_rate``)"""
+        self._refill(now)
+        self.blocked_until = max(self.blocked_until, until)
+        self.rate = max(self.rate / 2, min_rate)
+        self.tokens = 0.0
+
+    def recover(self, step: float, max_rate: float, now: float):
+        """Raise the rate by ``step`` after a successful response, up to ``max_rate``"""
+        if self.rate < max_rate:
+            self._refill(now)
+            self.rate = min(max_rate, self.rate + step)
+
+    def state(self, now: float) -> Tuple[float, float, float]:
+        """``(tokens, rate, blocked_until)``"""
+        self._refill(now)
+        return self.tokens, self.rate, self.blocked_until
+
+
+class EngineLimiter:
+    """Token bucket plus in-flight cap for one engine, adapting to throttling"""
+
+    def __init__(self, engine: str, rate: float, burst: int, max_in_flight: int, max_wait: float, bucket=None):
+        self.engine = engine
+        self.configured_rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.max_wait = max_wait
+        self.bucket = bucket if bucket is not None else TokenBucket(rate, burst)
+        self.in_flight = 0
+        self.consecutive_throttles = 0
+        self.last_retry_after: Optional[float] = None
+        self._waiters = FairQueue()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Counters for the stats endpoint
+        self.granted = 0
+        self.waited = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _take(self, now: float) -> bool:
+        if self.in_flight >= self.max_in_flight or not self.bucket.take(now):
+            return False
+        self.in_flight += 1
+        self.granted += 1
+        return True
+
+    def expected_wait(self, now: float) -> float:
+        """Rough time until a newly queued fetch would get a token"""
+        return self.bucket.wait_for(len(self._waiters) + 1, now)
+
+    async def acquire(self):
+        now = time.monotonic()
+        if not len(self._waiters) and self._take(now):
+            return
+        retry_in = self.expected_wait(now)
+        if retry_in > self.max_wait:
+            self.rejected += 1
+            raise RateLimited(self.engine, retry_in)
+
+        client = current_client.get()
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.push(client, waiter)
+        self.waited += 1
+        # Not asyncio.wait_for: before Python 3.12 it swallows a cancellation
+        # that arrives just after the slot was granted, and the caller carries on
+        timeout = loop.call_later(self.max_wait, self._expire, client, waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            self._abandon(client, waiter)
+            raise
+        finally:
+            timeout.cancel()
+        waited = time.monotonic() - now
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    def _expire(self, client: int, waiter: "asyncio.Future"):
+        """Fail a fetch that has waited ``max_wait`` without getting a slot"""
+        if not waiter.done():
+            self._waiters.remove(client, waiter)
+            self.rejected += 1
+            waiter.set_exception(RateLimited(self.engine, self.expected_wait(time.monotonic())))
+
+    def _abandon(self, client: int, waiter: "asyncio.Future"):
+        if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+            # Granted just as the caller gave up: hand the slot back
+            self.bucket.put_back()
+            self.release()
+        else:
+            self._waiters.remove(client, waiter)
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        now = time.monotonic()
+        while len(self._waiters) and self._take(now):
+            waiter = self._waiters.pop()
+            if waiter.done():
+                # Cancelled while still queued; its owner has not removed it yet
+                self.bucket.put_back()
+                self.in_flight -= 1
+                self.granted -= 1
+                continue
+            waiter.set_result(None)
+        if len(self._waiters) and self.in_flight < self.max_in_flight and self._timer is None:
+            # Waiting on tokens or a backoff rather than a free slot: wake up when one is due
+            delay = max(self.bucket.wait_for(1, now), 0.001)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _reject_waiting(self, retry_in: float):
+        """Fail every queued fetch now rather than after a wait that cannot succeed"""
+        while len(self._waiters):
+            waiter = self._waiters.pop()
+            if not waiter.done():
+                waiter.set_exception(RateLimited(self.engine, retry_in))
+                self.rejected += 1
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def record(self, status_code: int, retry_after: Optional[str] = None):
+        """Adapt to an upstream response: back off on 429/503, recover on success"""
+        if status_code in THROTTLE_STATUSES:
+            self.throttled += 1
+            self.consecutive_throttles += 1
+            delay = parse_retry_after(retry_after)
+            self.last_retry_after = delay
+            if delay is None:
+                delay = min(2.0 ** self.consecutive_throttles, RATE_LIMIT_MAX_BACKOFF)
+            now = time.monotonic()
+            self.bucket.throttle(now + delay, self.configured_rate / 16, now)
+            if delay > self.max_wait:
+                self._reject_waiting(delay)
+        elif status_code:
+            self.consecutive_throttles = 0
+            self.bucket.recover(self.configured_rate / 10, self.configured_rate, time.monotonic())
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        tokens, rate, blocked_until = self.bucket.state(now)
+        waited = self.waited or 1
+        return {
+            "rate": round(rate, 3),
+            "configured_rate": self.configured_rate,
+            "burst": self.burst,
+            "tokens": round(tokens, 2),
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "queued_clients": self._waiters.clients,
+            "blocked_for_s": round(max(blocked_until - now, 0.0), 2),
+            "last_retry_after_s": self.last_retry_after,
+            "granted": self.granted,
+            "waited": self.waited,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "wait_avg_ms": round(self.wait_total / waited * 1000, 2),
+            "wait_max_ms": round(self.wait_max * 1000, 2),
+        }
+
+
+class RateLimiter:
+    """Engine limiters, created on first use with the configured rate for each"""
+
+    def __init__(
+        self,
+        rates: Dict[str, float] = ENGINE_RATES,
+        default_rate: float = RATE_LIMIT_DEFAULT_RATE,
+        burst: int = RATE_LIMIT_BURST,
+        max_in_flight: int = RATE_LIMIT_MAX_IN_FLIGHT,
+        max_wait: float = RATE_LIMIT_MAX_WAIT,
+        bucket_factory: Optional[Callable[[str, float, int], Any]] = None,
+    ):
+        self.rates = rates
+        self.default_rate = default_rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.max_wait = max_wait
+        # (engine, rate, burst) -> bucket, for token buckets kept outside this process
+        self.bucket_factory = bucket_factory
+        self._limiters: Dict[str, EngineLimiter] = {}
+
+    def limiter_for(self, engine: str) -> EngineLimiter:
+        limiter = self._limiters.get(engine)
+        if limiter is None:
+            rate = self.rates.get(engine, self.default_rate)
+            bucket = self.bucket_factory(engine, rate, self.burst) if self.bucket_factory is not None else None
+            limiter = EngineLimiter(engine, rate, self.burst, self.max_in_flight, self.max_wait, bucket)
+            self._limiters[engine] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def slot(self, engine: str):
+        """Hold one of ``engine``'s slots for the duration of an upstream request"""
+        limiter = self.limiter_for(engine)
+        await limiter.acquire()
+        try:
+            yield limiter
+        finally:
+            limiter.release()
+
+    def record(self, engine: str, status_code: int, retry_after: Optional[str] = None):
+        self.limiter_for(engine).record(status_code, retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "default_rate": self.default_rate,
+            "burst": self.burst,
+            "max_in_flight": self.max_in_flight,
+            "max_wait": self.max_wait,
+            "engines": {engine: limiter.to_dict() for engine, limiter in sorted(self._limiters.items())},
+        }
+
+
+class ClientTagMiddleware:
+    """Tags each HTTP request with an id so its fetches queue fairly against others'"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            current_client.set(next(_client_ids))
+        await self.app(scope, receive, send)
@@ -0,0 +1,137 @@
+"""Response models of the search endpoints and the JSON response class that renders them.
+
+The endpoints fill in slotted dataclasses (no per-instance ``__dict__``) and
+return them in a ``JSONBytesResponse``, which serializes the whole payload in
+one call, with orjson when it is installed, instead of FastAPI walking the
+nested result lists through ``jsonable_encoder`` first.
+
+``fields=`` on the search endpoints keeps only the named fields of each
+engine entry (or of the single-engine response); the identifying ones are
+always kept, and a field that is not asked for is never built.
+"""
+import json
+from dataclasses import dataclass, field, fields as dataclass_fields
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from starlette.responses import Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps(data: Any) -> bytes:
+    """Compact UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class JSONBytesResponse(Response):
+    """JSON response rendered with ``dumps``; models are converted with their ``to_dict``"""
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any, fields: Optional[FrozenSet[str]] = None, **kwargs):
+        self.fields = fields
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if hasattr(content, "to_dict"):
+            content = content.to_dict(self.fields)
+        return dumps(content)
+
+
+def _to_dict(model: Any, names: List[str], always: FrozenSet[str], fields: Optional[FrozenSet[str]]) -> Dict[str, Any]:
+    """Fields in declaration order, without unset ones and those not in ``fields``"""
+    data = {}
+    for name in names:
+        if fields is not None and name not in fields and name not in KEY_FIELDS:
+            continue
+        value = getattr(model, name)
+        if value is not None or name in always:
+            data[name] = value
+    return data
+
+
+@dataclass(slots=True)
+class EngineResult:
+    """One engine's entry in a multi-engine response"""
+
+    engine: str
+    url: str
+    status_code: int
+    error: Optional[str] = None
+    parsed_results: Optional[List[Dict[str, str]]] = None
+    result_count: Optional[int] = None
+    content_preview: Optional[str] = None
+    status: Optional[str] = None
+    elapsed_ms: Optional[float] = None
+
+    def to_dict(self, fields: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+        return _to_dict(self, ENGINE_RESULT_FIELDS, ALWAYS_PRESENT, fields)
+
+
+@dataclass(slots=True)
+class SearchResponse:
+    """Response of /search"""
+
+    query: str
+    engine: str
+    url: str
+    status_code: int
+    error: Optional[str] = None
+    results: Optional[List[Dict[str, str]]] = None
+    content: Optional[str] = None
+    trace: Optional[Dict[str, Any]] = None
+
+    def to_dict(self, fields: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+        return _to_dict(self, SEARCH_RESPONSE_FIELDS, ALWAYS_PRESENT, fields)
+
+
+@dataclass(slots=True)
+class MultiSearchResponse:
+    """Response of /multi-search and /category-search; ``fields`` applies to each engine entry"""
+
+    query: str
+    engines: List[str]
+    deadline_ms: Optional[int] = None
+    partial: Optional[bool] = None
+    timed_out: Optional[List[str]] = None
+    results: List[EngineResult] = field(default_factory=list)
+    merged: Optional[List[Dict[str, Any]]] = None
+    trace: Optional[Dict[str, Any]] = None
+
+    def to_dict(self, fields: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+        data = _to_dict(self, MULTI_SEARCH_RESPONSE_FIELDS, frozenset(), None)
+        data["results"] = [result.to_dict(fields) for result in self.results]
+        return data
+
+
+ENGINE_RESULT_FIELDS = [item.name for item in dataclass_fields(EngineResult)]
+SEARCH_RESPONSE_FIELDS = [item.name for item in dataclass_fields(SearchResponse)]
+MULTI_SEARCH_RESPONSE_FIELDS = [item.name for item in dataclass_fields(MultiSearchResponse)]
+# Written out even when null, as the endpoints always have
+ALWAYS_PRESENT = frozenset({"error"})
+# Kept whatever ``fields`` says, so every entry stays identifiable (and debug output visible)
+KEY_FIELDS = frozenset({"query", "engine", "trace"})
+# What ``fields=`` may name on /search, and per engine entry on /multi-search and /category-search
+SEARCH_RESPONSE_SELECTABLE = frozenset(SEARCH_RESPONSE_FIELDS) - KEY_FIELDS
+ENGINE_RESULT_SELECTABLE = frozenset(ENGINE_RESULT_FIELDS) - KEY_FIELDS
+
+
+def parse_fields(raw: Optional[str], selectable: FrozenSet[str]) -> Optional[FrozenSet[str]]:
+    """``fields=`` as a set of names (None keeps everything); raises ValueError on names not in ``selectable``"""
+    if raw is None:
+        return None
+    names = frozenset(name.strip() for name in raw.split(",") if name.strip())
+    unknown = names - selectable
+    if unknown:
+        raise ValueError(f"Unknown fields: {sorted(unknown)}. Available: {sorted(selectable)}")
+    return names
+
+
+def wants(fields: Optional[FrozenSet[str]], name: str) -> bool:
+    return fields is None or name in fields
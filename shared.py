@@ -0,0 +1,302 @@
+"""State shared by several worker processes on one host.
+
+With ``WEB_CONCURRENCY`` above 1 (``uvicorn --workers`` reads it too) every
+worker opens the same SQLite database in WAL mode at ``SHARED_STATE_PATH``:
+
+- the result cache's disk layer lives in it, so a page fetched by one worker
+  is a cache hit for all of them;
+- ``flights`` holds a lease per key being fetched upstream, so a miss that
+  another worker is already fetching waits for that worker's result instead
+  of fetching it again;
+- ``buckets`` holds each engine's token bucket, so the per-engine rate (and
+  any backoff after a 429) applies to all workers together rather than once
+  per worker.
+
+None of this touches SQLite on the event loop. Lease calls run in a thread
+(``asyncio.to_thread``), and a lease that cannot be checked within
+``SHARED_BUSY_TIMEOUT`` is skipped: the worker fetches the page itself.
+Each shared bucket is a local ``ratelimit.TokenBucket`` that a writer thread
+reconciles with the database whenever it changes, charging the tokens spent
+locally to the shared row and adopting its tokens, rate and backoff. While the database is busy a
+worker goes on limiting with its local bucket. The in-flight cap, the fair
+queue and the stats stay per worker.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from ratelimit import TokenBucket
+
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+SHARED_STATE_PATH = os.environ.get(
+    "SHARED_STATE_PATH",
+    os.path.join(tempfile.gettempdir(), "aggsearch-shared.db") if WEB_CONCURRENCY > 1 else "",
+)
+# How often a worker waiting on another worker's fetch checks the shared cache
+SHARED_FLIGHT_POLL = float(os.environ.get("SHARED_FLIGHT_POLL", "0.025"))
+# Longest a lease check or bucket sync waits for another worker's write lock
+SHARED_BUSY_TIMEOUT = float(os.environ.get("SHARED_BUSY_TIMEOUT", "0.1"))
+
+
+class SharedState:
+    """Cross-worker fetch leases and token buckets in one SQLite file.
+
+    The lease methods, ``purge_expired`` and ``stats`` wait on SQLite and
+    are called through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Identifies this worker's leases; pids can be reused after a restart
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=SHARED_BUSY_TIMEOUT)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS flights (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "engine TEXT PRIMARY KEY, tokens REAL NOT NULL, rate REAL NOT NULL, "
+            "blocked_until REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self.counters = {"leases": 0, "waits": 0, "shared_hits": 0, "wait_timeouts": 0, "busy": 0, "bucket_syncs": 0}
+        self._buckets: List["SharedTokenBucket"] = []
+        self._buckets_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = False
+        self._writer: Optional[threading.Thread] = None
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def try_lease(self, key: str, seconds: float) -> bool:
+        """Claim the upstream fetch of ``key`` unless another worker holds a live lease.
+
+        A plain read comes first, so waiting on a held lease takes no write
+        lock. When the database stays locked the fetch goes ahead unleased.
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT owner, expires FROM flights WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] != self.owner and row[1] > now:
+                return False
+            with self._transaction() as db:
+                row = db.execute("SELECT owner, expires FROM flights WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[0] != self.owner and row[1] > now:
+                    return False
+                db.execute("INSERT OR REPLACE INTO flights (key, owner, expires) VALUES (?, ?, ?)", (key, self.owner, now + seconds))
+        except sqlite3.OperationalError:
+            self.counters["busy"] += 1
+            return True
+        self.counters["leases"] += 1
+        return True
+
+    def release(self, key: str):
+        try:
+            with self._lock:
+                self._db.execute("DELETE FROM flights WHERE key = ? AND owner = ?", (key, self.owner))
+        except sqlite3.OperationalError:
+            # The lease expires on its own
+            self.counters["busy"] += 1
+
+    def purge_expired(self, now: float) -> int:
+        with self._lock:
+            return self._db.execute("DELETE FROM flights WHERE expires <= ?", (now,)).rowcount
+
+    def bucket(self, engine: str, rate: float, burst: int) -> "SharedTokenBucket":
+        bucket = SharedTokenBucket(self, engine, rate, burst)
+        with self._buckets_lock:
+            self._buckets.append(bucket)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._sync_buckets, name="shared-buckets", daemon=True)
+                self._writer.start()
+        self._wake.set()
+        return bucket
+
+    def _sync_buckets(self):
+        """Writer thread: reconcile the buckets that changed with their rows"""
+        while not self._closing:
+            self._wake.wait()
+            self._wake.clear()
+            with self._buckets_lock:
+                buckets = [bucket for bucket in self._buckets if bucket.dirty]
+            for bucket in buckets:
+                if self._closing:
+                    return
+                try:
+                    bucket.sync()
+                except sqlite3.OperationalError:
+                    # Busy: the local bucket goes on alone and the spent tokens are charged next time
+                    self.counters["busy"] += 1
+                    time.sleep(SHARED_BUSY_TIMEOUT)
+                    self._wake.set()
+                else:
+                    self.counters["bucket_syncs"] += 1
+
+    def close(self):
+        self._closing = True
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join()
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = self._db.execute("SELECT COUNT(*) FROM flights WHERE expires > ?", (time.time(),)).fetchone()[0]
+        return {"path": self.path, "owner": self.owner, "in_flight": in_flight, **self.counters}
+
+
+class SharedTokenBucket:
+    """``ratelimit.TokenBucket`` whose tokens, rate and backoff are shared through the database.
+
+    The limiter's calls, made on the event loop, only touch the local
+    bucket; tokens it takes, backoffs and recoveries are recorded as pending and applied to
+    the engine's row by ``sync`` in the writer thread, which then copies the
+    row back. Between syncs every worker refills on its own, so the shared
+    row may go into debt (down to ``-burst``); the debt is paid back before
+    any worker gets another token, which keeps the rate shared over time.
+    Times are ``time.monotonic()``, which on Linux is the same clock in every
+    process.
+    """
+
+    def __init__(self, state: SharedState, engine: str, rate: float, burst: int):
+        self.state_db = state
+        self.engine = engine
+        self.rate = rate
+        self.burst = burst
+        self.local = TokenBucket(rate, burst)
+        # Guards the local bucket and the pending changes between the loop and the writer thread
+        self._lock = threading.Lock()
+        self._spent = 0.0
+        self._throttle: Optional[Tuple[float, float]] = None
+        self._recover = 0.0
+        self._max_rate = rate
+        self._created = False
+        # Set on every change, cleared by sync; a new bucket first needs its row
+        self.dirty = True
+
+    def _create_row(self, db: sqlite3.Connection, now: float):
+        db.execute(
+            "INSERT OR IGNORE INTO buckets (engine, tokens, rate, blocked_until, updated) VALUES (?, ?, ?, 0, ?)",
+            (self.engine, float(self.burst), self.rate, now),
+        )
+        # A lowered limit applies at once; a raised one is reached by recovering
+        db.execute("UPDATE buckets SET rate = MIN(rate, ?) WHERE engine = ?", (self.rate, self.engine))
+        # Times from before a reboot are meaningless on the new monotonic clock
+        db.execute(
+            "UPDATE buckets SET tokens = ?, blocked_until = 0, updated = ? WHERE engine = ? AND updated > ?",
+            (float(self.burst), now, self.engine, now),
+        )
+
+    def sync(self):
+        """Charge the pending changes to the shared row and adopt its state (writer thread only)"""
+        with self._lock:
+            spent, throttle, recover = self._spent, self._throttle, self._recover
+            self._spent, self._throttle, self._recover = 0.0, None, 0.0
+            self.dirty = False
+        try:
+            with self.state_db._transaction() as db:
+                now = time.monotonic()
+                if not self._created:
+                    self._create_row(db, now)
+                tokens, rate, blocked_until, updated = db.execute(
+                    "SELECT tokens, rate, blocked_until, updated FROM buckets WHERE engine = ?", (self.engine,)
+                ).fetchone()
+                # No tokens accrue while backing off, so a throttled engine resumes gently
+                start = max(updated, min(blocked_until, now))
+                tokens = max(min(self.burst, tokens + max(now - start, 0.0) * rate) - spent, -float(self.burst))
+                if throttle is not None:
+                    blocked_until = max(blocked_until, throttle[0])
+                    rate = max(rate / 2, throttle[1])
+                    tokens = min(tokens, 0.0)
+                if recover and rate < self._max_rate:
+                    rate = min(self._max_rate, rate + recover)
+                db.execute(
+                    "UPDATE buckets SET tokens = ?, rate = ?, blocked_until = ?, updated = ? WHERE engine = ?",
+                    (tokens, rate, blocked_until, max(now, updated), self.engine),
+                )
+        except BaseException:
+            # Not applied: keep it for the next sync
+            with self._lock:
+                self._spent += spent
+                if throttle is not None:
+                    self._merge_throttle(*throttle)
+                self._recover += recover
+                self.dirty = True
+            raise
+        self._created = True
+        with self._lock:
+            # Tokens taken while the transaction ran are still pending; count them against the copy
+            self.local.tokens = tokens - self._spent
+            self.local.rate = rate
+            self.local.blocked_until = blocked_until
+            self.local._updated = now
+
+    def _merge_throttle(self, until: float, min_rate: float):
+        if self._throttle is None:
+            self._throttle = (until, min_rate)
+        else:
+            self._throttle = (max(self._throttle[0], until), min_rate)
+
+    def take(self, now: float) -> bool:
+        with self._lock:
+            if not self.local.take(now):
+                return False
+            self._spent += 1
+            self.dirty = True
+        self.state_db._wake.set()
+        return True
+
+    def put_back(self):
+        with self._lock:
+            self.local.put_back()
+            self._spent -= 1
+            self.dirty = True
+        self.state_db._wake.set()
+
+    def wait_for(self, tokens: float, now: float) -> float:
+        with self._lock:
+            return self.local.wait_for(tokens, now)
+
+    def throttle(self, until: float, min_rate: float, now: float):
+        with self._lock:
+            self.local.throttle(until, min_rate, now)
+            self._merge_throttle(until, min_rate)
+            self.dirty = True
+        self.state_db._wake.set()
+
+    def recover(self, step: float, max_rate: float, now: float):
+        with self._lock:
+            if self.local.rate >= max_rate:
+                return
+            self.local.recover(step, max_rate, now)
+            self._recover += step
+            self._max_rate = max_rate
+            self.dirty = True
+        self.state_db._wake.set()
+
+    def state(self, now: float) -> Tuple[float, float, float]:
+        """As of the last sync, plus this worker's changes since"""
+        with self._lock:
+            return self.local.state(now)
+
+
+def open_shared_state(path: str = SHARED_STATE_PATH) -> Optional[SharedState]:
+    return SharedState(path) if path else None
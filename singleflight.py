@@ -0,0 +1,61 @@
+"""Request coalescing: concurrent callers of the same key share one in-flight call"""
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict
+
+# How many completed flights to remember for the stats endpoint
+RECENT_FLIGHTS = 100
+
+
+class Flight:
+    __slots__ = ("task", "served")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.served = 1
+
+
+class SingleFlight:
+    """Deduplicate identical concurrent awaitables by key.
+
+    The shared call runs in its own task, so a caller that is cancelled (for
+    example a client that disconnects) never cancels it for the others.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+        self.flights = 0
+        self.coalesced = 0
+        self.max_served = 0
+        self.recent = deque(maxlen=RECENT_FLIGHTS)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._flights
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is not None:
+            flight.served += 1
+            self.coalesced += 1
+        else:
+            flight = Flight(asyncio.create_task(fn()))
+            self._flights[key] = flight
+            self.flights += 1
+            flight.task.add_done_callback(lambda task: self._finish(key, flight))
+        return await asyncio.shield(flight.task)
+
+    def _finish(self, key: str, flight: Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        self.max_served = max(self.max_served, flight.served)
+        self.recent.append({"key": key.replace("\x1f", " | "), "served": flight.served})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "flights": self.flights,
+            "coalesced": self.coalesced,
+            "requests_served": self.flights + self.coalesced,
+            "max_served": self.max_served,
+            "in_flight": {key.replace("\x1f", " | "): flight.served for key, flight in self._flights.items()},
+            "recent": list(self.recent),
+        }
@@ -0,0 +1,6 @@
+function openAllLinks() {
+    const links = document.querySelectorAll('.search-link');
+    links.forEach(link => {
+        window.open(link.href, '_blank');
+    });
+}
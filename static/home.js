@@ -0,0 +1,56 @@
+function getSearchQuery() {
+    const input = document.getElementById('searchInput');
+    const query = input.value.trim();
+    if (!query) {
+        alert('Please enter a search query');
+        return null;
+    }
+    return encodeURIComponent(query);
+}
+
+function searchAll() {
+    const query = getSearchQuery();
+    if (query) {
+        window.open(`/unified-search?q=${query}`, '_blank');
+    }
+}
+
+function searchGitHub() {
+    const query = getSearchQuery();
+    if (query) {
+        window.open(`/browser-search?q=${query}&engine=gh&redirect=true`, '_blank');
+    }
+}
+
+function searchGoogle() {
+    const query = getSearchQuery();
+    if (query) {
+        window.open(`/browser-search?q=${query}&engine=gg&redirect=true`, '_blank');
+    }
+}
+
+function searchYouTube() {
+    const query = getSearchQuery();
+    if (query) {
+        window.open(`/browser-search?q=${query}&engine=yt&redirect=true`, '_blank');
+    }
+}
+
+function searchAI() {
+    const query = getSearchQuery();
+    if (query) {
+        window.open(`/multi-search?q=${query}&engines=p,you,andi,felo`, '_blank');
+    }
+}
+
+// Enter key support
+document.getElementById('searchInput').addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') {
+        searchAll();
+    }
+});
+
+// Focus search input on page load
+document.addEventListener('DOMContentLoaded', function() {
+    document.getElementById('searchInput').focus();
+});
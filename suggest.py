@@ -0,0 +1,240 @@
+"""Query completions for the browser search box (``/suggestions``).
+
+The index is a sorted list of normalized queries plus a popularity count for
+each: the queries starting with a prefix form one contiguous slice, found
+with two binary searches, and the slice's most popular entries are the
+suggestions. Searches add their query as they arrive (``bisect.insort``),
+and engine shortcuts and names seed the index so a fresh install still
+completes something. A searched query is only suggested once it has been
+searched ``SUGGEST_MIN_COUNT`` times, so one person's query is not offered
+to everyone else; until then it is counted but kept out of the sorted list.
+One- and two-character prefixes match too much of the
+index to scan per keystroke, so their top entries are kept up to date as
+counts grow.
+
+Counts are saved every ``SUGGEST_FLUSH_INTERVAL`` seconds and at shutdown to
+``SUGGEST_PATH``: one JSON document holding the already sorted queries and
+their counts, so startup is a single ``json.loads`` with no sorting. Workers
+sharing the file add their new counts to what is on disk under a file lock
+and pick up each other's queries from the merged result.
+"""
+import asyncio
+import bisect
+import fcntl
+import heapq
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SUGGEST_PATH = os.environ.get("SUGGEST_PATH", os.path.join(tempfile.gettempdir(), "aggsearch-suggestions.json"))
+SUGGEST_FLUSH_INTERVAL = float(os.environ.get("SUGGEST_FLUSH_INTERVAL", "30"))
+# Least popular queries are dropped beyond this many
+SUGGEST_MAX_ENTRIES = int(os.environ.get("SUGGEST_MAX_ENTRIES", "100000"))
+# Searches a query needs before it is suggested (seeds are suggested at once)
+SUGGEST_MIN_COUNT = int(os.environ.get("SUGGEST_MIN_COUNT", "2"))
+# Longer queries are not worth completing (and are often pasted text)
+SUGGEST_MAX_QUERY_CHARS = 100
+# Most completions one lookup may ask for
+SUGGEST_MAX_LIMIT = 20
+# Prefixes this short match a large part of the index, so their top entries
+# are kept up to date as counts change instead of being searched for
+CACHED_PREFIX_CHARS = 2
+# Seeds rank below any query that was actually searched twice
+SEED_WEIGHT = 1
+
+FORMAT_VERSION = 1
+
+
+def normalize_prefix(text: str) -> str:
+    """Case and whitespace folded like ``cache.normalize_query``, keeping one trailing space.
+
+    The trailing space matters while typing: "rust " should not complete to "rustlings".
+    """
+    folded = " ".join(text.lower().split())
+    if folded and text[-1:].isspace():
+        folded += " "
+    return folded
+
+
+class SuggestionIndex:
+    """Sorted queries with popularity counts, updated in place"""
+
+    def __init__(
+        self,
+        path: str = SUGGEST_PATH,
+        max_entries: int = SUGGEST_MAX_ENTRIES,
+        seeds: Iterable[str] = (),
+        min_count: int = SUGGEST_MIN_COUNT,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.min_count = min_count
+        self.seeds = [normalize_prefix(seed).strip() for seed in seeds]
+        self._seed_keys = set(self.seeds)
+        # The suggestible queries, sorted; ``counts`` also has those searched too rarely so far
+        self.keys: List[str] = []
+        self.counts: Dict[str, int] = {}
+        # Searches recorded since the last save
+        self.pending: Dict[str, int] = {}
+        # Short prefix -> its SUGGEST_MAX_LIMIT most popular queries
+        self.top: Dict[str, List[str]] = {}
+        self.saved_at = 0.0
+        self.last_error: Optional[str] = None
+        self.counters = {"lookups": 0, "recorded": 0, "saves": 0, "save_errors": 0, "load_ms": 0.0}
+        self._install(*self._read_with_timing())
+
+    def _rank(self, key: str) -> Tuple[int, str]:
+        return -self.counts[key], key
+
+    def _listed(self, key: str, count: int) -> bool:
+        return count >= self.min_count or key in self._seed_keys
+
+    def _add(self, key: str, count: int):
+        before = self.counts.get(key)
+        self.counts[key] = (before or 0) + count
+        if not self._listed(key, self.counts[key]):
+            return
+        if before is None or not self._listed(key, before):
+            bisect.insort(self.keys, key)
+        # Counts only grow, so a key can only move up into a short prefix's top list
+        for length in range(1, CACHED_PREFIX_CHARS + 1):
+            top = self.top.get(key[:length]) if len(key) >= length else None
+            if top is None:
+                continue
+            if key not in top:
+                if len(top) >= SUGGEST_MAX_LIMIT and self._rank(key) > self._rank(top[-1]):
+                    continue
+                top.append(key)
+            top.sort(key=self._rank)
+            del top[SUGGEST_MAX_LIMIT:]
+
+    def _install(self, keys: List[str], counts: Dict[str, int]):
+        """Replace the index with saved counts, then add the seeds and unsaved searches"""
+        self.keys = [key for key in keys if self._listed(key, counts[key])]
+        self.counts = counts
+        self.top = {}
+        for seed in self.seeds:
+            if seed and seed not in self.counts:
+                self._add(seed, SEED_WEIGHT)
+        for key, count in self.pending.items():
+            self._add(key, count)
+
+    def record(self, query: str):
+        """Count one search for ``query``"""
+        key = normalize_prefix(query).strip()
+        if not key or len(key) > SUGGEST_MAX_QUERY_CHARS:
+            return
+        self._add(key, 1)
+        self.pending[key] = self.pending.get(key, 0) + 1
+        self.counters["recorded"] += 1
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[str]:
+        """The ``limit`` most popular queries starting with ``prefix``; ties in alphabetical order"""
+        self.counters["lookups"] += 1
+        prefix = normalize_prefix(prefix)
+        if not prefix:
+            return []
+        if len(prefix) <= CACHED_PREFIX_CHARS:
+            top = self.top.get(prefix)
+            if top is None:
+                top = self.top[prefix] = self._search(prefix, SUGGEST_MAX_LIMIT)
+            return top[:limit]
+        return self._search(prefix, limit)
+
+    def _search(self, prefix: str, limit: int) -> List[str]:
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        matches = self.keys[lo:hi]
+        # Both keep the alphabetical order of equal counts
+        if len(matches) > limit:
+            return heapq.nlargest(limit, matches, key=self.counts.__getitem__)
+        matches.sort(key=self.counts.__getitem__, reverse=True)
+        return matches
+
+    def _read(self) -> Tuple[List[str], Dict[str, int]]:
+        if not self.path:
+            return [], {}
+        try:
+            with open(self.path, "rb") as f:
+                data = json.loads(f.read())
+            if data.get("version") != FORMAT_VERSION:
+                return [], {}
+            keys, counts = data["queries"], data["counts"]
+            return keys, dict(zip(keys, counts))
+        except FileNotFoundError:
+            return [], {}
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            # A damaged file only loses history; completions rebuild as people search
+            self.last_error = f"load: {e!r}"
+            return [], {}
+
+    def _read_with_timing(self) -> Tuple[List[str], Dict[str, int]]:
+        started = time.perf_counter()
+        loaded = self._read()
+        self.counters["load_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return loaded
+
+    def _merge_into_file(self, pending: Dict[str, int]) -> Tuple[List[str], Dict[str, int]]:
+        """Add ``pending`` to the counts on disk and write them back, under the file lock"""
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            _, counts = self._read()
+            for key, count in pending.items():
+                counts[key] = counts.get(key, 0) + count
+            if len(counts) > self.max_entries:
+                counts = dict(heapq.nlargest(self.max_entries, counts.items(), key=lambda item: item[1]))
+            keys = sorted(counts)
+            payload = json.dumps(
+                {"version": FORMAT_VERSION, "queries": keys, "counts": [counts[key] for key in keys]},
+                ensure_ascii=False, separators=(",", ":"),
+            ).encode("utf-8")
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".suggestions-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        return keys, counts
+
+    async def save(self):
+        """Write new counts to disk and adopt the merged counts of every worker"""
+        if not self.path:
+            return
+        pending, self.pending = self.pending, {}
+        try:
+            keys, counts = await asyncio.to_thread(self._merge_into_file, pending)
+        except OSError as e:
+            for key, count in pending.items():
+                self.pending[key] = self.pending.get(key, 0) + count
+            self.counters["save_errors"] += 1
+            self.last_error = f"save: {e!r}"
+            return
+        # Searches recorded while the file was written are still pending and are re-added
+        self._install(keys, counts)
+        self.saved_at = time.time()
+        self.counters["saves"] += 1
+
+    async def run_saver(self, interval: float = SUGGEST_FLUSH_INTERVAL):
+        """Save periodically until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            if self.pending:
+                await self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "entries": len(self.keys),
+            "counted": len(self.counts),
+            "min_count": self.min_count,
+            "pending": len(self.pending),
+            "max_entries": self.max_entries,
+            "path": self.path or None,
+            "saved_at": self.saved_at or None,
+            "last_error": self.last_error,
+        }
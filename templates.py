@@ -0,0 +1,151 @@
+"""Pre-rendered HTML shells and static assets for the browser-facing pages.
+
+Everything that does not depend on the query (page chrome, per-category engine
+cards, CSS and JS) is rendered once when this module is imported; assets are
+precompressed at the same time. A page is
+stored as its static text split around the few per-request slots, so serving
+it is a single join.
+
+Engine URLs are baked into the shell as their pre-escaped template prefix and
+suffix around an ``{{encoded}}`` slot. ``quote_plus`` output only contains
+characters that are safe in HTML text and attributes, so the encoded query can
+be spliced in as-is.
+"""
+import os
+import re
+from html import escape
+from typing import Dict, List, Mapping
+from urllib.parse import quote_plus
+
+from compression import Precompressed
+from engines import CATEGORY_ROUTES, Engine
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+
+# Asset URLs carry a content hash, so browsers may cache them indefinitely
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+ASSET_MEDIA_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+}
+
+SLOT = re.compile(r"\{\{([\w:.\-]+)\}\}")
+
+
+class Asset(Precompressed):
+    __slots__ = ("name", "url")
+
+    def __init__(self, name: str, body: bytes, media_type: str):
+        super().__init__(body, media_type)
+        self.name = name
+        self.url = f"/static/{name}?v={self.etag[1:13]}"
+
+
+def load_assets(directory: str = STATIC_DIR) -> Dict[str, Asset]:
+    assets = {}
+    for name in sorted(os.listdir(directory)):
+        media_type = ASSET_MEDIA_TYPES.get(os.path.splitext(name)[1])
+        if media_type is None:
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            assets[name] = Asset(name, f.read(), media_type)
+    return assets
+
+
+ASSETS = load_assets()
+
+
+class PageTemplate:
+    """A static shell split around its per-request slots"""
+
+    __slots__ = ("parts", "slots")
+
+    def __init__(self, text: str, static_values: Mapping[str, str]):
+        # Fill everything known at startup; only request-time slots remain
+        text = SLOT.sub(lambda match: static_values.get(match.group(1), match.group(0)), text)
+        pieces = SLOT.split(text)
+        self.parts: List[str] = pieces[0::2]
+        self.slots: List[str] = pieces[1::2]
+
+    def render(self, values: Mapping[str, str]) -> str:
+        out = [self.parts[0]]
+        for slot, part in zip(self.slots, self.parts[1:]):
+            out.append(values[slot])
+            out.append(part)
+        return "".join(out)
+
+
+def load_template(name: str, categories: str) -> PageTemplate:
+    with open(os.path.join(TEMPLATES_DIR, name), encoding="utf-8") as f:
+        text = f.read()
+    static_values = {f"asset:{asset.name}": asset.url for asset in ASSETS.values()}
+    static_values["categories"] = categories
+    return PageTemplate(text, static_values)
+
+
+def url_slot(engine: Engine) -> str:
+    """The engine's search URL with the encoded query left as a slot"""
+    return escape(engine.prefix) + "{{encoded}}" + escape(engine.suffix)
+
+
+def home_categories() -> str:
+    fragments = []
+    for category, icon, engines in CATEGORY_ROUTES:
+        spans = "".join(f'<span class="engine">{escape(engine.key)}</span>' for engine in engines)
+        fragments.append(
+            f'            <div class="category">\n'
+            f'                <h3>{escape(category)}</h3>\n'
+            f'                <div class="engines">{spans}</div>\n'
+            f'            </div>'
+        )
+    return "\n".join(fragments)
+
+
+def unified_categories() -> str:
+    fragments = []
+    for category, icon, engines in CATEGORY_ROUTES:
+        cards = "".join(
+            f'\n            <div class="search-card">\n'
+            f'                <div class="engine-header">\n'
+            f'                    <div class="engine-name">{escape(engine.name)}</div>\n'
+            f'                    <div class="engine-icon">{engine.icon}</div>\n'
+            f'                </div>\n'
+            f'                <a href="{url_slot(engine)}" target="_blank" class="search-link">Search on {escape(engine.name)}</a>\n'
+            f'            </div>'
+            for engine in engines
+        )
+        fragments.append(
+            f'        <div class="category"><div class="category-title">{icon} {escape(category)}</div>'
+            f'<div class="search-grid">{cards}\n        </div></div>'
+        )
+    return "\n".join(fragments)
+
+
+def browser_categories() -> str:
+    fragments = []
+    for category, icon, engines in CATEGORY_ROUTES:
+        cards = "".join(
+            f'\n            <div class="search-card">\n'
+            f'                <div class="engine-name">{escape(engine.name)}</div>\n'
+            f'                <a href="{url_slot(engine)}" target="_blank" class="search-link">{url_slot(engine)}</a>\n'
+            f'            </div>'
+            for engine in engines
+        )
+        fragments.append(
+            f'        <div class="category"><div class="category-title">{escape(category)}</div>'
+            f'<div class="search-grid">{cards}\n        </div></div>'
+        )
+    return "\n".join(fragments)
+
+
+HOME_PAGE = Precompressed(load_template("home.html", home_categories()).render({}).encode("utf-8"), "text/html; charset=utf-8")
+UNIFIED_PAGE = load_template("unified.html", unified_categories())
+BROWSER_PAGE = load_template("browser.html", browser_categories())
+
+
+def page_values(query: str) -> Dict[str, str]:
+    """Per-request values for the unified and browser pages"""
+    return {"query": escape(query), "encoded": quote_plus(query)}
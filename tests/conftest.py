@@ -0,0 +1,28 @@
+import pytest
+
+import breaker
+import cache
+
+# Modules whose ``time`` the ``clock`` fixture replaces
+CLOCKED_MODULES = (breaker, cache)
+
+
+class Clock:
+    """Stands in for the ``time`` module; advance it by adding to ``now``"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    for module in CLOCKED_MODULES:
+        monkeypatch.setattr(module, "time", clock)
+    return clock
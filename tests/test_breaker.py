@@ -0,0 +1,73 @@
+import breaker
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def trip(circuit):
+    for _ in range(breaker.BREAKER_MIN_SAMPLES):
+        circuit.record(503, 0.1)
+
+
+def test_failures_open_the_circuit(clock):
+    circuit = CircuitBreaker("e")
+    for _ in range(breaker.BREAKER_MIN_SAMPLES - 1):
+        circuit.record(503, 0.1)
+    assert circuit.state == CLOSED
+    circuit.record(0, 0.1)
+    assert circuit.state == OPEN
+    assert not circuit.allow()
+    assert circuit.skipped == 1
+
+
+def test_open_half_open_closed_cycle(clock):
+    circuit = CircuitBreaker("e", probe_interval=10)
+    trip(circuit)
+    clock.now += breaker.BREAKER_OPEN_SECONDS
+
+    # One probe at a time once half-open
+    assert circuit.allow()
+    assert circuit.state == HALF_OPEN
+    assert not circuit.allow()
+
+    circuit.record(200, 0.1)
+    assert circuit.state == CLOSED
+    assert circuit.allow()
+    assert len(circuit.outcomes) == 1
+
+
+def test_failed_probe_reopens_for_twice_as_long(clock):
+    circuit = CircuitBreaker("e")
+    trip(circuit)
+    clock.now += breaker.BREAKER_OPEN_SECONDS
+    assert circuit.allow()
+
+    circuit.record(503, 0.1)
+    assert circuit.state == OPEN
+    assert circuit.retry_in() == breaker.BREAKER_OPEN_SECONDS * 2
+    assert circuit.trips == 2
+
+
+def test_probe_that_never_reports_back_is_replaced_after_the_probe_interval(clock):
+    circuit = CircuitBreaker("e", probe_interval=10)
+    trip(circuit)
+    clock.now += breaker.BREAKER_OPEN_SECONDS
+    assert circuit.allow()
+    clock.now += 9
+    assert not circuit.allow()
+    clock.now += 1
+    assert circuit.allow()
+
+
+def test_released_probe_lets_the_next_fetch_probe(clock):
+    circuit = CircuitBreaker("e", probe_interval=10)
+    trip(circuit)
+    clock.now += breaker.BREAKER_OPEN_SECONDS
+    assert circuit.allow()
+    circuit.release_probe()
+    assert circuit.allow()
+
+
+def test_slow_responses_open_the_circuit(clock):
+    circuit = CircuitBreaker("e")
+    for _ in range(breaker.BREAKER_MIN_SAMPLES):
+        circuit.record(200, breaker.BREAKER_SLOW_SECONDS)
+    assert circuit.state == OPEN
@@ -0,0 +1,111 @@
+import asyncio
+
+import cache
+from cache import FRESH, MISS, STALE, ResultCache, make_key
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_fresh_then_stale_then_miss(clock):
+    results = ResultCache(default_ttl=10, stale_ttl=20, engine_ttls={})
+    key = make_key("e", "query", False)
+    assert run(results.get(key)) == (MISS, None)
+
+    run(results.set(key, "e", {"n": 1}))
+    assert run(results.get(key)) == (FRESH, {"n": 1})
+    clock.now += 10
+    assert run(results.get(key)) == (STALE, {"n": 1})
+    clock.now += 20
+    assert run(results.get(key)) == (MISS, None)
+    assert len(results.memory) == 0
+    assert results.counters == {"memory_hits": 2, "disk_hits": 0, "stale_hits": 1, "misses": 2, "stores": 1}
+
+
+def test_engine_ttl_overrides_the_default(clock):
+    results = ResultCache(default_ttl=10, stale_ttl=0, engine_ttls={"slow": 100})
+    run(results.set("a", "slow", {}))
+    run(results.set("b", "other", {}))
+    clock.now += 50
+    assert run(results.get("a"))[0] == FRESH
+    assert run(results.get("b"))[0] == MISS
+
+
+def test_refresh_makes_a_stale_entry_fresh_again(clock):
+    results = ResultCache(default_ttl=10, stale_ttl=20, engine_ttls={})
+    run(results.set("k", "e", {"n": 1}))
+    clock.now += 15
+    assert run(results.get("k"))[0] == STALE
+    run(results.set("k", "e", {"n": 2}))
+    assert run(results.get("k")) == (FRESH, {"n": 2})
+
+
+def test_disk_layer_serves_what_memory_evicted(clock, tmp_path):
+    results = ResultCache(max_bytes=30, disk_path=str(tmp_path / "cache.db"), default_ttl=10, stale_ttl=20, engine_ttls={})
+    run(results.set("a", "e", {"value": "a" * 10}))
+    run(results.set("b", "e", {"value": "b" * 10}))
+    assert results.memory.evictions == 1
+
+    assert run(results.get("a")) == (FRESH, {"value": "a" * 10})
+    assert results.counters["disk_hits"] == 1
+    clock.now += 10
+    assert run(results.get("a"))[0] == STALE
+    clock.now += 20
+    assert run(results.get("a"))[0] == MISS
+    assert run(results.stats())["disk_entries"] == 2
+    results.close()
+
+
+def test_memory_layer_is_bounded_by_bytes():
+    lru = cache.MemoryLRU(max_bytes=10)
+    lru.set("a", cache.CacheEntry(b"12345", 0, 0))
+    lru.set("b", cache.CacheEntry(b"12345", 0, 0))
+    lru.get("a")
+    lru.set("c", cache.CacheEntry(b"12345", 0, 0))
+    assert lru.get("b") is None and lru.get("a") is not None
+    assert lru.bytes == 10
+    lru.set("huge", cache.CacheEntry(b"x" * 11, 0, 0))
+    assert lru.get("huge") is None
+
+
+def test_disk_purge_drops_expired_then_soonest_expiring_entries(tmp_path):
+    disk = cache.DiskStore(str(tmp_path / "cache.db"), max_bytes=10)
+    disk.set("expired", cache.CacheEntry(b"12345", 0, 50))
+    disk.set("soon", cache.CacheEntry(b"12345", 0, 200))
+    disk.set("latest", cache.CacheEntry(b"12345", 0, 400))
+    disk.set("later", cache.CacheEntry(b"12345", 0, 300))
+
+    assert disk.purge(now=100) == 2
+    assert disk.get("expired") is None and disk.get("soon") is None
+    assert disk.get("later") is not None and disk.get("latest") is not None
+    assert (disk.expired, disk.evictions) == (1, 1)
+    disk.close()
+
+
+def test_unbounded_disk_store_only_purges_expired_entries(tmp_path):
+    disk = cache.DiskStore(str(tmp_path / "cache.db"), max_bytes=0)
+    for key in "abc":
+        disk.set(key, cache.CacheEntry(b"x" * 100, 0, 200))
+    assert disk.purge(now=100) == 0
+    assert disk.count() == 3
+    disk.close()
+
+
+def test_purger_runs_periodically_until_cancelled(tmp_path):
+    async def scenario():
+        results = ResultCache(disk_path=str(tmp_path / "cache.db"), default_ttl=0, stale_ttl=0, engine_ttls={})
+        await results.set("a", "e", {"n": 1})
+        purger = asyncio.create_task(results.run_purger(interval=0.01))
+        await asyncio.sleep(0.05)
+        purger.cancel()
+        count = results.disk.count()
+        results.close()
+        return count
+
+    assert run(scenario()) == 0
+
+
+def test_keys_ignore_case_and_spacing():
+    assert make_key("e", "  Rust   Async ", True) == make_key("e", "rust async", True)
+    assert make_key("e", "rust", True) != make_key("e", "rust", False)
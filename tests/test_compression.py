@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from compression import BROTLI_AVAILABLE, CompressionMiddleware, choose_encoding, etag_matches
+
+# What a client accepting every encoding gets
+PREFERRED = "br" if BROTLI_AVAILABLE else "gzip"
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("br, gzip", PREFERRED),
+    ("gzip;q=0", None),
+    ("gzip;q=0, *", "br" if BROTLI_AVAILABLE else None),
+    ("*;q=0.1", PREFERRED),
+    ("identity;q=0", None),
+    ("gzip, identity;q=0", "gzip"),
+    ("deflate", None),
+    ("gzip;q=bogus", None),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_choose_encoding_prefers_the_higher_weight():
+    if not BROTLI_AVAILABLE:
+        pytest.skip("brotli is not installed")
+    assert choose_encoding("br;q=0.2, gzip;q=0.8") == "gzip"
+
+
+@pytest.mark.parametrize("header,matches", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", "abc"', True),
+    ("*", True),
+    ('"other"', False),
+    ("", False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, '"abc"') is matches
+
+
+async def large(request):
+    return JSONResponse({"data": "x" * 4096})
+
+
+async def small(request):
+    return JSONResponse({"data": "x"})
+
+
+async def stream(request):
+    async def frames():
+        for i in range(3):
+            yield f'{{"frame": {i}, "padding": "{"x" * 1024}"}}\n'.encode()
+    return StreamingResponse(frames(), media_type="application/json")
+
+
+APP = CompressionMiddleware(Starlette(routes=[Route("/large", large), Route("/small", small), Route("/stream", stream)]))
+
+
+def get(path: str, accept_encoding: str) -> httpx.Response:
+    async def request():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=APP), base_url="http://test") as client:
+            return await client.get(path, headers={"Accept-Encoding": accept_encoding})
+    return asyncio.run(request())
+
+
+def test_complete_bodies_are_compressed():
+    response = get("/large", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < 4096
+    assert response.json() == {"data": "x" * 4096}
+
+
+def test_small_bodies_and_clients_without_gzip_are_left_alone():
+    assert "content-encoding" not in get("/small", "gzip").headers
+    assert "content-encoding" not in get("/large", "identity").headers
+
+
+def test_streamed_responses_pass_through_uncompressed():
+    response = get("/stream", "gzip")
+    assert "content-encoding" not in response.headers
+    lines = response.text.splitlines()
+    assert [line[:11] for line in lines] == ['{"frame": 0', '{"frame": 1', '{"frame": 2']
@@ -0,0 +1,55 @@
+"""Every extractor against its fixture corpus, with every installed parser backend.
+
+A fixture is ``fixtures/extractors/<engine>/v<version>.html`` with the
+expected results in ``v<version>.json``. Bump the extractor's ``version`` and
+add a fixture pair whenever an engine's markup changes; fixtures of older
+versions stay checked until they are deleted.
+"""
+import glob
+import json
+import os
+
+import pytest
+
+from extractors import EXTRACTORS, FIXTURES_DIR, fixture_paths
+from parsers import BACKENDS
+
+
+def fixture_versions(engine: str):
+    paths = glob.glob(os.path.join(FIXTURES_DIR, engine, "v*.html"))
+    return sorted(int(os.path.basename(path)[1:-len(".html")]) for path in paths)
+
+
+CASES = [
+    (engine, version, backend)
+    for engine in sorted(EXTRACTORS)
+    for version in fixture_versions(engine)
+    for backend in sorted(BACKENDS)
+]
+
+
+@pytest.mark.parametrize("engine", sorted(EXTRACTORS))
+def test_current_version_has_a_fixture(engine):
+    html_path, json_path = fixture_paths(engine, EXTRACTORS[engine].version)
+    assert os.path.exists(html_path) and os.path.exists(json_path)
+
+
+@pytest.mark.parametrize("engine,version,backend", CASES)
+def test_extractor_matches_fixture(engine, version, backend):
+    html_path, json_path = fixture_paths(engine, version)
+    with open(html_path, encoding="utf-8") as f:
+        html = f.read()
+    with open(json_path, encoding="utf-8") as f:
+        expected = json.load(f)
+
+    assert BACKENDS[backend].extract(html, EXTRACTORS[engine].selectors) == expected
+
+
+@pytest.mark.parametrize("engine,version,backend", CASES)
+def test_extractor_accepts_utf8_bytes(engine, version, backend):
+    html_path, _ = fixture_paths(engine, version)
+    with open(html_path, "rb") as f:
+        data = f.read()
+    selectors = EXTRACTORS[engine].selectors
+
+    assert BACKENDS[backend].extract(data, selectors) == BACKENDS[backend].extract(data.decode("utf-8"), selectors)
@@ -0,0 +1,73 @@
+import pytest
+
+from fusion import RRF_K, canonical_url, merge_results, title_key, unwrap_redirect, url_key
+
+
+def result(title: str, link: str, snippet: str = "") -> dict:
+    return {"title": title, "link": link, "snippet": snippet or title}
+
+
+@pytest.mark.parametrize("wrapped,target", [
+    ("/url?q=https://example.com/a&sa=U", "https://example.com/a"),
+    ("https://www.google.com/url?url=https://example.com/b", "https://example.com/b"),
+    ("https://duckduckgo.com/l/?uddg=https%3A%2F%2Fexample.com%2Fc", "https://example.com/c"),
+    ("/url?q=/relative", "/url?q=/relative"),
+    ("https://example.com/url?q=https://elsewhere.com/", "https://example.com/url?q=https://elsewhere.com/"),
+])
+def test_unwrap_redirect(wrapped, target):
+    assert unwrap_redirect(wrapped) == target
+
+
+def test_canonical_url_resolves_and_strips_tracking():
+    assert canonical_url("/docs?utm_source=x&page=2#top", "https://Example.com/search") == "https://example.com/docs?page=2"
+    assert canonical_url("https://example.com:443?gclid=1") == "https://example.com/"
+    assert canonical_url("http://example.com:8080/a") == "http://example.com:8080/a"
+    assert canonical_url("mailto:someone@example.com") == "mailto:someone@example.com"
+
+
+def test_url_key_ignores_scheme_www_trailing_slash_and_parameter_order():
+    assert url_key("https://www.example.com/a/?x=1&y=2") == url_key("http://example.com/a?y=2&x=1")
+    assert url_key("https://example.com/a") != url_key("https://example.com/b")
+
+
+def test_title_suffix_is_dropped_only_when_it_names_the_host():
+    plain = title_key("Python asyncio streams guide")
+    assert title_key("Python asyncio streams guide - Stack Overflow", "https://stackoverflow.com/q/1") == plain
+    assert title_key("Python asyncio streams guide | Python.org", "https://docs.python.org/3/") == plain
+    assert title_key("Python asyncio streams guide - Stack Overflow", "https://example.com/q/1") != plain
+    assert title_key("Python - Wikipedia", "https://en.wikipedia.org/wiki/Python") is None
+    assert title_key("Home") is None
+
+
+def test_engines_agreeing_on_an_item_outrank_a_single_top_result():
+    merged = merge_results([
+        ("a", "", [result("Only on a", "https://a.example/"), result("Shared page", "https://shared.example/")]),
+        ("b", "", [result("Only on b", "https://b.example/"), result("Shared page", "https://shared.example/")]),
+    ])
+    assert [item["title"] for item in merged] == ["Shared page", "Only on a", "Only on b"]
+    assert merged[0]["engines"] == ["a", "b"]
+    assert merged[0]["score"] == round(2 / (RRF_K + 2), 6)
+    assert merged[1]["score"] == round(1 / (RRF_K + 1), 6)
+
+
+def test_results_merge_by_canonical_url():
+    merged = merge_results([
+        ("gg", "https://www.google.com/search", [result("FastAPI docs", "/url?q=https://fastapi.tiangolo.com/&sa=U")]),
+        ("brave", "", [result("FastAPI", "https://fastapi.tiangolo.com?utm_source=brave", "The web framework")]),
+    ])
+    assert len(merged) == 1
+    item = merged[0]
+    assert item["link"] == "https://fastapi.tiangolo.com/"
+    assert item["title"] == "FastAPI docs"
+    # The best-ranked copy had no snippet of its own
+    assert item["snippet"] == "The web framework"
+    assert item["engines"] == ["gg", "brave"]
+
+
+def test_results_merge_by_title_across_mirrors():
+    merged = merge_results([
+        ("a", "", [result("How to stream responses in FastAPI - Stack Overflow", "https://stackoverflow.com/q/1")]),
+        ("b", "", [result("How to stream responses in FastAPI", "https://mirror.example/q/1")]),
+        ("c", "", [result("How to stream responses in FastAPI - Tutorial", "https://blog.example/1")]),
+    ])
+    assert [item["engines"] for item in merged] == [["a", "b"], ["c"]]
@@ -0,0 +1,70 @@
+import pytest
+
+import hedging
+from hedging import Hedger, LatencyHistogram
+
+
+def test_budget_is_earned_by_primaries_and_capped_at_burst():
+    hedger = Hedger(enabled=True, max_ratio=0.25, burst=2, max_in_flight=10)
+    assert hedger.try_start("e") and hedger.try_start("e")
+    assert not hedger.try_start("e")
+    assert hedger.denied == 1
+
+    for _ in range(3):
+        hedger.hedge_delay("e")
+    assert not hedger.try_start("e")
+    hedger.hedge_delay("e")
+    assert hedger.try_start("e")
+
+    for _ in range(100):
+        hedger.hedge_delay("e")
+    assert hedger.budget == 2
+
+
+def test_hedges_in_flight_are_capped():
+    hedger = Hedger(enabled=True, max_ratio=1, burst=10, max_in_flight=2)
+    assert hedger.try_start("a") and hedger.try_start("b")
+    assert not hedger.try_start("c")
+    hedger.finish("a", hedge_won=True)
+    assert hedger.try_start("c")
+    assert hedger.engine("a").hedge_wins == 1
+    assert hedger.budget == 7
+
+
+def test_budget_is_shared_by_all_engines():
+    hedger = Hedger(enabled=True, max_ratio=0.5, burst=1, max_in_flight=10)
+    assert hedger.try_start("a")
+    hedger.hedge_delay("b")
+    assert not hedger.try_start("c")
+    hedger.hedge_delay("b")
+    assert hedger.try_start("c")
+
+
+def test_only_engines_with_a_long_tail_are_hedged():
+    hedger = Hedger(enabled=True)
+    for _ in range(hedging.HEDGE_MIN_SAMPLES):
+        hedger.record("steady", 0.1)
+        hedger.record("tail", 0.1)
+    assert hedger.hedge_delay("steady") is None
+
+    for _ in range(hedging.HEDGE_MIN_SAMPLES):
+        hedger.record("tail", 1.0)
+    assert hedger.hedge_delay("tail") == pytest.approx(1.0, rel=hedging.BUCKET_GROWTH - 1)
+
+
+def test_too_few_samples_or_disabled_means_no_hedge():
+    hedger = Hedger(enabled=True)
+    for seconds in [0.1] * 5 + [1.0] * 5:
+        hedger.record("e", seconds)
+    assert hedger.hedge_delay("e") is None
+    assert Hedger(enabled=False).hedge_delay("e") is None
+
+
+def test_histogram_quantiles_and_decay():
+    histogram = LatencyHistogram(decay_every=10)
+    for seconds in [0.01] * 9 + [1.0]:
+        histogram.record(seconds)
+    assert histogram.total == 5
+    assert histogram.quantile(0.5) == pytest.approx(0.01, rel=hedging.BUCKET_GROWTH - 1)
+    assert histogram.quantile(0.95) == pytest.approx(1.0, rel=hedging.BUCKET_GROWTH - 1)
+    assert LatencyHistogram().quantile(0.5) is None
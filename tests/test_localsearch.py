@@ -0,0 +1,50 @@
+import localsearch
+from localsearch import LocalIndex
+
+
+def page(words, start, count):
+    return [
+        {"title": words, "link": f"https://site.example/{start + i}", "snippet": f"snippet {start + i}"}
+        for i in range(count)
+    ]
+
+
+def test_ranks_by_bm25_and_counts_matches():
+    index = LocalIndex()
+    index.add("gg", "https://gg.example/search", page("rust async runtime", 0, 3))
+    index.add("gh", "https://gh.example/search", page("rust web framework", 3, 2))
+
+    hits, total, exact = index.search("rust async")
+    assert (total, exact) == (5, True)
+    assert all("async" in hit["title"] for hit in hits[:3])
+    assert index.search("python") == ([], 0, True)
+
+
+def test_duplicate_pages_only_gain_engines():
+    index = LocalIndex()
+    index.add("gg", "https://gg.example/search", page("rust", 0, 1))
+    index.add("brave", "https://brave.example/search", page("rust", 0, 1))
+    hits, total, _ = index.search("rust")
+    assert total == 1
+    assert hits[0]["engines"] == ["gg", "brave"]
+
+
+def test_counts_past_the_scan_limit(monkeypatch):
+    monkeypatch.setattr(localsearch, "BM25_SCAN_LIMIT", 10)
+    index = LocalIndex()
+    index.add("gg", "https://gg.example/search", page("common", 0, 30))
+    index.add("gg", "https://gg.example/search", page("common rare", 30, 3))
+
+    assert index.search("common")[1:] == (33, True)
+    # The rare term's documents are scored, the common term's are not all walked
+    _, total, exact = index.search("common rare")
+    assert total >= 33 and not exact
+
+
+def test_oldest_documents_are_dropped_when_full():
+    index = LocalIndex(max_docs=8)
+    index.add("gg", "https://gg.example/search", page("old", 0, 8))
+    index.add("gg", "https://gg.example/search", page("new", 8, 1))
+    assert len(index.docs) == 6
+    assert index.search("old")[1] == 5
+    assert index.search("new")[1] == 1
@@ -0,0 +1,93 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from executor import ParseExecutor
+from extractors import fixture_paths
+from parsers import BACKENDS, IncrementalExtractor, extract_results
+
+ENGINES = ("gg", "gh", "brave")
+
+
+def load_fixture(engine: str):
+    html_path, json_path = fixture_paths(engine, 1)
+    with open(html_path, "rb") as f:
+        html = f.read()
+    with open(json_path, encoding="utf-8") as f:
+        return html, json.load(f)
+
+
+def feed_in_chunks(extractor: IncrementalExtractor, html: bytes, size: int) -> bool:
+    for start in range(0, len(html), size):
+        if extractor.feed(html[start:start + size]):
+            return True
+    return False
+
+
+def long_page(results: int) -> bytes:
+    items = "".join(f'<a href="https://example.com/{i}"><h3>Result {i}</h3></a>' for i in range(results))
+    return f"<html><body><div id=rso>{items}</div></body></html>".encode()
+
+
+def test_feed_stops_once_the_limit_is_complete():
+    html = long_page(200)
+    extractor = IncrementalExtractor("gg", limit=10)
+
+    assert feed_in_chunks(extractor, html, 256)
+    assert extractor.bytes_fed < len(html)
+    assert extractor.results == extract_results("gg", html, backend="lxml")
+    assert len(extractor.results) == 10
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_page_with_fewer_results_than_the_limit_is_extracted_on_close(engine):
+    html, expected = load_fixture(engine)
+    extractor = IncrementalExtractor(engine)
+
+    assert not extractor.feed(html)
+    assert extractor.close() == expected
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("size", [1, 7, 100])
+def test_chunk_boundaries_inside_tags_do_not_change_the_results(engine, size):
+    html, _ = load_fixture(engine)
+    extractor = IncrementalExtractor(engine)
+
+    assert not feed_in_chunks(extractor, html, size)
+    assert extractor.close() == extract_results(engine, html, backend="lxml")
+
+
+def test_extract_results_falls_back_to_bs4_when_the_backend_fails(monkeypatch):
+    html, expected = load_fixture("gh")
+
+    def broken(*args, **kwargs):
+        raise ValueError("unparseable")
+
+    monkeypatch.setattr(BACKENDS["lxml"], "extract", broken)
+    assert extract_results("gh", html, backend="lxml") == expected
+
+
+def test_lane_steps_share_the_executor_slots_and_report_their_wait():
+    async def scenario():
+        executor = ParseExecutor("inline", workers=1, max_queue=0)
+        lane = ThreadPoolExecutor(1)
+        html, _ = load_fixture("gg")
+        try:
+            _, _, extractor = await executor.run_on_lane(lane, IncrementalExtractor, "gg")
+            # The single slot is held by the first step, so the second waits behind it
+            steps = await asyncio.gather(
+                executor.run_on_lane(lane, extractor.feed, html),
+                executor.run_on_lane(lane, extractor.close),
+            )
+        finally:
+            lane.shutdown()
+        return executor, steps
+
+    executor, steps = asyncio.run(scenario())
+    (_, feed_time, early_stop), (close_wait, _, results) = steps
+    assert not early_stop and len(results) == 3
+    assert close_wait >= feed_time
+    assert executor.stats()["in_flight"] == 0
@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+import pytest
+
+from ratelimit import EngineLimiter, RateLimited, RateLimiter, TokenBucket, current_client, parse_retry_after
+
+
+def test_bucket_refills_at_its_rate_up_to_burst():
+    bucket = TokenBucket(rate=2.0, burst=2)
+    now = bucket._updated
+
+    assert bucket.take(now) and bucket.take(now)
+    assert not bucket.take(now)
+    assert bucket.take(now + 0.5)
+    assert not bucket.take(now + 0.5)
+    assert bucket.state(now + 60)[0] == 2
+
+
+def test_retry_after_blocks_and_halves_the_rate():
+    limiter = EngineLimiter("e", rate=4.0, burst=4, max_in_flight=4, max_wait=60)
+    before = time.monotonic()
+    limiter.record(429, "3")
+
+    tokens, rate, blocked_until = limiter.bucket.state(time.monotonic())
+    assert rate == 2.0
+    assert tokens == 0
+    assert before + 3 <= blocked_until <= time.monotonic() + 3
+    assert not limiter.bucket.take(blocked_until - 0.01)
+    # No tokens accrue during the backoff
+    assert not limiter.bucket.take(blocked_until + 0.1)
+    assert limiter.bucket.take(blocked_until + 0.5)
+
+
+def test_backoff_without_retry_after_doubles_and_success_recovers():
+    limiter = EngineLimiter("e", rate=4.0, burst=4, max_in_flight=4, max_wait=60)
+    limiter.record(503)
+    first = limiter.bucket.blocked_until - time.monotonic()
+    limiter.record(503)
+    second = limiter.bucket.blocked_until - time.monotonic()
+    assert 1.5 < first <= 2 and 3.5 < second <= 4
+    assert limiter.bucket.rate == 1.0
+
+    limiter.record(200)
+    assert limiter.consecutive_throttles == 0
+    assert limiter.bucket.rate == pytest.approx(1.4)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470) == 10
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_waiters_are_served_round_robin_across_clients():
+    async def scenario():
+        limiter = RateLimiter(rates={}, default_rate=1000, burst=100, max_in_flight=1, max_wait=5)
+        order = []
+
+        async def fetch(client, name):
+            current_client.set(client)
+            async with limiter.slot("e"):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        tasks = [asyncio.create_task(fetch(1, f"a{i}")) for i in range(4)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(fetch(2, f"b{i}")) for i in range(2)]
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["a0", "a1", "b0", "a2", "b1", "a3"]
+
+
+def test_fetch_that_would_wait_past_max_wait_is_rejected_at_once():
+    async def scenario():
+        limiter = EngineLimiter("e", rate=1.0, burst=1, max_in_flight=4, max_wait=0.2)
+        await limiter.acquire()
+        started = time.monotonic()
+        with pytest.raises(RateLimited):
+            await limiter.acquire()
+        return time.monotonic() - started, limiter.rejected
+
+    elapsed, rejected = asyncio.run(scenario())
+    assert elapsed < 0.05
+    assert rejected == 1
+
+
+def test_queued_fetch_is_rejected_after_max_wait():
+    async def scenario():
+        limiter = EngineLimiter("e", rate=1000, burst=10, max_in_flight=1, max_wait=0.05)
+        await limiter.acquire()
+        with pytest.raises(RateLimited):
+            await limiter.acquire()
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert len(limiter._waiters) == 0
+    assert limiter.in_flight == 1
+
+
+def test_waiter_cancelled_after_being_granted_hands_its_slot_back():
+    async def scenario():
+        limiter = EngineLimiter("e", rate=0.001, burst=3, max_in_flight=1, max_wait=5)
+        await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        tokens = limiter.bucket.tokens
+        # Grants the slot to the waiter, which is cancelled before it resumes
+        limiter.release()
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        return limiter, tokens
+
+    limiter, tokens = asyncio.run(scenario())
+    assert limiter.in_flight == 0
+    assert limiter.bucket.tokens == pytest.approx(tokens, abs=0.01)
+
+
+def test_waiter_cancelled_while_queued_takes_no_slot():
+    async def scenario():
+        limiter = EngineLimiter("e", rate=1000, burst=10, max_in_flight=1, max_wait=5)
+        await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        limiter.release()
+        await asyncio.wait_for(limiter.acquire(), 1)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.in_flight == 1
+    assert len(limiter._waiters) == 0
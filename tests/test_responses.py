@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from responses import (
+    ENGINE_RESULT_SELECTABLE, SEARCH_RESPONSE_SELECTABLE, EngineResult, JSONBytesResponse, MultiSearchResponse,
+    SearchResponse, parse_fields, wants,
+)
+
+
+def test_parse_fields_splits_and_trims_names():
+    assert parse_fields(None, SEARCH_RESPONSE_SELECTABLE) is None
+    assert parse_fields(" status_code, results ,", SEARCH_RESPONSE_SELECTABLE) == {"status_code", "results"}
+    assert parse_fields("", ENGINE_RESULT_SELECTABLE) == frozenset()
+
+
+def test_parse_fields_only_accepts_the_endpoints_own_fields():
+    assert parse_fields("parsed_results,elapsed_ms", ENGINE_RESULT_SELECTABLE) == {"parsed_results", "elapsed_ms"}
+    with pytest.raises(ValueError, match="parsed_results"):
+        parse_fields("parsed_results", SEARCH_RESPONSE_SELECTABLE)
+    with pytest.raises(ValueError, match="content"):
+        parse_fields("status_code,content", ENGINE_RESULT_SELECTABLE)
+
+
+def test_wants():
+    assert wants(None, "content")
+    assert wants(frozenset({"content"}), "content")
+    assert not wants(frozenset({"results"}), "content")
+
+
+def test_selected_fields_keep_the_identifying_ones():
+    response = SearchResponse(query="q", engine="gg", url="https://x", status_code=200, content="<html>")
+    fields = parse_fields("status_code", SEARCH_RESPONSE_SELECTABLE)
+    assert json.loads(JSONBytesResponse(response, fields).body) == {
+        "query": "q", "engine": "gg", "status_code": 200,
+    }
+
+
+def test_multi_search_fields_apply_to_each_engine_entry():
+    response = MultiSearchResponse(query="q", engines=["gg", "gh"], results=[
+        EngineResult(engine="gg", url="https://g", status_code=200, content_preview="<html>"),
+        EngineResult(engine="gh", url="https://h", status_code=500, error="upstream"),
+    ])
+    fields = parse_fields("status_code,error", ENGINE_RESULT_SELECTABLE)
+    assert json.loads(JSONBytesResponse(response, fields).body) == {
+        "query": "q",
+        "engines": ["gg", "gh"],
+        "results": [
+            {"engine": "gg", "status_code": 200, "error": None},
+            {"engine": "gh", "status_code": 500, "error": "upstream"},
+        ],
+    }
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from shared import SharedState, SharedTokenBucket
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two workers' connections to one shared database"""
+    path = str(tmp_path / "shared.db")
+    states = SharedState(path), SharedState(path)
+    yield states
+    for state in states:
+        state.close()
+
+
+def test_lease_is_held_until_released(workers):
+    first, second = workers
+    assert first.try_lease("key", 30)
+    assert not second.try_lease("key", 30)
+    # The owner may renew its own lease
+    assert first.try_lease("key", 30)
+
+    first.release("key")
+    assert second.try_lease("key", 30)
+    assert first.counters["leases"] == 2 and second.counters["leases"] == 1
+
+
+def test_expired_lease_is_taken_over_by_another_worker(workers):
+    first, second = workers
+    assert first.try_lease("key", 0)
+    assert second.try_lease("key", 30)
+    assert not first.try_lease("key", 30)
+    # Releasing a lease another worker took over leaves it in place
+    first.release("key")
+    assert not first.try_lease("key", 30)
+
+
+def test_purge_drops_only_expired_leases(workers):
+    first, second = workers
+    first.try_lease("old", 0)
+    first.try_lease("live", 30)
+    assert second.purge_expired(time.time()) == 1
+    assert second.stats()["in_flight"] == 1
+
+
+def test_sync_charges_spent_tokens_to_the_shared_row(workers):
+    first, second = workers
+    mine = SharedTokenBucket(first, "e", rate=0.001, burst=5)
+    theirs = SharedTokenBucket(second, "e", rate=0.001, burst=5)
+    mine.sync()
+    now = time.monotonic()
+    assert mine.take(now) and mine.take(now) and mine.take(now)
+    assert mine.dirty
+
+    mine.sync()
+    theirs.sync()
+    assert not mine.dirty
+    assert theirs.local.tokens == pytest.approx(2, abs=0.01)
+    assert theirs.take(time.monotonic()) and theirs.take(time.monotonic())
+    assert not theirs.take(time.monotonic())
+
+    theirs.sync()
+    mine.sync()
+    assert mine.local.tokens == pytest.approx(0, abs=0.01)
+
+
+def test_sync_adopts_another_workers_backoff(workers):
+    first, second = workers
+    mine = SharedTokenBucket(first, "e", rate=4.0, burst=4)
+    theirs = SharedTokenBucket(second, "e", rate=4.0, burst=4)
+    mine.sync()
+    theirs.sync()
+    until = time.monotonic() + 30
+    theirs.throttle(until, 0.5, time.monotonic())
+    theirs.sync()
+
+    mine.sync()
+    tokens, rate, blocked_until = mine.state(time.monotonic())
+    assert rate == 2.0
+    assert blocked_until == until
+    assert tokens <= 0
+    assert not mine.take(time.monotonic())
@@ -0,0 +1,60 @@
+import asyncio
+
+from suggest import SuggestionIndex
+
+
+def index_with(*queries: str, path: str = "", **kwargs) -> SuggestionIndex:
+    index = SuggestionIndex(path, **kwargs)
+    for query in queries:
+        index.record(query)
+    return index
+
+
+def test_prefix_lookup_ranks_by_count_then_alphabetically():
+    index = index_with(*["rust async"] * 3, *["rust book"] * 2, *["rustlings"] * 2, *["ruby"] * 5, min_count=1)
+    assert index.suggest("rust") == ["rust async", "rust book", "rustlings"]
+    assert index.suggest("Rust ") == ["rust async", "rust book"]
+    assert index.suggest("rust", limit=1) == ["rust async"]
+    assert index.suggest("go") == []
+    assert index.suggest("  ") == []
+
+
+def test_queries_are_suggested_once_searched_min_count_times():
+    index = index_with("rare query", "common query", "common query", seeds=["rarely"], min_count=2)
+    assert index.suggest("r") == ["rarely"]
+    assert index.suggest("co") == ["common query"]
+
+    index.record("rare query")
+    assert index.suggest("rar") == ["rare query", "rarely"]
+
+
+def test_short_prefix_top_list_follows_new_counts():
+    index = index_with("python", "pandas", "pandas", min_count=1)
+    assert index.suggest("p") == ["pandas", "python"]
+    assert "p" in index.top
+
+    index.record("python")
+    index.record("python")
+    index.record("pytest")
+    assert index.suggest("p") == ["python", "pandas", "pytest"]
+    assert index.suggest("py") == ["python", "pytest"]
+
+
+def test_workers_merge_their_counts_through_the_file(tmp_path):
+    path = str(tmp_path / "suggestions.json")
+
+    async def scenario():
+        first = index_with("docker compose", "docker compose", path=path)
+        second = index_with("docker compose", "docker swarm", path=path)
+        await first.save()
+        await second.save()
+        await first.save()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.counts == second.counts == {"docker compose": 3, "docker swarm": 1}
+    assert first.pending == second.pending == {}
+    assert first.suggest("dock") == ["docker compose"]
+    # A restarted worker adds its own search to the saved one
+    restarted = index_with("docker swarm", path=path)
+    assert restarted.suggest("dock") == ["docker compose", "docker swarm"]